@@ -1,18 +1,21 @@
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 from textblob import TextBlob
 from datetime import datetime, timedelta
+from data_store import load_ohlcv, close_panel
+from sector_index import get_sector_index
+from async_fetch import fetch_history, fetch_news
 
-def get_stock_news_sentiment(symbol):
+def get_stock_news_sentiment(symbol, news=None):
     """
     Fetches recent news for a stock and calculates sentiment polarity.
+    news: optional raw news list already fetched by the caller.
     Returns: (sentiment_score, news_list)
     Score: -1 (Negative) to +1 (Positive)
     """
     try:
-        ticker = yf.Ticker(symbol)
-        news = ticker.news
+        if news is None:
+            news = fetch_news(symbol)
         
         if not news:
             return 0.0, []
@@ -65,8 +68,7 @@ def _weekly_ema_trend(symbol, df=None):
                 'volume': 'sum'
             })
         else:
-            ticker = yf.Ticker(symbol)
-            weekly = ticker.history(period="1y", interval="1wk")
+            weekly = fetch_history(symbol, period="1y", interval="1wk")
             
         if weekly.empty:
             return "Sideways"
@@ -86,28 +88,9 @@ def _weekly_ema_trend(symbol, df=None):
     except Exception:
         return "Sideways"
 
-from functools import lru_cache
-
-@lru_cache(maxsize=1)
-def _load_sector_map(path="sector_mapping.csv"):
-    try:
-        return pd.read_csv(path)
-    except Exception:
-        return pd.DataFrame()
-
-def _sector_lookup(symbol, mapping_path="sector_mapping.csv"):
-    """Return sector name for a given symbol using a CSV mapping."""
-    try:
-        df = _load_sector_map(mapping_path)
-        if df.empty:
-            return "Unknown"
-            
-        row = df.loc[df['symbol'] == symbol]
-        if not row.empty:
-            return row.iloc[0]['sector']
-        return "Unknown"
-    except Exception:
-        return "Unknown"
+def _sector_lookup(symbol):
+    """Return sector name for a given symbol using the sector_mapping.csv index."""
+    return get_sector_index().sector_of(symbol)
 
 def _vwap(df):
     """Calculate Volume-Weighted Average Price for the most recent day."""
@@ -118,14 +101,6 @@ def _vwap(df):
     except Exception:
         return None
 
-def _atr(df, period=14):
-    """Calculate Average True Range using pandas-ta."""
-    try:
-        atr_series = df.ta.atr(length=period)
-        return float(atr_series.iloc[-1])
-    except Exception:
-        return None
-
 def _candlestick_pattern(df):
     """Detect simple bullish engulfing pattern or hammer."""
     try:
@@ -149,10 +124,9 @@ def _candlestick_pattern(df):
     except Exception:
         return "None"
 
-def _risk_reward(symbol, df, price):
+def _risk_reward(recent_low, price):
     """Calculate stop-loss (recent 14-day low), target (1.5x risk) and R:R ratio."""
     try:
-        recent_low = df['low'].rolling(window=14).min().iloc[-1]
         risk = price - recent_low
         if risk <= 0:
             return (None, None, None)
@@ -167,8 +141,7 @@ def get_general_market_news():
     Fetches general market news (using Nifty 50 index as proxy).
     """
     try:
-        ticker = yf.Ticker("^NSEI")
-        news = ticker.news
+        news = fetch_news("^NSEI")
         
         formatted_news = []
         for item in news:
@@ -206,132 +179,163 @@ def get_general_market_news():
     except Exception:
         return []
 
-def get_sector_performance(limit=50):
+def get_sector_performance(limit=None):
     """
     Fetches daily % change for stocks and aggregates by sector.
-    Returns a DataFrame suitable for a Treemap.
+    Closes come from the local OHLCV cache (only missing bars are downloaded) and
+    the change is computed for the whole universe at once on a wide close matrix.
+    Returns a DataFrame suitable for a Treemap, with the sector's average change
+    precomputed in 'Sector Change'. limit: only the first N mapped stocks (None = all).
     """
     try:
         # 1. Load Sector Map
-        mapping_df = pd.read_csv("sector_mapping.csv")
-        symbols = mapping_df['symbol'].tolist()[:limit]
+        sector_index = get_sector_index()
+        symbols = sector_index.symbols()[:limit]
         
         if not symbols:
             return pd.DataFrame()
             
-        # 2. Batch Download
-        # Use chunks to avoid Rate Limiting
-        chunk_size = 20
-        results = []
-        
-        import time
+        # 2. Cached daily bars -> dates x symbols close matrix
+        closes = close_panel(load_ohlcv(symbols, period="5d"))
+        if closes.empty:
+            return pd.DataFrame()
+            
+        # 3. Last two valid closes of every symbol (ignoring gaps), vectorized:
+        # the previous close carried to each row, read at the symbol's last valid row
+        filled = closes.ffill()
+        curr = filled.iloc[-1]
+        prev = filled.shift(1).where(closes.notna()).ffill().iloc[-1]
+        change = (curr - prev) / prev * 100
         
-        # Helper to chunk list
-        def chunk_list(lst, n):
-            for i in range(0, len(lst), n):
-                yield lst[i:i + n]
-
-        for chunk in chunk_list(symbols, chunk_size):
-            try:
-                # threads=True uses yfinance's internal threading
-                data = yf.download(chunk, period="5d", progress=False, auto_adjust=True)
-                
-                if data.empty:
-                    time.sleep(1)
-                    continue
-                
-                # Extract Close prices
-                try:
-                    close_data = data['Close']
-                except KeyError:
-                    if 'close' in data.columns:
-                        close_data = data['close']
-                    else:
-                        continue
-
-                for sym in chunk:
-                    try:
-                        # Get series for this symbol
-                        if isinstance(close_data, pd.DataFrame):
-                            if sym in close_data.columns:
-                                series = close_data[sym]
-                            else:
-                                continue
-                        elif isinstance(close_data, pd.Series) and len(chunk) == 1:
-                            series = close_data
-                        else:
-                            continue
-                            
-                        # Drop NaNs
-                        series = series.dropna()
-                        
-                        if len(series) >= 2:
-                            curr = series.iloc[-1]
-                            prev = series.iloc[-2]
-                            
-                            if curr == 0 or pd.isna(curr) or pd.isna(prev):
-                                continue
-                                
-                            change = ((curr - prev) / prev) * 100
-                            sector = _sector_lookup(sym)
-                            
-                            results.append({
-                                'Symbol': sym, 
-                                'Sector': sector, 
-                                'Change': change, 
-                                'Price': float(curr)
-                            })
-                    except Exception:
-                        continue
-                
-                time.sleep(2) # Delay between chunks
-                
-            except Exception:
-                time.sleep(2)
-                continue
-                    
-        return pd.DataFrame(results)
+        valid = (closes.count() >= 2) & curr.notna() & prev.notna() & (curr != 0)
+        results = pd.DataFrame({
+            'Symbol': closes.columns[valid],
+            'Change': change[valid].values,
+            'Price': curr[valid].astype(float).values
+        })
+        results.insert(1, 'Sector', results['Symbol'].map(sector_index.sectors_for(results['Symbol'])))
+        results['Sector Change'] = results.groupby('Sector')['Change'].transform('mean')
+        return results
         
     except Exception as e:
         print(f"Heatmap Error: {e}")
         return pd.DataFrame()
 
-def _calculate_macd(df):
-    """Calculates MACD, MACD Histogram, and MACD Signal."""
-    # Default lengths: fast=12, slow=26, signal=9
-    df.ta.macd(append=True)
-    
-    # Find the correct column names dynamically
-    macd_cols = [col for col in df.columns if 'MACD_' in col and 'H' not in col and 'S' not in col]
-    macdh_cols = [col for col in df.columns if 'MACDH_' in col]
-    macds_cols = [col for col in df.columns if 'MACDS_' in col]
-
-    if not macd_cols or not macdh_cols or not macds_cols:
-        return {'macd': None, 'macdh': None, 'macds': None}
+def _last(series):
+    """Last value of an indicator series, or None if it could not be computed."""
+    if series is None or len(series) == 0:
+        return None
+    value = series.iloc[-1]
+    return None if pd.isna(value) else float(value)
 
+def _indicator_kernel(df):
+    """
+    Computes every indicator used by get_technical_analysis in one pass and keeps
+    only the latest values. df must have lowercase OHLCV columns; it is not modified.
+    """
+    high, low, close, volume = df['high'], df['low'], df['close'], df['volume']
+    
+    # 1. Trend Strength (ADX)
+    adx_df = ta.adx(high, low, close, length=14)
+    
+    # 2. MACD (fast=12, slow=26, signal=9) and Bollinger Bands (pandas-ta defaults).
+    # pandas-ta returns MACD, MACDh, MACDs and BBL, BBM, BBU, ... in that order,
+    # so the columns are taken by position rather than by (version dependent) name.
+    macd_df = ta.macd(close)
+    bb_df = ta.bbands(close)
+    
+    # 3. Relative Volume (RVOL): current volume vs 20-day average
+    avg_vol = volume.iloc[-20:].mean(skipna=False) if len(volume) >= 20 else float('nan')
+    current_vol = volume.iloc[-1]
+    
     return {
-        'macd': df[macd_cols[0]].iloc[-1],
-        'macdh': df[macdh_cols[0]].iloc[-1],
-        'macds': df[macds_cols[0]].iloc[-1]
+        'adx': _last(adx_df['ADX_14']) if adx_df is not None else None,
+        'rsi': _last(ta.rsi(close, length=14)),
+        'rvol': current_vol / avg_vol if avg_vol > 0 else 1.0,
+        'macd': _last(macd_df.iloc[:, 0]) if macd_df is not None else None,
+        'macdh': _last(macd_df.iloc[:, 1]) if macd_df is not None else None,
+        'macds': _last(macd_df.iloc[:, 2]) if macd_df is not None else None,
+        'bb_lower': _last(bb_df.iloc[:, 0]) if bb_df is not None else None,
+        'bb_middle': _last(bb_df.iloc[:, 1]) if bb_df is not None else None,
+        'bb_upper': _last(bb_df.iloc[:, 2]) if bb_df is not None else None,
+        'atr': _last(ta.atr(high, low, close, length=14)),
+        'vwap': _vwap(df),
+        # Last value of the 14-day rolling low (NaN if any bar in the window is missing)
+        'recent_low': low.iloc[-14:].min(skipna=False) if len(low) >= 14 else float('nan'),
+        'current_price': close.iloc[-1]
     }
 
-def _calculate_bollinger_bands(df):
-    """Calculates Bollinger Bands (BBANDS)."""
-    # Default lengths: length=20, std=2
-    df.ta.bbands(append=True)
+def _trend_prediction(k):
+    """Turns the indicator values from _indicator_kernel into a trend label."""
+    current_adx, current_rsi = k['adx'], k['rsi']
+    current_macd, current_macdh, current_macds = k['macd'], k['macdh'], k['macds']
+    bb_upper, bb_lower = k['bb_upper'], k['bb_lower']
+    current_price = k['current_price']
+    
+    trend_prediction = "Neutral"
 
-    # Find the correct column names dynamically
-    bb_upper_cols = [col for col in df.columns if 'BBU_' in col]
-    bb_middle_cols = [col for col in df.columns if 'BBM_' in col]
-    bb_lower_cols = [col for col in df.columns if 'BBL_' in col]
+    # Basic trend strength and direction
+    if current_adx is not None and current_adx > 25:
+        if current_rsi is not None and current_macdh is not None:
+            if current_rsi > 60 and current_macdh > 0:
+                trend_prediction = "Strong Uptrend"
+            elif current_rsi < 40 and current_macdh < 0:
+                trend_prediction = "Strong Downtrend"
+            else:
+                trend_prediction = "Trending (Direction Unclear)"
+        else:
+             trend_prediction = "Trending (Direction Unclear)"
+    elif current_adx is not None and current_adx < 20:
+        trend_prediction = "Sideways / Choppy"
+    
+    # Add MACD crossover signal
+    if current_macd is not None and current_macds is not None and current_macdh is not None:
+        if current_macd > current_macds and current_macdh > 0:
+            trend_prediction += " (MACD Bullish Crossover)"
+        elif current_macd < current_macds and current_macdh < 0:
+            trend_prediction += " (MACD Bearish Crossover)"
 
-    if not bb_upper_cols or not bb_middle_cols or not bb_lower_cols:
-        return {'bb_upper': None, 'bb_middle': None, 'bb_lower': None}
+    # Add Bollinger Band position
+    if bb_upper is not None and bb_lower is not None and current_price is not None:
+        if current_price > bb_upper:
+            trend_prediction += " (Overbought - Above Upper BB)"
+        elif current_price < bb_lower:
+            trend_prediction += " (Oversold - Below Lower BB)"
+    
+    return trend_prediction
 
+def _analyze_frame(symbol, df):
+    """get_technical_analysis for an already loaded daily frame (any column case)."""
+    if df is None or df.empty or len(df) < 50: # Ensure enough data for indicators
+        return None
+        
+    # Lowercase view for the indicators; the caller's frame is left untouched
+    df = df.rename(columns=str.lower)
+    
+    k = _indicator_kernel(df)
+    stop_loss, target_price, rr_ratio = _risk_reward(k['recent_low'], k['current_price'])
+    
     return {
-        'bb_upper': df[bb_upper_cols[0]].iloc[-1],
-        'bb_middle': df[bb_middle_cols[0]].iloc[-1],
-        'bb_lower': df[bb_lower_cols[0]].iloc[-1]
+        'adx': k['adx'],
+        'rsi': k['rsi'],
+        'rvol': k['rvol'],
+        'macd': k['macd'],
+        'macdh': k['macdh'],
+        'macds': k['macds'],
+        'bb_upper': k['bb_upper'],
+        'bb_middle': k['bb_middle'],
+        'bb_lower': k['bb_lower'],
+        'prediction': _trend_prediction(k),
+        'current_price': k['current_price'],
+        # New Metrics
+        'weekly_trend': _weekly_ema_trend(symbol, df),
+        'sector': _sector_lookup(symbol),
+        'vwap': k['vwap'],
+        'atr': k['atr'],
+        'candlestick': _candlestick_pattern(df),
+        'stop_loss': stop_loss,
+        'target_price': target_price,
+        'rr_ratio': rr_ratio
     }
 
 def get_technical_analysis(symbol, df=None):
@@ -346,100 +350,40 @@ def get_technical_analysis(symbol, df=None):
     Args:
         symbol (str): Stock symbol.
         df (pd.DataFrame, optional): Existing data. If None, fetches new data.
+            It is not modified.
     """
     try:
         if df is None:
-            ticker = yf.Ticker(symbol)
             # Fetch enough data for ADX (needs 14 periods + smoothing), MACD (26 periods), BB (20 periods)
-            df = ticker.history(period="6mo", interval="1d")
-        
-        if df.empty or len(df) < 50: # Ensure enough data for indicators
-            return None
-            
-        df.columns = [c.lower() for c in df.columns]
+            df = fetch_history(symbol, period="6mo", interval="1d")
         
-        # 1. Trend Strength (ADX)
-        # ADX > 25 indicates a strong trend
-        adx_df = df.ta.adx(length=14)
-        current_adx = adx_df['ADX_14'].iloc[-1]
-        
-        # 2. Momentum (RSI)
-        df.ta.rsi(length=14, append=True)
-        current_rsi = df['RSI_14'].iloc[-1]
-        
-        # 3. Relative Volume (RVOL)
-        # Compare current volume to 20-day average volume
-        avg_vol = df['volume'].rolling(window=20).mean().iloc[-1]
-        current_vol = df['volume'].iloc[-1]
-        rvol = current_vol / avg_vol if avg_vol > 0 else 1.0
-        
-        # 4. MACD
-        macd_data = _calculate_macd(df)
-        current_macd = macd_data['macd']
-        current_macdh = macd_data['macdh']
-        current_macds = macd_data['macds']
-
-        # 5. Bollinger Bands
-        bb_data = _calculate_bollinger_bands(df)
-        bb_upper = bb_data['bb_upper']
-        bb_middle = bb_data['bb_middle']
-        bb_lower = bb_data['bb_lower']
-        
-        # 6. Trend Prediction
-        trend_prediction = "Neutral"
-        current_price = df['close'].iloc[-1]
-
-        # Basic trend strength and direction
-        if current_adx is not None and current_adx > 25:
-            if current_rsi is not None and current_macdh is not None:
-                if current_rsi > 60 and current_macdh > 0:
-                    trend_prediction = "Strong Uptrend"
-                elif current_rsi < 40 and current_macdh < 0:
-                    trend_prediction = "Strong Downtrend"
-                else:
-                    trend_prediction = "Trending (Direction Unclear)"
-            else:
-                 trend_prediction = "Trending (Direction Unclear)"
-        elif current_adx is not None and current_adx < 20:
-            trend_prediction = "Sideways / Choppy"
-        
-        # Add MACD crossover signal
-        if current_macd is not None and current_macds is not None and current_macdh is not None:
-            if current_macd > current_macds and current_macdh > 0:
-                trend_prediction += " (MACD Bullish Crossover)"
-            elif current_macd < current_macds and current_macdh < 0:
-                trend_prediction += " (MACD Bearish Crossover)"
-
-        # Add Bollinger Band position
-        if bb_upper is not None and bb_lower is not None and current_price is not None:
-            if current_price > bb_upper:
-                trend_prediction += " (Overbought - Above Upper BB)"
-            elif current_price < bb_lower:
-                trend_prediction += " (Oversold - Below Lower BB)"
-            
-        return {
-            'adx': current_adx,
-            'rsi': current_rsi,
-            'rvol': rvol,
-            'macd': current_macd,
-            'macdh': current_macdh,
-            'macds': current_macds,
-            'bb_upper': bb_upper,
-            'bb_middle': bb_middle,
-            'bb_lower': bb_lower,
-            'prediction': trend_prediction,
-            'current_price': current_price,
-            # New Metrics
-            'weekly_trend': _weekly_ema_trend(symbol, df),
-            'sector': _sector_lookup(symbol),
-            'vwap': _vwap(df),
-            'atr': _atr(df),
-            'candlestick': _candlestick_pattern(df),
-            'stop_loss': _risk_reward(symbol, df, current_price)[0],
-            'target_price': _risk_reward(symbol, df, current_price)[1],
-            'rr_ratio': _risk_reward(symbol, df, current_price)[2]
-        }
+        return _analyze_frame(symbol, df)
         
     except Exception as e:
         print(f"Error analyzing {symbol}: {e}")
         return None
+
+def get_technical_analysis_batch(symbols, frames=None):
+    """
+    get_technical_analysis for many symbols.
+    frames: optional {symbol: DataFrame} (e.g. from data_store.load_ohlcv); missing
+    symbols are loaded from the local OHLCV cache in one batched call.
+    Returns {symbol: result dict}; symbols without enough data are left out.
+    """
+    frames = dict(frames or {})
+    missing = [s for s in symbols if s not in frames]
+    if missing:
+        frames.update(load_ohlcv(missing, period="6mo"))
+        
+    results = {}
+    for symbol in symbols:
+        if symbol not in frames:
+            continue
+        try:
+            result = _analyze_frame(symbol, frames[symbol])
+        except Exception as e:
+            print(f"Error analyzing {symbol}: {e}")
+            continue
+        if result:
+            results[symbol] = result
+    return results
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import yfinance as yf
+
+MAX_CONCURRENCY = 8
+
+
+def _ticker_history(symbol, period, interval):
+    return yf.Ticker(symbol).history(period=period, interval=interval)
+
+
+def _ticker_news(symbol):
+    return yf.Ticker(symbol).news
+
+
+class AsyncFetcher:
+    """
+    Concurrent front end for the per-symbol yfinance calls (Ticker.history / .news).
+
+    An asyncio event loop runs on a background thread; the blocking yfinance
+    calls run on a thread pool, at most `max_concurrency` at a time (semaphore).
+    Concurrent requests for the same key ((symbol, period, interval) for history,
+    symbol for news) share one in-flight fetch. Nothing is cached once a fetch
+    completes; the OHLCV cache in data_store covers that.
+
+    The sync wrappers (fetch_history, fetch_news, fetch_many) can be called from
+    any thread, including Streamlit's script thread. submit_news starts a news
+    fetch without waiting, so the caller can do other work meanwhile. History
+    frames are returned as copies, so callers may modify them in place.
+
+    history_fn(symbol, period, interval) and news_fn(symbol) are injectable.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, history_fn=_ticker_history, news_fn=_ticker_news):
+        self.max_concurrency = max_concurrency
+        self.history_fn = history_fn
+        self.news_fn = news_fn
+        self.stats = {'requests': 0, 'fetches': 0, 'coalesced': 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fetch")
+        self._inflight = {}  # only touched on the loop thread
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    async def _limited(self, fn, *args):
+        async with self._semaphore:
+            self.stats['fetches'] += 1
+            return await self._loop.run_in_executor(self._executor, fn, *args)
+
+    async def _coalesced(self, key, fn, *args):
+        self.stats['requests'] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._loop.create_task(self._limited(fn, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+        # shield: one caller giving up must not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def history(self, symbol, period="6mo", interval="1d"):
+        """Shared (not copied) result of Ticker(symbol).history(period, interval)."""
+        return await self._coalesced(('history', symbol, period, interval),
+                                     self.history_fn, symbol, period, interval)
+
+    async def news(self, symbol):
+        return await self._coalesced(('news', symbol), self.news_fn, symbol)
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _wait(self, coro, timeout):
+        return self._submit(coro).result(timeout)
+
+    def fetch_history(self, symbol, period="6mo", interval="1d", timeout=None):
+        """Blocking wrapper: a private copy of the symbol's history."""
+        df = self._wait(self.history(symbol, period, interval), timeout)
+        return df.copy() if df is not None else None
+
+    def fetch_news(self, symbol, timeout=None):
+        return self.submit_news(symbol).result(timeout)
+
+    def submit_news(self, symbol):
+        """Starts a news fetch; returns a concurrent.futures.Future of the news list."""
+        async def news_list():
+            news = await self.news(symbol)
+            return list(news) if news else []
+
+        return self._submit(news_list())
+
+    def fetch_many(self, requests, timeout=None):
+        """
+        Runs several history requests concurrently. `requests` is a list of
+        (symbol, period, interval) tuples; returns the frames (copies) in the same
+        order, with None where a fetch failed.
+        """
+        async def gather():
+            return await asyncio.gather(*(self.history(*req) for req in requests), return_exceptions=True)
+
+        results = self._wait(gather(), timeout)
+        return [None if isinstance(r, BaseException) or r is None else r.copy() for r in results]
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Process-wide fetcher so every caller shares one concurrency limit."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = AsyncFetcher()
+    return _fetcher
+
+
+def fetch_history(symbol, period="6mo", interval="1d"):
+    return get_fetcher().fetch_history(symbol, period=period, interval=interval)
+
+
+def fetch_news(symbol):
+    return get_fetcher().fetch_news(symbol)
+
+
+def submit_news(symbol):
+    return get_fetcher().submit_news(symbol)
+
+
+def fetch_many(requests):
+    return get_fetcher().fetch_many(requests)
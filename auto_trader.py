@@ -1,8 +1,8 @@
 import time
 import schedule
-from scanner import scan_stocks as scan_market
 from paper_trader import PaperTrader
-from database import get_recent_signals, get_todays_trade_count
+from intraday_engine import IntradayEngine
+from database import get_todays_trade_count
 import sys
 import logging
 from datetime import datetime
@@ -13,6 +13,9 @@ logging.basicConfig(filename='auto_trader.log', level=logging.INFO,
 
 trader = PaperTrader()
 
+# Full daily scan once per session, then incremental TSL checks on the live bar
+engine = IntradayEngine(strategy_type="standard")
+
 # Global Buffer
 signal_buffer = []
 
@@ -40,26 +43,12 @@ def job():
             print("Daily limit reached. Monitoring exits only.")
             return
 
-        # 3. Scan for New Signals (Trigger DB Update)
-        # scan_stocks saves to DB automatically
-        scan_market(strategy_type="standard")
-        
-        # 4. Fetch Fresh Signals (Last 5 mins)
-        # 4. Fetch Fresh Signals (Last 5 mins)
-        recent_signals = get_recent_signals(limit=50) # Increased limit to ensure we find today's
-        
-        # Filter: ONLY Today's Signals
-        today_str = datetime.now().strftime('%Y-%m-%d')
-        recent_signals = [s for s in recent_signals if s['signal_date'] == today_str]
+        # 3. Signals: today's TSL crossovers on the live bar, until buffered
+        # (the full scan runs before the open, outside this loop)
+        new_signals = engine.run_cycle()
         
-        # Collect signals that are RECENT (e.g., within last 2 minutes)
-        # to avoid processing old signals repeatedly.
-        # But for buffer logic, we might want to just process what's "new" since last check.
-        # Ideally, we should track processed IDs. 
-        # For simplicity, we pass recent 20 to 'process_buy_signals' which checks selection criteria.
-        
-        # Get Candidates (Don't execute yet)
-        candidates = trader.process_buy_signals(recent_signals, execute=False)
+        # 4. Get Candidates (Don't execute yet)
+        candidates = trader.process_buy_signals(new_signals, execute=False)
         
         if candidates:
             print(f"Found {len(candidates)} candidates.")
@@ -69,6 +58,8 @@ def job():
                     cand['added_at'] = datetime.now()
                     signal_buffer.append(cand)
                     print(f"Added {cand['symbol']} to buffer (at {cand['added_at'].strftime('%H:%M')}). Score: {cand['score']:.2f}")
+            # Buffered symbols are either traded or dropped; stop re-offering them
+            engine.mark_taken(b['symbol'] for b in signal_buffer)
         
         # 5. Buffer Logic
         # Condition A: Buffer satisfied (>= 2 signals)
@@ -100,11 +91,16 @@ def start_auto_trader():
     print("🚀 Auto Trader Started! Running fully autonomous.")
     logging.info("Auto Trader Started.")
     
+    # Full daily scan once; cycles after this only quote the live bar
+    engine.bootstrap()
+    
     # Run immediately once
     job()
     
     # Schedule every 1 minute
     schedule.every(1).minutes.do(job)
+    # Next sessions: full scan before the open, on its own thread so cycles keep running
+    schedule.every().day.at("08:30").do(engine.start_bootstrap)
     
     while True:
         schedule.run_pending()
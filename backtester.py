@@ -1,121 +1,383 @@
-import yfinance as yf
+import hashlib
 import pandas as pd
 import numpy as np
-from strategy import calculate_strategy_indicators
+from strategy import calculate_strategy_indicators, add_strategy_indicators, panel_indicator_arrays, rsi_panel
+from data_store import load_ohlcv, close_panel
+from trading_calendar import calendar_groups
+from async_fetch import fetch_history
 
-def run_backtest(symbol, period="1y"):
+def rolling_stop_low(low, stop_lookback=10):
+    """Lowest low of the previous `stop_lookback` bars, for every bar."""
+    return pd.Series(low).rolling(window=stop_lookback, min_periods=1).min().shift(1).to_numpy()
+
+def simulate_trades(close, high, low, tsl, start=20, stop_lookback=10, reward_ratio=1.5, recent_low=None):
+    """
+    NumPy backtest core for one symbol (1-D float arrays of equal length).
+
+    - Entries: close crosses above the TSL (prev close < prev TSL, close > TSL) on
+      bar >= start, bought at the close. Entry masks are built for all bars at once.
+    - Stop: lowest low of the previous `stop_lookback` bars (5% below entry if that
+      low is not below the entry). Target: entry + reward_ratio * risk.
+    - Exit: the first later bar whose low touches the stop (Loss, at the stop) or
+      whose high touches the target (Win, at the target); the stop wins if both are
+      hit on the same bar. Found with a vectorized first-hit search per trade.
+    - No overlapping trades: the next entry is the first signal after the exit bar.
+      A trade still open at the end is not counted.
+
+    recent_low: optional precomputed rolling_stop_low(low, stop_lookback), so parameter
+    sweeps can reuse it across many runs.
+
+    Returns a list of (entry_index, exit_index, entry_price, exit_price, is_win).
+    """
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    tsl = np.asarray(tsl, dtype=float)
+    n = len(close)
+    if n <= start:
+        return []
+
+    # 1. Entry mask (NaN comparisons are False, so incomplete TSL never triggers)
+    entry_mask = np.zeros(n, dtype=bool)
+    entry_mask[1:] = (close[:-1] < tsl[:-1]) & (close[1:] > tsl[1:])
+    entry_mask[:start] = False
+    entries = np.flatnonzero(entry_mask)
+    if len(entries) == 0:
+        return []
+
+    # 2. Stop / target for every potential entry bar
+    if recent_low is None:
+        recent_low = rolling_stop_low(low, stop_lookback)
+    stop = np.where(recent_low < close, recent_low, close * 0.95) # Fallback
+    target = close + reward_ratio * (close - stop)
+
+    # 3. Walk from trade to trade (not bar to bar)
+    trades = []
+    pos = 0
+    while pos < len(entries):
+        i = entries[pos]
+        stop_hit = low[i + 1:] <= stop[i]
+        exit_hit = stop_hit | (high[i + 1:] >= target[i])
+        if not exit_hit.any():
+            break
+        k = int(np.argmax(exit_hit))
+        j = i + 1 + k
+        is_win = not stop_hit[k]
+        trades.append((i, j, close[i], target[i] if is_win else stop[i], is_win))
+        # The exit bar can't open a new trade; the next bar can
+        pos = np.searchsorted(entries, j, side='right')
+    return trades
+
+def _trade_records(index, sim_trades):
+    """Converts simulate_trades output into the run_backtest trade dicts."""
+    trades = []
+    for i, j, entry_price, exit_price, is_win in sim_trades:
+        trades.append({
+            'Entry Date': index[i],
+            'Exit Date': index[j],
+            'Entry Price': entry_price,
+            'Exit Price': exit_price,
+            'Result': 'Win' if is_win else 'Loss',
+            'P&L %': (exit_price - entry_price) / entry_price * 100
+        })
+    return trades
+
+def _summary_metrics(pnl, is_win):
+    """Win rate, total return and profit factor from arrays of trade P&L % and outcomes."""
+    total_trades = len(pnl)
+    if total_trades == 0:
+        return {'total_trades': 0, 'win_rate': 0.0, 'total_return': 0.0, 'profit_factor': 0.0}
+
+    gross_profit = pnl[pnl > 0].sum()
+    gross_loss = abs(pnl[pnl < 0].sum())
+    return {
+        'total_trades': total_trades,
+        'win_rate': (np.count_nonzero(is_win) / total_trades) * 100,
+        'total_return': pnl.sum(),
+        'profit_factor': gross_profit / gross_loss if gross_loss > 0 else float('inf')
+    }
+
+def _metrics(trades):
+    """Performance metrics for a list of trade dicts."""
+    pnl = np.array([t['P&L %'] for t in trades], dtype=float)
+    is_win = np.array([t['Result'] == 'Win' for t in trades], dtype=bool)
+    metrics = _summary_metrics(pnl, is_win)
+    metrics['trades'] = trades
+    return metrics
+
+def _backtest_frame(df, stop_lookback=10, reward_ratio=1.5):
+    """Trades for one frame that already has the strategy indicators."""
+    sim_trades = simulate_trades(df['close'].to_numpy(), df['high'].to_numpy(),
+                                 df['low'].to_numpy(), df['tsl'].to_numpy(),
+                                 stop_lookback=stop_lookback, reward_ratio=reward_ratio)
+    return _trade_records(df.index, sim_trades)
+
+def run_backtest(symbol, period="1y", no=3, stop_lookback=10, reward_ratio=1.5, df=None):
     """
     Runs a backtest for the given symbol over the specified period.
+    no: TSL swing period; stop_lookback: bars for the swing-low stop;
+    reward_ratio: target as a multiple of the risk.
+    df: optional daily bars covering `period`; fetched when None. It is not modified.
     Returns a dictionary with performance metrics and a DataFrame of trades.
     """
     try:
         # 1. Fetch Data
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=period, interval="1d")
-        
+        if df is None:
+            df = fetch_history(symbol, period=period, interval="1d")
+        else:
+            df = df.copy()
+
         if df.empty or len(df) < 50:
             return None
-            
+
         df.columns = [c.lower() for c in df.columns]
-        
+
         # 2. Calculate Strategy Indicators
-        df = calculate_strategy_indicators(df)
-        
-        # 3. Simulate Trades
-        trades = []
-        in_trade = False
-        entry_price = 0.0
-        stop_loss = 0.0
-        target_price = 0.0
-        entry_date = None
-        
-        # Iterate through the DataFrame
-        # Start from index 20 to ensure indicators are valid
-        for i in range(20, len(df)):
-            curr_date = df.index[i]
-            curr_close = df['close'].iloc[i]
-            curr_high = df['high'].iloc[i]
-            curr_low = df['low'].iloc[i]
-            prev_close = df['close'].iloc[i-1]
-            prev_tsl = df['tsl'].iloc[i-1]
-            curr_tsl = df['tsl'].iloc[i]
-            
-            if not in_trade:
-                # Check for Buy Signal (Crossover)
-                if prev_close < prev_tsl and curr_close > curr_tsl:
-                    # Buy at Close
-                    entry_price = curr_close
-                    entry_date = curr_date
-                    
-                    # Set Stop Loss: Lowest Low of last 10 days
-                    # (Simple swing low approximation)
-                    recent_low = df['low'].iloc[i-10:i].min()
-                    stop_loss = recent_low if recent_low < entry_price else entry_price * 0.95 # Fallback
-                    
-                    # Set Target: 1.5x Risk
-                    risk = entry_price - stop_loss
-                    target_price = entry_price + (1.5 * risk)
-                    
-                    in_trade = True
-            
-            else:
-                # Check for Exit
-                # 1. Hit Stop Loss
-                if curr_low <= stop_loss:
-                    exit_price = stop_loss # Assume slippage/gap fill at SL
-                    pnl = (exit_price - entry_price) / entry_price * 100
-                    trades.append({
-                        'Entry Date': entry_date,
-                        'Exit Date': curr_date,
-                        'Entry Price': entry_price,
-                        'Exit Price': exit_price,
-                        'Result': 'Loss',
-                        'P&L %': pnl
-                    })
-                    in_trade = False
-                
-                # 2. Hit Target
-                elif curr_high >= target_price:
-                    exit_price = target_price
-                    pnl = (exit_price - entry_price) / entry_price * 100
-                    trades.append({
-                        'Entry Date': entry_date,
-                        'Exit Date': curr_date,
-                        'Entry Price': entry_price,
-                        'Exit Price': exit_price,
-                        'Result': 'Win',
-                        'P&L %': pnl
-                    })
-                    in_trade = False
-                    
+        df = calculate_strategy_indicators(df, no=no)
+
+        # 3. Simulate Trades (Start from index 20 to ensure indicators are valid)
+        trades = _backtest_frame(df, stop_lookback=stop_lookback, reward_ratio=reward_ratio)
+
         # 4. Calculate Metrics
-        if not trades:
-            return {
-                'total_trades': 0,
-                'win_rate': 0.0,
-                'total_return': 0.0,
-                'profit_factor': 0.0,
-                'trades': []
-            }
-            
-        trades_df = pd.DataFrame(trades)
-        total_trades = len(trades_df)
-        wins = len(trades_df[trades_df['Result'] == 'Win'])
-        win_rate = (wins / total_trades) * 100
-        total_return = trades_df['P&L %'].sum()
-        
-        gross_profit = trades_df[trades_df['P&L %'] > 0]['P&L %'].sum()
-        gross_loss = abs(trades_df[trades_df['P&L %'] < 0]['P&L %'].sum())
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-        
-        return {
-            'total_trades': total_trades,
-            'win_rate': win_rate,
-            'total_return': total_return,
-            'profit_factor': profit_factor,
-            'trades': trades
-        }
-        
+        return _metrics(trades)
+
     except Exception as e:
         print(f"Backtest Error: {e}")
         return None
+
+def run_backtest_universe(symbols=None, frames=None, period="1y"):
+    """
+    run_backtest for a whole universe in one call.
+    frames: optional {symbol: OHLCV DataFrame}; otherwise `symbols` are loaded from
+    the local OHLCV cache. Indicators come from the panel engine and every symbol
+    goes through the NumPy core, so thousands of symbols x years of bars are practical.
+
+    Returns {'summary': DataFrame (one row of metrics per symbol),
+             'trades': DataFrame of all trades with a Symbol column}.
+    """
+    if frames is None:
+        frames = load_ohlcv(symbols or [], period=period)
+    frames = {s: df.rename(columns=str.lower) for s, df in frames.items() if len(df) >= 50}
+
+    # Indicators for all frames, one panel pass per calendar group
+    frames = add_strategy_indicators(frames)
+
+    summary = []
+    trade_parts = []
+    for symbol, df in frames.items():
+        try:
+            sim_trades = simulate_trades(df['close'].to_numpy(), df['high'].to_numpy(),
+                                         df['low'].to_numpy(), df['tsl'].to_numpy())
+        except Exception as e:
+            print(f"Backtest Error for {symbol}: {e}")
+            continue
+
+        if not sim_trades:
+            summary.append({'Symbol': symbol, **_summary_metrics(np.array([]), np.array([], dtype=bool))})
+            continue
+
+        # Columnar from here on: no per-trade dicts for large universes
+        entry_idx, exit_idx, entry_price, exit_price, is_win = (np.array(col) for col in zip(*sim_trades))
+        pnl = (exit_price - entry_price) / entry_price * 100
+        summary.append({'Symbol': symbol, **_summary_metrics(pnl, is_win)})
+        trade_parts.append(pd.DataFrame({
+            'Symbol': symbol,
+            'Entry Date': df.index[entry_idx],
+            'Exit Date': df.index[exit_idx],
+            'Entry Price': entry_price,
+            'Exit Price': exit_price,
+            'Result': np.where(is_win, 'Win', 'Loss'),
+            'P&L %': pnl
+        }))
+
+    trade_columns = ['Symbol', 'Entry Date', 'Exit Date', 'Entry Price', 'Exit Price', 'Result', 'P&L %']
+    return {
+        'summary': pd.DataFrame(summary, columns=['Symbol', 'total_trades', 'win_rate', 'total_return', 'profit_factor']),
+        'trades': pd.concat(trade_parts, ignore_index=True) if trade_parts else pd.DataFrame(columns=trade_columns)
+    }
+
+# Indicator panels shared between portfolio backtest runs over the same data
+# (e.g. trying different capital or limits), keyed by a hash of the bars
+_panel_cache = {}
+
+def _frames_fingerprint(frames):
+    """
+    Content hash of the symbols and their OHLCV bars. Same-shaped data with new
+    prices (a forming bar, a split re-adjustment) gets a different key.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for symbol, df in frames.items():
+        digest.update(symbol.encode())
+        digest.update(pd.util.hash_pandas_object(df[['open', 'high', 'low', 'close', 'volume']]).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _signal_arrays(frames):
+    """tsl, buy, sell and score arrays (dates x symbols) for frames sharing one index."""
+    p = {col: close_panel(frames, col) for col in ['high', 'low', 'close', 'volume']}
+    arrays, has_close = panel_indicator_arrays(p['high'], p['low'], p['close'])
+    close = p['close'].to_numpy(dtype=float)
+    tsl = arrays['tsl']
+
+    # Scanner signals: close crosses above / below the TSL, once a symbol has 20 bars
+    warm = np.cumsum(has_close, axis=0) > 20
+    buy = np.zeros(close.shape, dtype=bool)
+    sell = np.zeros(close.shape, dtype=bool)
+    buy[1:] = (close[:-1] < tsl[:-1]) & (close[1:] > tsl[1:]) & warm[1:]
+    sell[1:] = (close[:-1] > tsl[:-1]) & (close[1:] < tsl[1:])
+
+    # PaperTrader ranking inputs: RSI-14 and relative volume vs the 20-day average
+    volume = p['volume']
+    rvol = (volume / volume.rolling(window=20).mean()).to_numpy()
+    score = rsi_panel(p['close'], 14).to_numpy() + np.nan_to_num(rvol, nan=1.0) * 10
+    return {'tsl': tsl, 'buy': buy, 'sell': sell, 'score': score}
+
+def _portfolio_panels(frames):
+    """Wide (dates x symbols) OHLCV and indicator arrays for the portfolio backtest."""
+    key = _frames_fingerprint(frames)
+    if key in _panel_cache:
+        return _panel_cache[key]
+
+    p = {col: close_panel(frames, col) for col in ['open', 'low', 'close']}
+    index, symbols = p['close'].index, list(p['close'].columns)
+    shape = (len(index), len(symbols))
+    column_of = {s: j for j, s in enumerate(symbols)}
+    signals = {'tsl': np.full(shape, np.nan), 'buy': np.zeros(shape, dtype=bool),
+               'sell': np.zeros(shape, dtype=bool), 'score': np.full(shape, np.nan)}
+
+    # Indicators per calendar group, so a symbol with an extra or missing day does
+    # not leave holes in the others' rolling windows; scattered into the union grid
+    for group in calendar_groups(frames):
+        group_signals = _signal_arrays(group)
+        rows = index.get_indexer(next(iter(group.values())).index)
+        cols = [column_of[s] for s in group]
+        for name, values in group_signals.items():
+            signals[name][np.ix_(rows, cols)] = values
+
+    panels = {
+        'index': index,
+        'symbols': symbols,
+        'open': p['open'].to_numpy(dtype=float),
+        'low': p['low'].to_numpy(dtype=float),
+        'close': p['close'].to_numpy(dtype=float),
+        # Last known close, for marking open positions to market on missing days
+        'mark': p['close'].ffill().to_numpy(dtype=float),
+        **signals
+    }
+    _panel_cache.clear()  # one universe at a time is enough
+    _panel_cache[key] = panels
+    return panels
+
+def run_portfolio_backtest(symbols=None, frames=None, period="2y", initial_capital=1000000, trader=None):
+    """
+    Replays the scanner's TSL crossover signals across the universe day by day
+    with PaperTrader's live rules:
+    - at most trader.MAX_TRADES_PER_DAY entries per day, best score first
+      (RSI + RVOL * 10, like process_buy_signals)
+    - stop at the TSL (1% below entry if the TSL is invalid or above the price)
+    - quantity = min(RISK_PER_TRADE / risk per share, MAX_CAPITAL_PER_TRADE / price),
+      only if there is enough cash
+    - exit at the stop (or the open if it gaps below) or on a close below the TSL
+    Entries fill at the signal day's close. Symbols already held are not re-entered.
+
+    frames: optional {symbol: OHLCV DataFrame}; otherwise `symbols` are loaded from
+    the local OHLCV cache. Indicators are computed once for the whole universe as
+    panels and reused between runs over the same data.
+
+    Returns {'equity_curve': DataFrame (equity, cash, invested, exposure, drawdown,
+    positions per day), 'trades': DataFrame, 'metrics': dict}.
+    """
+    if trader is None:
+        # Imported here so the backtest core does not pull in the live trading stack
+        # (signals DB, intraday cache) for offline research
+        from paper_trader import PaperTrader
+        trader = PaperTrader()
+    if frames is None:
+        frames = load_ohlcv(symbols or [], period=period)
+    frames = {s: df.rename(columns=str.lower) for s, df in frames.items() if len(df) >= 50}
+    if not frames:
+        return None
+
+    p = _portfolio_panels(frames)
+    index, names = p['index'], p['symbols']
+    open_, low, close, mark, tsl = p['open'], p['low'], p['close'], p['mark'], p['tsl']
+    buy, sell, score = p['buy'], p['sell'], p['score']
+
+    cash = float(initial_capital)
+    positions = {}  # column -> {'qty', 'entry_price', 'stop', 'entry_date'}
+    trades = []
+    curve = np.zeros((len(index), 4))  # equity, cash, invested, positions
+
+    for t in range(len(index)):
+        # 1. Exits for positions opened on earlier days
+        for j in list(positions):
+            pos = positions[j]
+            exit_price = None
+            if low[t, j] <= pos['stop']:
+                exit_price = min(open_[t, j], pos['stop']) if not np.isnan(open_[t, j]) else pos['stop']
+                reason = "Stop Loss Hit"
+            elif sell[t, j]:
+                exit_price = close[t, j]
+                reason = "Strategy Sell Signal"
+            if exit_price is None:
+                continue
+
+            cash += exit_price * pos['qty']
+            trades.append({
+                'Symbol': names[j],
+                'Entry Date': pos['entry_date'],
+                'Exit Date': index[t],
+                'Entry Price': pos['entry_price'],
+                'Exit Price': exit_price,
+                'Quantity': pos['qty'],
+                'P&L': (exit_price - pos['entry_price']) * pos['qty'],
+                'Reason': reason
+            })
+            del positions[j]
+
+        # 2. New entries: today's signals ranked by score, up to the daily limit
+        signals = [j for j in np.flatnonzero(buy[t]) if j not in positions]
+        signals.sort(key=lambda j: score[t, j], reverse=True)
+        trades_today = 0
+        for j in signals:
+            if trades_today >= trader.MAX_TRADES_PER_DAY:
+                break
+            entry_price = close[t, j]
+            stop = tsl[t, j]
+            # Fallback SL if TSL is invalid or too far
+            if np.isnan(stop) or stop >= entry_price:
+                stop = entry_price * 0.99 # 1% default SL
+            risk_per_share = entry_price - stop
+
+            qty_by_risk = int(trader.RISK_PER_TRADE / risk_per_share)
+            qty_by_cap = int(trader.MAX_CAPITAL_PER_TRADE / entry_price)
+            quantity = min(qty_by_risk, qty_by_cap)
+            if quantity < 1 or quantity * entry_price > cash:
+                continue
+
+            cash -= quantity * entry_price
+            positions[j] = {'qty': quantity, 'entry_price': entry_price, 'stop': stop, 'entry_date': index[t]}
+            trades_today += 1
+
+        # 3. Mark to market
+        invested = sum(mark[t, j] * pos['qty'] for j, pos in positions.items())
+        curve[t] = (cash + invested, cash, invested, len(positions))
+
+    equity_curve = pd.DataFrame(curve, index=index, columns=['equity', 'cash', 'invested', 'positions'])
+    equity_curve['positions'] = equity_curve['positions'].astype(int)
+    equity_curve['exposure'] = equity_curve['invested'] / equity_curve['equity']
+    equity_curve['drawdown'] = equity_curve['equity'] / equity_curve['equity'].cummax() - 1
+
+    trades_df = pd.DataFrame(trades, columns=['Symbol', 'Entry Date', 'Exit Date', 'Entry Price',
+                                              'Exit Price', 'Quantity', 'P&L', 'Reason'])
+    final_equity = equity_curve['equity'].iloc[-1]
+    metrics = {
+        'initial_capital': initial_capital,
+        'final_equity': final_equity,
+        'total_return': (final_equity / initial_capital - 1) * 100,
+        'max_drawdown': equity_curve['drawdown'].min() * 100,
+        'avg_exposure': equity_curve['exposure'].mean() * 100,
+        'total_trades': len(trades_df),
+        'win_rate': (trades_df['P&L'] > 0).mean() * 100 if len(trades_df) else 0.0,
+        'open_positions': len(positions)
+    }
+    return {'equity_curve': equity_curve, 'trades': trades_df, 'metrics': metrics}
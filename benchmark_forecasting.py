@@ -0,0 +1,71 @@
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import model_registry
+import forecasting
+
+
+def make_ohlcv_frames(n_symbols, n_days, seed=42):
+    """Random-walk daily OHLCV frames, one per synthetic symbol."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    frames = {}
+    for i in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n_days)))
+        open_ = close * (1 + rng.normal(0, 0.005, n_days))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_days))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_days))
+        volume = rng.integers(100_000, 1_000_000, n_days).astype(float)
+        frames[f"SYM{i:04d}.NS"] = pd.DataFrame(
+            {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}, index=index)
+    return frames
+
+
+def run_benchmark(n_symbols=50, n_days=500, workers=None):
+    frames = make_ohlcv_frames(n_symbols, n_days)
+    symbols = list(frames)
+    print(f"Benchmarking forecasting on {n_symbols} symbols x {n_days} days...")
+
+    # 1. One symbol at a time, as get_ai_price_prediction does per dashboard click
+    model_registry.MODEL_DIR = tempfile.mkdtemp()
+    forecasting._registry._memory.clear()
+    start = time.time()
+    serial = {s: forecasting.predict_from_frame(s, frames[s]) for s in symbols}
+    serial_time = time.time() - start
+
+    # 2. predict_many with an empty registry: panel features + parallel fits
+    model_registry.MODEL_DIR = tempfile.mkdtemp()
+    forecasting._registry._memory.clear()
+    start = time.time()
+    cold = forecasting.predict_many(symbols, frames=frames, max_workers=workers)
+    cold_time = time.time() - start
+
+    # 3. predict_many again: every model comes from the registry (no new bars)
+    forecasting._registry._memory.clear()
+    start = time.time()
+    warm = forecasting.predict_many(symbols, frames=frames, max_workers=workers)
+    warm_time = time.time() - start
+
+    cold = cold.set_index('Symbol')
+    # The registry must hand back the models the cold run fitted
+    pd.testing.assert_frame_equal(warm.set_index('Symbol'), cold)
+    mismatches = sum(
+        1 for s in symbols
+        if serial[s] is None or not np.isclose(serial[s]['predicted_price'], cold.loc[s, 'predicted_price'])
+    )
+
+    print(f"Serial (per symbol):        {serial_time:.2f}s ({n_symbols / serial_time:.1f} symbols/s)")
+    print(f"predict_many, cold models:  {cold_time:.2f}s ({n_symbols / cold_time:.1f} symbols/s)")
+    print(f"predict_many, cached:       {warm_time:.2f}s ({n_symbols / warm_time:.1f} symbols/s)")
+    print(f"Symbols with mismatched predictions: {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark forecasting throughput')
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--days', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    run_benchmark(args.symbols, args.days, args.workers)
@@ -0,0 +1,83 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from strategy import calculate_golden_crossover, calculate_golden_crossover_panel
+
+
+def legacy_calculate_golden_crossover(df, short_period=9, long_period=21):
+    """The original row-loop implementation (needs a 0..n-1 integer index)."""
+    if df is None or df.empty or len(df) < long_period:
+        return df
+    df['ema_short'] = ta.ema(df['close'], length=short_period)
+    df['ema_long'] = ta.ema(df['close'], length=long_period)
+    df['gc_signal'] = 'None'
+    for i in range(1, len(df)):
+        prev_short = df.at[i-1, 'ema_short']
+        prev_long = df.at[i-1, 'ema_long']
+        cur_short = df.at[i, 'ema_short']
+        cur_long = df.at[i, 'ema_long']
+        if pd.isna(prev_short) or pd.isna(prev_long) or pd.isna(cur_short) or pd.isna(cur_long):
+            continue
+        if prev_short <= prev_long and cur_short > cur_long:
+            df.at[i, 'gc_signal'] = 'Buy'
+        elif prev_short >= prev_long and cur_short < cur_long:
+            df.at[i, 'gc_signal'] = 'Sell'
+    return df
+
+
+def make_close_panel(n_symbols, n_days, seed=42):
+    """Random-walk closing prices, one column per synthetic symbol."""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.02, size=(n_days, n_symbols))
+    close = 100 * np.exp(np.cumsum(returns, axis=0))
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    columns = [f"SYM{i:04d}.NS" for i in range(n_symbols)]
+    return pd.DataFrame(close, index=index, columns=columns)
+
+
+def run_benchmark(n_symbols=2000, n_days=250):
+    panel = make_close_panel(n_symbols, n_days)
+    print(f"Benchmarking golden crossover on {n_symbols} symbols x {n_days} days...")
+
+    # 1. Legacy: per-symbol frame with a positional index and a Python loop
+    start = time.time()
+    legacy = {}
+    for sym in panel.columns:
+        df = pd.DataFrame({'close': panel[sym].to_numpy()})
+        legacy[sym] = legacy_calculate_golden_crossover(df)['gc_signal'].to_numpy()
+    legacy_time = time.time() - start
+
+    # 2. Vectorized, still one symbol at a time (DatetimeIndex works now)
+    start = time.time()
+    per_symbol = {}
+    for sym in panel.columns:
+        df = pd.DataFrame({'close': panel[sym]})
+        per_symbol[sym] = calculate_golden_crossover(df)['gc_signal'].to_numpy()
+    vector_time = time.time() - start
+
+    # 3. Vectorized panel: every symbol in one call
+    start = time.time()
+    signals = calculate_golden_crossover_panel(panel)
+    panel_time = time.time() - start
+
+    labels = {1: 'Buy', -1: 'Sell', 0: 'None'}
+    mismatches = 0
+    for sym in panel.columns:
+        panel_labels = np.array([labels[v] for v in signals[sym].to_numpy()])
+        if not (np.array_equal(legacy[sym], per_symbol[sym]) and np.array_equal(legacy[sym], panel_labels)):
+            mismatches += 1
+
+    print(f"Legacy loop:            {legacy_time:.3f}s")
+    print(f"Vectorized per symbol:  {vector_time:.3f}s ({legacy_time / vector_time:.1f}x)")
+    print(f"Vectorized panel:       {panel_time:.3f}s ({legacy_time / panel_time:.1f}x)")
+    print(f"Symbols with mismatched signals: {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark golden crossover implementations')
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=250)
+    args = parser.parse_args()
+    run_benchmark(args.symbols, args.days)
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Runs in a fresh interpreter per module so import caches don't skew the numbers.
+# sqlite3.connect is wrapped to count connections and the statements they run.
+PROBE = r'''
+import json, sqlite3, sys, time
+sys.path.insert(0, {repo!r})
+
+stats = {{'connects': 0, 'statements': 0}}
+_connect = sqlite3.connect
+
+def counting_connect(*args, **kwargs):
+    conn = _connect(*args, **kwargs)
+    stats['connects'] += 1
+    def trace(sql):
+        stats['statements'] += 1
+    conn.set_trace_callback(trace)
+    return conn
+
+sqlite3.connect = counting_connect
+
+start = time.perf_counter()
+# Importing database must not touch the DB, so pointing DB_FILE elsewhere afterwards is enough
+import database
+database.DB_FILE = {db_file!r}
+error = None
+try:
+    __import__({module!r})
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+import_time = time.perf_counter() - start
+import_stats = dict(stats)
+
+start = time.perf_counter()
+try:
+    database.get_recent_signals()
+except Exception as e:
+    error = error or f"{{type(e).__name__}}: {{e}}"
+first_query = time.perf_counter() - start
+
+print(json.dumps({{
+    'import_time': import_time,
+    'import_connects': import_stats['connects'],
+    'import_statements': import_stats['statements'],
+    'first_query_time': first_query,
+    'total_connects': stats['connects'],
+    'total_statements': stats['statements'],
+    'error': error,
+}}))
+'''
+
+
+def probe(module, db_file):
+    repo = os.path.dirname(os.path.abspath(__file__))
+    code = PROBE.format(repo=repo, db_file=db_file, module=module)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=repo)
+    lines = out.stdout.strip().splitlines()
+    if out.returncode != 0 or not lines:
+        return {'error': out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'no output'}
+    return json.loads(lines[-1])
+
+
+def run_benchmark(modules):
+    """
+    Measures import cost of each module and the first DB query afterwards, against
+    a brand new DB file (schema gets created) and an up-to-date one (no DDL at all).
+    """
+    tmp_dir = tempfile.mkdtemp()
+    warm_db = os.path.join(tmp_dir, "warm.db")
+    # Bring the warm DB to the current schema version once
+    probe('database', warm_db)
+
+    print(f"{'Module':<12} {'DB':<6} {'Import(s)':>10} {'Connects':>9} {'SQL':>5} {'1st query(s)':>13} {'Total SQL':>10}")
+    for module in modules:
+        for label, db_file in [('new', os.path.join(tmp_dir, f"{module}_new.db")), ('warm', warm_db)]:
+            r = probe(module, db_file)
+            if 'import_time' not in r:
+                print(f"{module:<12} {label:<6} failed: {r['error']}")
+                continue
+            print(f"{module:<12} {label:<6} {r['import_time']:>10.3f} {r['import_connects']:>9} "
+                  f"{r['import_statements']:>5} {r['first_query_time']:>13.4f} {r['total_statements']:>10}")
+            if r['error']:
+                print(f"{'':<12} (import error: {r['error']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark module import cost and DB initialization')
+    parser.add_argument('--modules', nargs='+', default=['database', 'scanner', 'dashboard'])
+    args = parser.parse_args()
+    run_benchmark(args.modules)
@@ -1,8 +1,7 @@
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 from stock_list import load_stock_list
-import time
+from data_store import load_ohlcv
 from tqdm import tqdm
 
 def get_breakout_candidates(limit=50):
@@ -23,7 +22,7 @@ def get_breakout_candidates(limit=50):
     candidates = []
     
     # Batch processing
-    chunk_size = 20
+    chunk_size = 100  # Network batching / rate limiting is adaptive inside data_store
     
     def chunk_list(lst, n):
         for i in range(0, len(lst), n):
@@ -31,28 +30,17 @@ def get_breakout_candidates(limit=50):
 
     for chunk in chunk_list(symbols, chunk_size):
         try:
-            # Download data (need enough for 200 SMA)
-            data = yf.download(chunk, period="1y", interval="1d", group_by='ticker', threads=True, progress=False, auto_adjust=True)
+            # Load data (need enough for 200 SMA); served from the local OHLCV cache
+            frames = load_ohlcv(chunk, period="1y")
             
-            if data.empty:
+            if not frames:
                 continue
                 
             for symbol in chunk:
                 try:
-                    df = pd.DataFrame()
-                    if isinstance(data.columns, pd.MultiIndex):
-                        try:
-                            df = data.xs(symbol, level=0, axis=1)
-                        except KeyError:
-                            continue
-                    else:
-                        if len(chunk) == 1 and chunk[0] == symbol:
-                            df = data
-                        else:
-                            continue
-                            
-                    # Drop NaNs
-                    df = df.dropna(how='all')
+                    df = frames.get(symbol)
+                    if df is None:
+                        continue
                     
                     if len(df) < 200:
                         continue
@@ -148,10 +136,8 @@ def get_breakout_candidates(limit=50):
                 except Exception:
                     continue
             
-            time.sleep(1)
-            
         except Exception:
-            time.sleep(1)
+            continue
             
     # Sort by Score
     df_results = pd.DataFrame(candidates)
@@ -1,146 +1,199 @@
-import yfinance as yf
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sector_index import get_sector_index
+from data_store import load_ohlcv, close_panel
+from trading_calendar import calendar_groups
+from strategy import ema_panel, rsi_panel
+
+# Columns of the stacked feature matrix used by the gap-up model
+BTST_FEATURES = ['rsi', 'vol_ratio', 'close_pos', 'ret_1d', 'ema20_dist', 'range_pct', 'gap_pct']
+
+# Pooled model keyed by (symbols, last bar date): retrained once per new bar
+_model_cache = {}
+
+
+def _panels(frames):
+    """Wide (dates x symbols) OHLCV matrices from a load_ohlcv result."""
+    return {col: close_panel(frames, col) for col in ['open', 'high', 'low', 'close', 'volume']}
+
+
+def _feature_panels(p):
+    """
+    All BTST features as wide matrices, computed for every symbol at once.
+    The panels must come from one calendar group (see trading_calendar.calendar_groups).
+    """
+    c, o, h, l, v = p['close'], p['open'], p['high'], p['low'], p['volume']
+    ema_20 = pd.DataFrame(ema_panel(c, 20), index=c.index, columns=c.columns)
+    return {
+        'rsi': rsi_panel(c, 14),
+        'vol_ratio': v / v.rolling(window=10).mean(),
+        # NaN on a zero-range candle
+        'close_pos': (c - l) / (h - l).where(h > l),
+        'ret_1d': c.pct_change(fill_method=None),
+        'ema20_dist': c / ema_20 - 1,
+        'range_pct': (h - l) / c,
+        'gap_pct': o / c.shift(1) - 1,
+        'ema_20': ema_20,
+        # Next day opens above today's close; unknown (NaN) on the last bar
+        'target': (o.shift(-1) > c).astype(float).where(o.shift(-1).notna())
+    }
+
+
+def build_btst_feature_matrix(frames):
+    """
+    Stacked (Date, Symbol) feature matrix for all symbols in `frames`
+    ({symbol: DataFrame} with lowercase OHLCV columns, e.g. from load_ohlcv).
+    Columns: BTST_FEATURES plus 'target' (NaN where the next open is not known yet).
+    Rows with incomplete features are dropped. Features are computed on each
+    symbol's own bars, one panel per calendar group.
+    """
+    parts = [_stack(_feature_panels(_panels(group))) for group in calendar_groups(frames)]
+    if not parts:
+        return pd.DataFrame(columns=BTST_FEATURES + ['target'],
+                            index=pd.MultiIndex.from_tuples([], names=['Date', 'Symbol']))
+    return pd.concat(parts).sort_index()
+
+
+def _stack(feats):
+    stacked = pd.concat({name: feats[name].stack(future_stack=True) for name in BTST_FEATURES + ['target']}, axis=1)
+    stacked.index.names = ['Date', 'Symbol']
+    return stacked.dropna(subset=BTST_FEATURES)
+
+
+def fit_btst_model(X, y, n_jobs=-1):
+    """Fits the gap-up classifier on stacked feature rows."""
+    model = RandomForestClassifier(n_estimators=50, max_depth=3, random_state=42, n_jobs=n_jobs)
+    model.fit(X, y)
+    return model
+
+
+def _pooled_model(matrix, symbols, last_date):
+    """One RandomForest over every symbol's history, cached until a new bar arrives."""
+    key = (tuple(sorted(symbols)), last_date)
+    if key in _model_cache:
+        return _model_cache[key]
+
+    train = matrix.dropna(subset=['target'])
+    model = None
+    if len(train) > 30 and train['target'].nunique() > 1:
+        model = fit_btst_model(train[BTST_FEATURES], train['target'].astype(int))
+
+    _model_cache.clear()  # only the latest bar's model is worth keeping
+    _model_cache[key] = model
+    return model
+
+
+def _latest(feats, closes):
+    """Each symbol's feature values on its own last bar (symbols may end on different dates)."""
+    valid = closes.notna().to_numpy()
+    last = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+    cols = np.arange(len(last))
+
+    latest = pd.DataFrame({name: feats[name].to_numpy()[last, cols] for name in BTST_FEATURES + ['ema_20']},
+                          index=closes.columns)
+    latest['close'] = closes.to_numpy()[last, cols]
+    # Previous valid close carried to each row, read at the symbol's last bar
+    latest['prev_close'] = closes.ffill().shift(1).to_numpy()[last, cols]
+    return latest
+
+
+def _universe_features(frames):
+    """
+    (matrix, latest) for a universe: the stacked training matrix and each symbol's
+    features on its last bar. One panel per calendar group, so a symbol with an
+    extra or missing day does not punch holes into everyone else's rolling windows.
+    """
+    matrix_parts, latest_parts = [], []
+    for group in calendar_groups(frames):
+        p = _panels(group)
+        feats = _feature_panels(p)
+        matrix_parts.append(_stack(feats))
+        latest_parts.append(_latest(feats, p['close']))
+    return pd.concat(matrix_parts).sort_index(), pd.concat(latest_parts)
+
 
 def get_btst_candidates(limit=50):
     """
     Scans for stocks with high probability of a Gap Up or positive move tomorrow.
+    Features are computed for the whole universe at once, one pooled model is
+    trained on all symbols and every candidate is scored in a single predict_proba.
     Returns a DataFrame of top candidates.
     """
     try:
         # 1. Load Stock List (using sector mapping as a source for now)
-        mapping_df = pd.read_csv("sector_mapping.csv")
-        symbols = mapping_df['symbol'].tolist()[:limit]
-        
+        symbols = get_sector_index().symbols()[:limit]
+
         if not symbols:
             return pd.DataFrame()
-            
-        # 2. Batch Download Data (Need enough for indicators)
-        data = yf.download(symbols, period="6mo", progress=False, auto_adjust=True)
-        
-        candidates = []
-        
-        # Handle MultiIndex
-        try:
-            close_df = data['Close']
-            open_df = data['Open']
-            high_df = data['High']
-            low_df = data['Low']
-            vol_df = data['Volume']
-        except KeyError:
-             # Fallback for single level or lowercase
-            close_df = data.get('Close', data.get('close'))
-            open_df = data.get('Open', data.get('open'))
-            high_df = data.get('High', data.get('high'))
-            low_df = data.get('Low', data.get('low'))
-            vol_df = data.get('Volume', data.get('volume'))
-
-        if close_df is None:
+
+        # 2. Cached daily bars (Need enough for indicators)
+        frames = load_ohlcv(symbols, period="6mo")
+        frames = {s: df for s, df in frames.items() if df['close'].count() >= 50}
+        if not frames:
             return pd.DataFrame()
 
-        for sym in symbols:
-            try:
-                # Extract series
-                if isinstance(close_df, pd.DataFrame):
-                    if sym not in close_df.columns: continue
-                    c = close_df[sym].dropna()
-                    o = open_df[sym].dropna()
-                    h = high_df[sym].dropna()
-                    l = low_df[sym].dropna()
-                    v = vol_df[sym].dropna()
-                else:
-                    c, o, h, l, v = close_df, open_df, high_df, low_df, vol_df
-                
-                if len(c) < 50: continue
-                
-                # --- Scoring System (Weighted) ---
-                score = 0
-                reasons = []
-                
-                # 1. Trend (EMA 20)
-                ema_20 = ta.ema(c, length=20).iloc[-1]
-                if c.iloc[-1] > ema_20:
-                    score += 15
-                    reasons.append("Uptrend")
-                
-                # 2. Momentum (RSI)
-                rsi_val = ta.rsi(c, length=14).iloc[-1]
-                if 50 < rsi_val < 80:
-                    score += 20
-                    if rsi_val > 60:
-                        reasons.append("Strong Momentum")
-                
-                # 3. Volume
-                avg_vol = v.rolling(window=10).mean().iloc[-1]
-                vol_ratio = v.iloc[-1] / avg_vol if avg_vol > 0 else 0
-                if vol_ratio > 1.0:
-                    score += 20
-                    if vol_ratio > 1.5:
-                        reasons.append("Volume Spike")
-                elif vol_ratio > 0.8:
-                    score += 10 # Partial score for decent volume
-                
-                # 4. Candle Strength (Close Position)
-                candle_range = h.iloc[-1] - l.iloc[-1]
-                if candle_range > 0:
-                    close_pos = (c.iloc[-1] - l.iloc[-1]) / candle_range
-                    if close_pos > 0.7:
-                        score += 20
-                        reasons.append("Strong Close")
-                    elif close_pos > 0.5:
-                        score += 10
-                
-                # --- AI Probability ---
-                # Train model
-                df_ml = pd.DataFrame({
-                    'rsi': ta.rsi(c, length=14),
-                    'vol_ratio': v / v.rolling(window=10).mean(),
-                    'close_pos': (c - l) / (h - l),
-                    'target': (o.shift(-1) > c).astype(int)
-                }).dropna()
-                
-                prob = 50 # Default neutral
-                if len(df_ml) > 30:
-                    X = df_ml[['rsi', 'vol_ratio', 'close_pos']].iloc[:-1]
-                    y = df_ml['target'].iloc[:-1]
-                    model = RandomForestClassifier(n_estimators=50, max_depth=3, random_state=42)
-                    model.fit(X, y)
-                    
-                    curr_feat = pd.DataFrame([[rsi_val, vol_ratio, close_pos]], columns=['rsi', 'vol_ratio', 'close_pos'])
-                    prob = model.predict_proba(curr_feat)[0][1] * 100
-                
-                # Add AI contribution to score (Max 25 points)
-                if prob > 60:
-                    score += 25
-                    reasons.append("AI Bullish")
-                elif prob > 50:
-                    score += 10
-                
-                # Final Selection
-                if score >= 40: # Lenient threshold to ensure results
-                    candidates.append({
-                        'Symbol': sym,
-                        'Price': c.iloc[-1],
-                        'Change %': ((c.iloc[-1] - c.iloc[-2])/c.iloc[-2])*100,
-                        'BTST Score': score,
-                        'Gap Up Prob %': prob,
-                        'Reason': ", ".join(reasons[:3]), # Top 3 reasons
-                        'RSI': rsi_val,
-                        'Volume Ratio': vol_ratio
-                    })
-                        
-            except Exception:
+        matrix, latest = _universe_features(frames)
+        latest = latest.dropna(subset=BTST_FEATURES)
+        if latest.empty:
+            return pd.DataFrame()
+
+        # --- Scoring System (Weighted), vectorized over all symbols ---
+        rsi_val, vol_ratio, close_pos = latest['rsi'], latest['vol_ratio'], latest['close_pos']
+        uptrend = latest['close'] > latest['ema_20']
+        score = (
+            np.where(uptrend, 15, 0)                                          # 1. Trend (EMA 20)
+            + np.where((rsi_val > 50) & (rsi_val < 80), 20, 0)                # 2. Momentum (RSI)
+            + np.select([vol_ratio > 1.0, vol_ratio > 0.8], [20, 10], 0)      # 3. Volume
+            + np.select([close_pos > 0.7, close_pos > 0.5], [20, 10], 0)      # 4. Candle Strength
+        )
+
+        # --- AI Probability: one pooled model, one predict_proba call ---
+        model = _pooled_model(matrix, list(frames), max(df.index[-1] for df in frames.values()))
+        prob = np.full(len(latest), 50.0) # Default neutral
+        if model is not None:
+            prob = model.predict_proba(latest[BTST_FEATURES])[:, 1] * 100
+
+        # Add AI contribution to score (Max 25 points)
+        score = score + np.select([prob > 60, prob > 50], [25, 10], 0)
+
+        candidates = []
+        for i, sym in enumerate(latest.index):
+            # Final Selection
+            if score[i] < 40: # Lenient threshold to ensure results
                 continue
-                
+
+            reasons = []
+            if uptrend.iloc[i]:
+                reasons.append("Uptrend")
+            if 60 < rsi_val.iloc[i] < 80:
+                reasons.append("Strong Momentum")
+            if vol_ratio.iloc[i] > 1.5:
+                reasons.append("Volume Spike")
+            if close_pos.iloc[i] > 0.7:
+                reasons.append("Strong Close")
+            if prob[i] > 60:
+                reasons.append("AI Bullish")
+
+            price, prev = latest['close'].iloc[i], latest['prev_close'].iloc[i]
+            candidates.append({
+                'Symbol': sym,
+                'Price': price,
+                'Change %': ((price - prev) / prev) * 100,
+                'BTST Score': int(score[i]),
+                'Gap Up Prob %': prob[i],
+                'Reason': ", ".join(reasons[:3]), # Top 3 reasons
+                'RSI': rsi_val.iloc[i],
+                'Volume Ratio': vol_ratio.iloc[i]
+            })
+
         # Sort by Score
         df_res = pd.DataFrame(candidates)
         if not df_res.empty:
             df_res = df_res.sort_values(by='BTST Score', ascending=False)
-            
+
         return df_res
-        
+
     except Exception as e:
         print(f"BTST Error: {e}")
         return pd.DataFrame()
@@ -2,16 +2,14 @@ import streamlit as st
 import pandas as pd
 import time
 from database import get_recent_signals, add_to_portfolio, get_portfolio, remove_from_portfolio, close_position
-from analysis import get_stock_news_sentiment, get_technical_analysis, get_sector_performance, get_general_market_news
-from backtester import run_backtest
-from plotting import plot_stock_chart
+from analysis import get_sector_performance, get_general_market_news
 from streamlit_lightweight_charts import renderLightweightCharts
-from forecasting import get_ai_price_prediction
+from stock_context import StockContext
 from btst_strategy import get_btst_candidates
 from reversal_strategy import get_reversal_candidates
 from breakout_strategy import get_breakout_candidates
 from stock_list import load_stock_list, get_nifty50_symbols, get_nifty100_symbols
-from database import get_active_paper_trades, get_paper_trade_history, get_todays_trade_count, close_paper_trade
+from database import get_active_paper_trades, get_paper_trade_history, get_todays_trade_count, close_paper_trade, close_connection
 import subprocess
 import sys
 
@@ -386,7 +384,7 @@ with tab_market:
         st.subheader("🌍 Market Heatmap (Sector Rotation)")
         if st.button("🔄 Refresh Heatmap"):
             with st.spinner("Scanning market breadth..."):
-                df_heat = get_sector_performance(limit=50) # Scan top 50 for speed
+                df_heat = get_sector_performance() # All mapped stocks, served from the local cache
                 
                 if not df_heat.empty:
                     import plotly.express as px
@@ -399,6 +397,7 @@ with tab_market:
                         color='Change',
                         color_continuous_scale='RdYlGn',
                         range_color=[-3, 3], # Clamp color range
+                        hover_data={'Sector Change': ':.2f'},
                         title="Market Performance by Sector"
                     )
                     st.plotly_chart(fig, use_container_width=True)
@@ -586,11 +585,14 @@ with tab_scanner:
         if selected_stock:
             st.markdown(f"### Analyzing: **{selected_stock}**")
             
+            # One history load for the whole detail view; every panel gets a slice
+            ctx = StockContext(selected_stock)
+            
             # Action Buttons
             c_btn1, c_btn2 = st.columns(2)
             if c_btn1.button("⭐ Add to Watchlist"):
                 # Fetch current price for entry reference (optional)
-                tech = get_technical_analysis(selected_stock)
+                tech = ctx.technical()
                 price = tech['current_price'] if tech else 0.0
                 if add_to_portfolio(selected_stock, price, 'WATCHLIST'):
                     st.success(f"Added {selected_stock} to Watchlist!")
@@ -600,7 +602,7 @@ with tab_scanner:
             # Backtest Button
             if c_btn2.button("🧪 Run Backtest (1 Year)"):
                 with st.spinner(f"Backtesting {selected_stock}..."):
-                    results = run_backtest(selected_stock)
+                    results = ctx.backtest()
                     if results:
                         st.success("Backtest Complete!")
                         b1, b2, b3 = st.columns(3)
@@ -615,10 +617,10 @@ with tab_scanner:
 
             with st.spinner("Fetching AI insights..."):
                 # 1. Technical Analysis
-                tech_data = get_technical_analysis(selected_stock)
+                tech_data = ctx.technical()
                 
                 # 2. Sentiment Analysis
-                sentiment_score, news_items = get_stock_news_sentiment(selected_stock)
+                sentiment_score, news_items = ctx.sentiment()
                 
                 if tech_data:
                     # Display Prediction
@@ -635,7 +637,7 @@ with tab_scanner:
                     
                     # --- CHART SECTION ---
                     st.markdown("#### 📊 Strategy Chart (TradingView Style)")
-                    chart_data = plot_stock_chart(selected_stock)
+                    chart_data = ctx.chart()
                     if chart_data:
                         renderLightweightCharts(
                             charts=[{
@@ -652,7 +654,7 @@ with tab_scanner:
                     # --- AI FORECAST SECTION ---
                     st.markdown("#### 🧠 AI Price Forecast (Next 5 Days)")
                     with st.spinner("Running Random Forest Model..."):
-                        ai_data = get_ai_price_prediction(selected_stock)
+                        ai_data = ctx.prediction()
                         
                     if ai_data:
                         c_ai1, c_ai2, c_ai3 = st.columns(3)
@@ -740,6 +742,9 @@ with tab_watchlist:
     else:
         st.info("Your watchlist is empty. Add stocks from the Scanner tab!")
 
+# Each rerun runs on a fresh thread: release its DB connection before the next one
+close_connection()
+
 # Auto-refresh logic
 if auto_refresh:
     time.sleep(3) # Faster refresh for "instant" feel
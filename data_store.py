@@ -0,0 +1,254 @@
+import os
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import yfinance as yf
+from download_scheduler import get_scheduler
+
+# Per-symbol Parquet files live next to the code, like signals.db
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache", "ohlcv")
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Cached symbols younger than this are served without touching the network
+MAX_CACHE_AGE = 15 * 60  # seconds
+
+# Incremental fetches re-download a few cached bars so that the (possibly partial)
+# last bar gets replaced and split/dividend re-adjustments can be detected.
+OVERLAP_DAYS = 5
+ADJUSTMENT_TOLERANCE = 0.001  # 0.1% close mismatch on overlap -> full re-download
+
+# Symbols whose full download failed (delisted / unknown tickers) are not asked
+# for again for this long, so every scanner chunk does not pay the retries again
+FAILED_DOWNLOAD_TTL = 60 * 60  # seconds
+_failed_until = {}  # symbol -> time.time() before which it is not re-downloaded
+
+
+def _cache_path(symbol):
+    return os.path.join(CACHE_DIR, f"{symbol}.parquet")
+
+
+def _period_start(period, now=None):
+    """
+    Converts a yfinance style period ('5d', '6mo', '1y', '2y', 'max') to the
+    earliest calendar date that the cache has to cover. Returns None for 'max'.
+    """
+    now = now or datetime.now()
+    today = pd.Timestamp(now.date())
+    if period == 'max':
+        return None
+    if period.endswith('mo'):
+        return today - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith('wk'):
+        return today - pd.DateOffset(weeks=int(period[:-2]))
+    if period.endswith('y'):
+        return today - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith('d'):
+        # 'Nd' means N trading days; leave room for weekends and holidays
+        n = int(period[:-1])
+        return today - timedelta(days=n * 7 // 5 + 5)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def trim_period(df, period):
+    """Returns the slice of a cached frame that a yf.download(period=...) call would return."""
+    if period == 'max':
+        return df.copy()
+    if period.endswith('d'):
+        return df.tail(int(period[:-1])).copy()
+    return df[df.index >= _period_start(period)].copy()
+
+
+def _read_cache(symbol):
+    path = _cache_path(symbol)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        # Corrupt / partially written file: treat as missing
+        return None
+
+
+def _write_cache(symbol, df, covered_from):
+    """Atomically writes a symbol's bars so concurrent scanners never read half a file."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df = df.copy()
+    df.attrs = {'covered_from': covered_from}
+    path = _cache_path(symbol)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _normalize(df):
+    """Lowercase OHLCV columns, tz-naive date index, no empty rows."""
+    df = df.copy()
+    df.columns = [str(c).lower() for c in df.columns]
+    df = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+    df = df.dropna(how='all')
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index = pd.DatetimeIndex(df.index).normalize()
+    df.index.name = 'Date'
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+def _split_download(data, chunk):
+    """Splits a yf.download(group_by='ticker') result into {symbol: DataFrame}."""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    for symbol in chunk:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                # Symbol failed to download
+                continue
+            df_sym = data.xs(symbol, level=0, axis=1)
+        elif len(chunk) == 1:
+            df_sym = data
+        else:
+            continue
+        df_sym = _normalize(df_sym)
+        if not df_sym.empty:
+            frames[symbol] = df_sym
+    return frames
+
+
+def download_daily(chunk, **kwargs):
+    data = yf.download(chunk, interval="1d", group_by='ticker', threads=True,
+                       progress=False, auto_adjust=True, **kwargs)
+    return _split_download(data, chunk)
+
+
+def _is_readjusted(cached, fresh):
+    """
+    True if bars present in both frames disagree, i.e. the provider re-adjusted
+    history (split / dividend). The newest cached bar is ignored because it may
+    have been an intraday snapshot.
+    """
+    common = cached.index[:-1].intersection(fresh.index)
+    if len(common) == 0:
+        return False
+    old = cached.loc[common, 'close']
+    new = fresh.loc[common, 'close']
+    diff = ((new - old).abs() / old.abs()).max()
+    return bool(diff > ADJUSTMENT_TOLERANCE)
+
+
+def load_ohlcv(symbols, period="1y", max_age=MAX_CACHE_AGE, offline=False):
+    """
+    Loads daily OHLCV bars for `symbols`, serving them from the local Parquet cache
+    and only downloading what is missing:
+      - symbols never seen (or cached for a shorter period) get a full `period` download
+      - stale symbols only fetch the bars after their last cached date
+      - symbols refreshed within `max_age` seconds are not fetched at all
+      - a failed top-up counts as a refresh (the cached bars are served until
+        `max_age` passes again); a failed full download is not retried for
+        FAILED_DOWNLOAD_TTL seconds
+
+    Network batches go through the shared DownloadScheduler (rate limit, backoff,
+    per-symbol retries, adaptive chunk size).
+
+    offline=True never touches the network: whatever is cached is served as is
+    (possibly stale or shorter than `period`), e.g. for research on stored data.
+
+    Returns a dict {symbol: DataFrame} with lowercase OHLCV columns and a DatetimeIndex,
+    trimmed to `period`. Symbols that have no data are left out.
+    """
+    if isinstance(symbols, str):
+        symbols = [symbols]
+
+    requested_start = _period_start(period)
+    now = time.time()
+
+    cached = {}
+    full_fetch = []
+    incremental = {}  # fetch start date -> [symbols]
+
+    for symbol in symbols:
+        df = _read_cache(symbol)
+        if df is None or df.empty:
+            if not offline and _failed_until.get(symbol, 0) <= now:
+                full_fetch.append(symbol)
+            continue
+
+        if offline:
+            cached[symbol] = df
+            continue
+
+        covered_from = df.attrs.get('covered_from')
+        if covered_from == 'max':
+            covers_period = True
+        elif requested_start is None or covered_from is None:
+            covers_period = False
+        else:
+            covers_period = pd.Timestamp(covered_from) <= requested_start
+
+        if not covers_period:
+            if _failed_until.get(symbol, 0) <= now:
+                full_fetch.append(symbol)
+            continue
+
+        cached[symbol] = df
+        if now - os.path.getmtime(_cache_path(symbol)) < max_age:
+            continue
+
+        start = (df.index[-1] - timedelta(days=OVERLAP_DAYS)).strftime('%Y-%m-%d')
+        incremental.setdefault(start, []).append(symbol)
+
+    scheduler = get_scheduler()
+
+    # 1. Incremental top-up of stale symbols, batched by start date
+    for start, group in incremental.items():
+        fresh, failed = scheduler.run(group, lambda chunk: download_daily(chunk, start=start))
+        if failed:
+            print(f"Incremental download failed for {len(failed)} symbols: {failed[:5]}")
+        for symbol in failed:
+            # Serve the cached bars until max_age passes again instead of retrying every call
+            os.utime(_cache_path(symbol))
+
+        for symbol, new_bars in fresh.items():
+            old = cached[symbol]
+            if _is_readjusted(old, new_bars):
+                full_fetch.append(symbol)
+                del cached[symbol]
+                continue
+            merged = pd.concat([old[old.index < new_bars.index[0]], new_bars])
+            _write_cache(symbol, merged, old.attrs.get('covered_from'))
+            cached[symbol] = merged
+
+    # 2. Full download for new / re-adjusted / under-covered symbols
+    covered_from = 'max' if requested_start is None else requested_start.strftime('%Y-%m-%d')
+    if full_fetch:
+        fresh, failed = scheduler.run(full_fetch, lambda chunk: download_daily(chunk, period=period))
+        if failed:
+            print(f"Download failed for {len(failed)} symbols: {failed[:5]}")
+        for symbol in failed:
+            _failed_until[symbol] = now + FAILED_DOWNLOAD_TTL
+
+        for symbol, df in fresh.items():
+            _failed_until.pop(symbol, None)
+            _write_cache(symbol, df, covered_from)
+            cached[symbol] = df
+
+    frames = {}
+    for symbol in symbols:
+        if symbol not in cached:
+            continue
+        df = trim_period(cached[symbol], period)
+        df.attrs = {}
+        if not df.empty:
+            frames[symbol] = df
+    return frames
+
+
+def close_panel(frames, column='close'):
+    """
+    Wide (dates x symbols) matrix of one OHLCV column from a load_ohlcv result.
+    Dates missing for a symbol are NaN.
+    """
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat({symbol: df[column] for symbol, df in frames.items()}, axis=1).sort_index()
+
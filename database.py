@@ -1,195 +1,301 @@
 import sqlite3
 from datetime import datetime
+from contextlib import contextmanager
+import threading
 import os
 
 DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signals.db")
 
+# Bump when init_db / migrate_db change; stored in the file as PRAGMA user_version
+SCHEMA_VERSION = 1
+
+# --- Connection Management ---
+# One persistent connection per thread (sqlite3 connections must not be shared
+# across threads), opened in WAL mode so the dashboard can read while a scanner writes.
+_local = threading.local()
+
+# Every open connection by owning thread. Short-lived threads (Streamlit runs each
+# rerun on a fresh one) would otherwise leak a connection and WAL reader apiece:
+# connections of threads that have finished are closed when the next one opens.
+_connections = {}  # thread -> (connection, pid that opened it)
+_connections_lock = threading.Lock()
+
+# Schema setup is lazy: it runs on the first connection to each DB file instead
+# of at import, and is skipped entirely once the file is at SCHEMA_VERSION.
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+def get_connection():
+    """Returns this thread's connection to DB_FILE, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    # Reconnect after a fork or if DB_FILE was pointed somewhere else
+    if conn is None or _local.pid != os.getpid() or _local.path != DB_FILE:
+        _close_finished_threads()
+        # Only the owning thread uses it; check_same_thread=False lets
+        # _close_finished_threads close it once that thread is gone
+        conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.path = DB_FILE
+        _local.depth = 0
+        with _connections_lock:
+            previous = _connections.pop(threading.current_thread(), None)
+            _connections[threading.current_thread()] = (conn, _local.pid)
+        if previous is not None:
+            _close_owned(*previous)
+        _ensure_schema(conn)
+    return conn
+
+def close_connection():
+    """
+    Closes this thread's connection (the next call reopens it). Threads that do
+    not live for the whole process, like a Streamlit rerun, call this when done.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.depth:
+        return
+    with _connections_lock:
+        _connections.pop(threading.current_thread(), None)
+    _close_owned(conn, _local.pid)
+    _local.conn = None
+
+def _close_owned(conn, pid):
+    """Closes a connection opened by this process; one inherited over fork is only dropped."""
+    if pid != os.getpid():
+        return
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def _close_finished_threads():
+    """Closes the connections whose owning thread has exited."""
+    with _connections_lock:
+        finished = [t for t in _connections if not t.is_alive()]
+        stale = [_connections.pop(t) for t in finished]
+    for conn, pid in stale:
+        _close_owned(conn, pid)
+
+def _ensure_schema(conn):
+    """Creates / migrates the schema once per process and DB file."""
+    path = DB_FILE
+    if path in _schema_ready:
+        return
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            # Uses this thread's connection, which is already registered above
+            init_db()
+        _schema_ready.add(path)
+
+@contextmanager
+def transaction():
+    """
+    Yields a cursor and commits once when the outermost block exits (rolls back on error).
+    Nested blocks join the outer transaction, so several bulk calls can share one commit.
+    """
+    conn = get_connection()
+    _local.depth += 1
+    try:
+        yield conn.cursor()
+        if _local.depth == 1:
+            conn.commit()
+    except Exception:
+        if _local.depth == 1:
+            conn.rollback()
+        raise
+    finally:
+        _local.depth -= 1
+
 def init_db():
-    """Initializes the database and creates the table if it doesn't exist."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS signals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT NOT NULL,
-            price REAL NOT NULL,
-            signal_date TEXT NOT NULL,
-            trend_prediction TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            signal_strength TEXT DEFAULT 'Standard'
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    """
+    Initializes the database and creates the tables if they don't exist.
+    Called automatically on first use (see _ensure_schema); safe to call again.
+    """
+    with transaction() as c:
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS signals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                price REAL NOT NULL,
+                signal_date TEXT NOT NULL,
+                trend_prediction TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                signal_strength TEXT DEFAULT 'Standard'
+            )
+        ''')
     
-    # Run migration to ensure column exists in old DBs
-    migrate_db()
-    # Run migration to ensure column exists in old DBs
-    migrate_db()
-    init_portfolio_db()
     init_portfolio_db()
     init_swing_db()
     init_paper_trading_db()
+    # Run migration to ensure column exists in old DBs
+    # (after all tables exist, since it also builds their indexes)
+    migrate_db()
+    
+    with transaction() as c:
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 def init_paper_trading_db():
     """Creates the paper_trades table."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS paper_trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT NOT NULL,
-            entry_price REAL NOT NULL,
-            quantity INTEGER NOT NULL,
-            stop_loss REAL NOT NULL,
-            target REAL,
-            status TEXT DEFAULT 'OPEN', -- OPEN, CLOSED
-            entry_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-            exit_time DATETIME,
-            exit_price REAL,
-            pnl REAL,
-            strategy TEXT DEFAULT 'Standard',
-            reason TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS paper_trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                entry_price REAL NOT NULL,
+                quantity INTEGER NOT NULL,
+                stop_loss REAL NOT NULL,
+                target REAL,
+                status TEXT DEFAULT 'OPEN', -- OPEN, CLOSED
+                entry_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+                exit_time DATETIME,
+                exit_price REAL,
+                pnl REAL,
+                strategy TEXT DEFAULT 'Standard',
+                reason TEXT
+            )
+        ''')
 
 def init_swing_db():
     """Creates the swing_signals table."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS swing_signals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT NOT NULL,
-            price REAL NOT NULL,
-            signal_date TEXT NOT NULL,
-            strategy_type TEXT NOT NULL, -- 'Breakout', 'Pullback', 'VolumePocket'
-            reason TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS swing_signals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                price REAL NOT NULL,
+                signal_date TEXT NOT NULL,
+                strategy_type TEXT NOT NULL, -- 'Breakout', 'Pullback', 'VolumePocket'
+                reason TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
 
 def init_portfolio_db():
     """Creates the portfolio table."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS portfolio (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT NOT NULL,
-            entry_price REAL,
-            quantity INTEGER DEFAULT 1,
-            status TEXT DEFAULT 'WATCHLIST', -- WATCHLIST, OPEN, CLOSED
-            added_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-            notes TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS portfolio (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                entry_price REAL,
+                quantity INTEGER DEFAULT 1,
+                status TEXT DEFAULT 'WATCHLIST', -- WATCHLIST, OPEN, CLOSED
+                added_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+                notes TEXT
+            )
+        ''')
 
 def migrate_db():
-    """Adds missing columns if they don't exist."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # Add trend_prediction column
-    try:
-        c.execute("ALTER TABLE signals ADD COLUMN trend_prediction TEXT")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass
-    # Add signal_strength column
-    try:
-        c.execute("ALTER TABLE signals ADD COLUMN signal_strength TEXT DEFAULT 'Standard'")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass
-    conn.close()
+    """Adds missing columns, dedup constraints and lookup indexes if they don't exist."""
+    with transaction() as c:
+        # Add trend_prediction column
+        try:
+            c.execute("ALTER TABLE signals ADD COLUMN trend_prediction TEXT")
+        except sqlite3.OperationalError:
+            pass
+        # Add signal_strength column
+        try:
+            c.execute("ALTER TABLE signals ADD COLUMN signal_strength TEXT DEFAULT 'Standard'")
+        except sqlite3.OperationalError:
+            pass
+        
+        # Unique constraints back the ON CONFLICT upserts. Old DBs may hold
+        # duplicates from before, so keep the first row of each group.
+        c.execute('''
+            DELETE FROM signals WHERE id NOT IN (
+                SELECT MIN(id) FROM signals GROUP BY symbol, signal_date
+            )
+        ''')
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_signals_symbol_date ON signals (symbol, signal_date)")
+        c.execute('''
+            DELETE FROM swing_signals WHERE id NOT IN (
+                SELECT MIN(id) FROM swing_signals GROUP BY symbol, signal_date, strategy_type
+            )
+        ''')
+        c.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_swing_signals_symbol_date_strategy
+            ON swing_signals (symbol, signal_date, strategy_type)
+        ''')
+        
+        # Indexes for the "most recent first" dashboard queries
+        c.execute("CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals (timestamp)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_swing_signals_timestamp ON swing_signals (timestamp)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_swing_signals_strategy_timestamp ON swing_signals (strategy_type, timestamp)")
 
 # --- Portfolio Functions ---
 
 def add_to_portfolio(symbol, price, status='WATCHLIST', notes=''):
     """Adds a stock to the portfolio/watchlist."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # Check if already exists
-    c.execute("SELECT id FROM portfolio WHERE symbol = ? AND status != 'CLOSED'", (symbol,))
-    if c.fetchone():
-        conn.close()
-        return False # Already exists
-        
-    c.execute('''
-        INSERT INTO portfolio (symbol, entry_price, status, notes)
-        VALUES (?, ?, ?, ?)
-    ''', (symbol, price, status, notes))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        # Check if already exists
+        c.execute("SELECT id FROM portfolio WHERE symbol = ? AND status != 'CLOSED'", (symbol,))
+        if c.fetchone():
+            return False # Already exists
+            
+        c.execute('''
+            INSERT INTO portfolio (symbol, entry_price, status, notes)
+            VALUES (?, ?, ?, ?)
+        ''', (symbol, price, status, notes))
     return True
 
 def get_portfolio():
     """Fetches all active portfolio items."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    c = get_connection().cursor()
     c.execute("SELECT * FROM portfolio WHERE status != 'CLOSED' ORDER BY added_date DESC")
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 def close_position(symbol):
     """Marks a position as CLOSED."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("UPDATE portfolio SET status = 'CLOSED' WHERE symbol = ?", (symbol,))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("UPDATE portfolio SET status = 'CLOSED' WHERE symbol = ?", (symbol,))
 
 def remove_from_portfolio(symbol):
     """Permanently removes from portfolio."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("DELETE FROM portfolio WHERE symbol = ?", (symbol,))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("DELETE FROM portfolio WHERE symbol = ?", (symbol,))
 
 # --- Signal Functions ---
 
+# Upsert on the (symbol, signal_date) unique index: the first signal of the day wins.
+# COALESCE keeps the column default when no explicit timestamp is given.
+_INSERT_SIGNAL_SQL = '''
+    INSERT INTO signals (symbol, price, signal_date, trend_prediction, timestamp, signal_strength)
+    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+    ON CONFLICT (symbol, signal_date) DO NOTHING
+'''
+
+def _signal_params(symbol, price, signal_date, trend_prediction="Neutral", timestamp=None, signal_strength="Standard"):
+    return (symbol, price, signal_date, trend_prediction, timestamp, signal_strength)
+
 def add_signal(symbol, price, signal_date, trend_prediction="Neutral", timestamp=None, signal_strength="Standard"):
     """Adds a new buy signal to the database, including signal strength."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # Check if signal already exists for today to avoid duplicates
-    c.execute('''
-        SELECT id FROM signals 
-        WHERE symbol = ? AND signal_date = ?
-    ''', (symbol, signal_date))
-    
-    if not c.fetchone():
-        if timestamp:
-            c.execute('''
-                INSERT INTO signals (symbol, price, signal_date, trend_prediction, timestamp, signal_strength)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (symbol, price, signal_date, trend_prediction, timestamp, signal_strength))
-        else:
-            c.execute('''
-                INSERT INTO signals (symbol, price, signal_date, trend_prediction, signal_strength)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (symbol, price, signal_date, trend_prediction, signal_strength))
-            
-        conn.commit()
-        # print(f"Saved signal for {symbol} to DB.")
-    
-    conn.close()
+    # Skipped if signal already exists for today to avoid duplicates
+    with transaction() as c:
+        c.execute(_INSERT_SIGNAL_SQL, _signal_params(symbol, price, signal_date, trend_prediction, timestamp, signal_strength))
+
+def add_signals_bulk(signals):
+    """
+    Adds many buy signals in one transaction (executemany).
+    signals: iterable of dicts with keys symbol, price, signal_date and optionally
+    trend_prediction, timestamp, signal_strength (same meaning as add_signal).
+    """
+    params = [_signal_params(**sig) for sig in signals]
+    if not params:
+        return
+    with transaction() as c:
+        c.executemany(_INSERT_SIGNAL_SQL, params)
 
 def get_recent_signals(limit=50):
     """Fetches the most recent signals."""
-    conn = sqlite3.connect(DB_FILE)
-    # Return as dicts
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    # Rows come back as sqlite3.Row, returned as dicts
+    c = get_connection().cursor()
     c.execute('''
         SELECT symbol, price, signal_date, trend_prediction, timestamp, signal_strength 
         FROM signals 
@@ -197,51 +303,41 @@ def get_recent_signals(limit=50):
         LIMIT ?
     ''', (limit,))
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 def clear_db():
     """Clears all signals (useful for testing)."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM signals')
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('DELETE FROM signals')
 
 def remove_signal(symbol):
     """Removes a signal from the database (e.g., if Sell signal triggered)."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('DELETE FROM signals WHERE symbol = ?', (symbol,))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('DELETE FROM signals WHERE symbol = ?', (symbol,))
+
+def remove_signals_bulk(symbols):
+    """Removes the signals of many symbols in one transaction."""
+    params = [(symbol,) for symbol in symbols]
+    if not params:
+        return
+    with transaction() as c:
+        c.executemany('DELETE FROM signals WHERE symbol = ?', params)
 
 # --- Swing Signal Functions ---
 
 def add_swing_signal(symbol, price, signal_date, strategy_type, reason):
     """Adds a new swing trading signal."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # Avoid duplicates for same day and strategy
-    c.execute('''
-        SELECT id FROM swing_signals 
-        WHERE symbol = ? AND signal_date = ? AND strategy_type = ?
-    ''', (symbol, signal_date, strategy_type))
-    
-    if not c.fetchone():
+    with transaction() as c:
+        # Avoid duplicates for same day and strategy
         c.execute('''
             INSERT INTO swing_signals (symbol, price, signal_date, strategy_type, reason)
             VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (symbol, signal_date, strategy_type) DO NOTHING
         ''', (symbol, price, signal_date, strategy_type, reason))
-        conn.commit()
-    
-    conn.close()
 
 def get_swing_signals(strategy_type=None, limit=100):
     """Fetches recent swing signals, optionally filtered by strategy."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    c = get_connection().cursor()
     
     if strategy_type:
         c.execute('''
@@ -258,33 +354,23 @@ def get_swing_signals(strategy_type=None, limit=100):
         ''', (limit,))
         
     rows = c.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
-
-    conn.close()
     return [dict(row) for row in rows]
 
 # --- Paper Trading Functions ---
 
 def add_paper_trade(symbol, entry_price, quantity, stop_loss, target=None, strategy='Standard', reason=''):
     """Records a new paper trade entry."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO paper_trades (symbol, entry_price, quantity, stop_loss, target, strategy, reason)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (symbol, entry_price, quantity, stop_loss, target, strategy, reason))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('''
+            INSERT INTO paper_trades (symbol, entry_price, quantity, stop_loss, target, strategy, reason)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (symbol, entry_price, quantity, stop_loss, target, strategy, reason))
 
 def get_active_paper_trades():
     """Fetches all OPEN paper trades."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    c = get_connection().cursor()
     c.execute("SELECT * FROM paper_trades WHERE status = 'OPEN'")
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 def close_paper_trade(trade_id, exit_price, pnl, exit_time=None):
@@ -292,21 +378,16 @@ def close_paper_trade(trade_id, exit_price, pnl, exit_time=None):
     if not exit_time:
         exit_time = datetime.now()
         
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        UPDATE paper_trades 
-        SET status = 'CLOSED', exit_price = ?, pnl = ?, exit_time = ?
-        WHERE id = ?
-    ''', (exit_price, pnl, exit_time, trade_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('''
+            UPDATE paper_trades 
+            SET status = 'CLOSED', exit_price = ?, pnl = ?, exit_time = ?
+            WHERE id = ?
+        ''', (exit_price, pnl, exit_time, trade_id))
 
 def get_paper_trade_history(limit=50):
     """Fetches closed paper trades."""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    c = get_connection().cursor()
     c.execute('''
         SELECT * FROM paper_trades 
         WHERE status = 'CLOSED' 
@@ -314,20 +395,14 @@ def get_paper_trade_history(limit=50):
         LIMIT ?
     ''', (limit,))
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
     
 def get_todays_trade_count():
     """Returns the number of trades executed today."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    c = get_connection().cursor()
     # SQLITE 'now', 'localtime' might depend on server time, usually safer to query string match
     # Or just check entries since midnight.
     date_str = datetime.now().strftime('%Y-%m-%d')
     c.execute("SELECT count(*) FROM paper_trades WHERE date(entry_time) = ?", (date_str,))
     count = c.fetchone()[0]
-    conn.close()
     return count
-
-# Initialize on module load
-init_db()
@@ -0,0 +1,187 @@
+import time
+import random
+import threading
+from collections import deque
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to `capacity`.
+    acquire() blocks (via the injected sleep) until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.last = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def acquire(self, tokens=1):
+        """Takes `tokens` from the bucket, waiting for a refill if needed."""
+        tokens = min(float(tokens), self.capacity)
+        with self.lock:
+            self._refill()
+            while self.tokens < tokens:
+                self.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+class DownloadScheduler:
+    """
+    Shared scheduler for batched market data downloads.
+
+    - Token bucket rate limiting, charged per symbol (yfinance fetches every
+      ticker of a batch with its own request).
+    - Exponential backoff with jitter after a batch raises (throttling, network).
+    - Circuit breaker: after `max_consecutive_errors` failed batches in a row the
+      rest of the queue is failed at once instead of backing off through an outage.
+    - Per-symbol retry of symbols missing from an otherwise successful batch
+      (e.g. "1 Failed download: ['FLUOROCHEM.NS']").
+    - Chunk size adapts to observed latency and error rate: additive increase
+      while the source is healthy, halving on errors or slow batches.
+
+    fetch_fn(chunk) must return {symbol: data} for the symbols it got and may raise.
+    `clock`, `sleep` and `rng` are injectable so it can be driven by a fake source.
+    """
+
+    def __init__(self, rate=10.0, burst=100, initial_chunk=20, min_chunk=5, max_chunk=100,
+                 target_latency=10.0, max_retries=2, base_backoff=1.0, max_backoff=60.0,
+                 max_consecutive_errors=5, clock=time.monotonic, sleep=time.sleep, rng=random.random):
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.chunk_size = initial_chunk
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_consecutive_errors = max_consecutive_errors
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+        self.consecutive_errors = 0
+        self.stats = {'requests': 0, 'errors': 0, 'retries': 0, 'failed': 0}
+
+    def _backoff(self, attempt):
+        """Exponential backoff with equal jitter: half fixed, half random."""
+        # The exponent is capped so a long outage cannot overflow the float
+        delay = min(self.max_backoff, self.base_backoff * (2 ** min(attempt, 10)))
+        return delay / 2 + self.rng() * delay / 2
+
+    def _adapt(self, latency, failure_rate):
+        if latency > self.target_latency or failure_rate > 0.25:
+            self.chunk_size = max(self.min_chunk, self.chunk_size // 2)
+        elif latency < self.target_latency / 2 and failure_rate == 0:
+            self.chunk_size = min(self.max_chunk, self.chunk_size + max(1, self.chunk_size // 4))
+
+    def _fetch(self, chunk, fetch_fn):
+        """One rate-limited request. Returns (results, latency) or raises."""
+        self.bucket.acquire(len(chunk))
+        self.stats['requests'] += 1
+        start = self.clock()
+        results = fetch_fn(chunk)
+        return results or {}, self.clock() - start
+
+    def run(self, symbols, fetch_fn):
+        """
+        Downloads all `symbols` through fetch_fn.
+        Returns (results, failed): a merged {symbol: data} dict and the list of
+        symbols that still failed after max_retries.
+        """
+        queue = deque(symbols)
+        retry_queue = deque()
+        attempts = {}
+        results = {}
+        failed = []
+        errors_in_row = 0  # this run's failed batches since the last success
+
+        def give_up_or_retry(symbol, requeue):
+            attempts[symbol] = attempts.get(symbol, 0) + 1
+            if attempts[symbol] > self.max_retries:
+                failed.append(symbol)
+                self.stats['failed'] += 1
+            else:
+                requeue(symbol)
+                self.stats['retries'] += 1
+
+        while queue or retry_queue:
+            if queue:
+                chunk = [queue.popleft() for _ in range(min(self.chunk_size, len(queue)))]
+            else:
+                # Failed symbols are retried one by one so one bad ticker
+                # cannot sink a whole batch again
+                chunk = [retry_queue.popleft()]
+
+            try:
+                fetched, latency = self._fetch(chunk, fetch_fn)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.consecutive_errors += 1
+                errors_in_row += 1
+                self.chunk_size = max(self.min_chunk, self.chunk_size // 2)
+                if errors_in_row >= self.max_consecutive_errors:
+                    # Source looks down: fail everything left instead of sleeping through it
+                    remaining = chunk + list(queue) + list(retry_queue)
+                    queue.clear()
+                    retry_queue.clear()
+                    failed.extend(remaining)
+                    self.stats['failed'] += len(remaining)
+                    # The next run starts probing with a short backoff again
+                    self.consecutive_errors = 0
+                    print(f"Download error ({e}); {errors_in_row} failed batches in a row, "
+                          f"giving up on {len(remaining)} symbols")
+                    break
+                delay = self._backoff(self.consecutive_errors - 1)
+                print(f"Download error ({e}); backing off {delay:.1f}s")
+                self.sleep(delay)
+                # The whole batch goes back to the front, to be re-sent in smaller chunks
+                for symbol in reversed(chunk):
+                    give_up_or_retry(symbol, queue.appendleft if len(chunk) > 1 else retry_queue.appendleft)
+                continue
+
+            self.consecutive_errors = 0
+            errors_in_row = 0
+            missing = [s for s in chunk if s not in fetched]
+            results.update({s: d for s, d in fetched.items() if s in chunk})
+            for symbol in missing:
+                give_up_or_retry(symbol, retry_queue.append)
+
+            if len(chunk) > 1:
+                self._adapt(latency, len(missing) / len(chunk))
+
+        return results, failed
+
+
+# Live quotes are a period="1d" request per chunk, a fraction of a one-year
+# history download, so they get their own, larger budget and bigger chunks
+# instead of queueing behind the history token bucket.
+QUOTE_LIMITS = dict(rate=50.0, burst=500, initial_chunk=100, min_chunk=20, max_chunk=500,
+                    target_latency=5.0, max_retries=1)
+
+_scheduler = None
+_quote_scheduler = None
+
+
+def get_scheduler():
+    """Process-wide scheduler so every caller shares one rate limit."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DownloadScheduler()
+    return _scheduler
+
+
+def get_quote_scheduler():
+    """Process-wide scheduler for live quotes, rate limited separately from history."""
+    global _quote_scheduler
+    if _quote_scheduler is None:
+        _quote_scheduler = DownloadScheduler(**QUOTE_LIMITS)
+    return _quote_scheduler
@@ -1,101 +1,220 @@
-import yfinance as yf
+import os
 import pandas as pd
-import pandas_ta as ta
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
+from data_store import load_ohlcv, close_panel
+from trading_calendar import calendar_groups
+from model_registry import ModelRegistry
+from strategy import ema_panel, rsi_panel, atr_panel
 
-def get_ai_price_prediction(symbol):
+# Bump whenever FEATURES or their definitions change, so stored models are retrained
+# (2: features are computed on each symbol's own calendar)
+FEATURE_VERSION = 2
+FEATURES = ['close', 'rsi', 'ema_20', 'ema_50', 'atr', 'return_1d', 'return_5d']
+
+# Upper bound on fitting processes for predict_many (each holds a copy of its data)
+MAX_FIT_WORKERS = 8
+
+_registry = ModelRegistry("forecasting")
+
+def build_feature_panels(frames):
+    """
+    Feature / target frames for many symbols at once ({symbol: daily OHLCV frame
+    with lowercase columns}). Indicators are computed on wide (dates x symbols)
+    matrices and split back per symbol. The pandas-ta compatible panel versions
+    give the same values as running pandas-ta on each symbol.
+    Symbols are grouped by calendar (trading_calendar.calendar_groups), so each symbol's
+    features match what _build_features gives for it alone.
+    The last rows have features but no target (it looks 5 days ahead).
+    """
+    features = {}
+    for group in calendar_groups(frames):
+        features.update(_group_feature_frames(group))
+    return features
+
+def _group_feature_frames(frames):
+    """build_feature_panels for symbols that share one index."""
+    close = close_panel(frames, 'close')
+    high = close_panel(frames, 'high')
+    low = close_panel(frames, 'low')
+    
+    # We use technical indicators as features
+    panels = {
+        'close': close,
+        'rsi': rsi_panel(close, 14),
+        'ema_20': pd.DataFrame(ema_panel(close, 20), index=close.index, columns=close.columns),
+        'ema_50': pd.DataFrame(ema_panel(close, 50), index=close.index, columns=close.columns),
+        'atr': atr_panel(high, low, close, 14),
+        # Lagged Returns (Momentum)
+        'return_1d': close.pct_change(1, fill_method=None),
+        'return_5d': close.pct_change(5, fill_method=None),
+        # Target: Future Price (Average of next 5 days)
+        'target': close.rolling(window=5).mean().shift(-5)
+    }
+    
+    return {symbol: pd.DataFrame({name: panel[symbol] for name, panel in panels.items()})
+            for symbol in frames}
+
+def _build_features(df):
+    """Feature / target frame for a single symbol's daily frame."""
+    return build_feature_panels({'_': df})['_']
+
+def fit_model(X, y, n_jobs=-1):
+    """Fits the forecasting model; returns (model, confidence)."""
+    # We don't need a massive grid search, just a robust estimator
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    model.fit(X, y)
+
+    # Confidence (heuristic based on tree variance or simple R^2 proxy)
+    # For simplicity, we'll use the model's score on the training set as a proxy for "fit quality"
+    confidence = model.score(X, y) * 100 # R-squared
+    confidence = max(0, min(99, confidence)) # Clip 0-99
+    return model, confidence
+
+def _training_set(feat):
+    """
+    (train rows, last training date, fingerprint) for a feature frame, or None if
+    unusable. The fingerprint (first and summed training closes) changes when a
+    split or dividend re-adjusts history without adding a bar.
+    """
+    train = feat.dropna()
+    if train.empty:
+        return None
+    # Training rows end 5 bars before the data does, so this only moves on a new bar
+    fingerprint = (float(train['close'].iloc[0]), float(train['close'].sum()))
+    return train, train.index[-1], fingerprint
+
+def _predict(feat, model, confidence):
+    """Interprets the model's forecast for the latest candle of a feature frame."""
+    # Predict for "Tomorrow" using the latest candle of the same frame
+    # (the training rows stop 5 days earlier because of shift(-5))
+    current = feat.iloc[-1]
+    if current[FEATURES].isna().any():
+        return None
+    current_price = current['close']
+
+    prediction = model.predict(current[FEATURES].to_frame().T.astype(float))[0]
+
+    # Interpret Result
+    change_pct = ((prediction - current_price) / current_price) * 100
+
+    direction = "Neutral"
+    if change_pct > 1.5:
+        direction = "Bullish"
+    elif change_pct < -1.5:
+        direction = "Bearish"
+
+    return {
+        'current_price': current_price,
+        'predicted_price': prediction,
+        'change_pct': change_pct,
+        'direction': direction,
+        'confidence': confidence
+    }
+
+def predict_from_frame(symbol, df):
     """
-    Trains a quick Random Forest model on the stock's recent history 
+    Prediction for one symbol from its daily frame. The fitted model is reused
+    from the registry until a new bar extends the training data.
+    """
+    if df is None or len(df) < 100:
+        return None
+
+    feat = _build_features(df)
+    prepared = _training_set(feat)
+    if prepared is None:
+        return None
+    train, last_train_date, fingerprint = prepared
+
+    cached = _registry.load(symbol, last_train_date, FEATURE_VERSION, fingerprint)
+    if cached is None:
+        model, confidence = fit_model(train[FEATURES], train['target'])
+        cached = {'model': model, 'confidence': confidence}
+        _registry.save(symbol, last_train_date, FEATURE_VERSION, cached, fingerprint)
+
+    return _predict(feat, cached['model'], cached['confidence'])
+
+def get_ai_price_prediction(symbol, df=None):
+    """
+    Trains a quick Random Forest model on the stock's recent history
     to predict the price trend for the next 5 days.
+    The model is cached on disk (model_registry) and only retrained when new bars arrive.
+    df: optional 2 years of daily bars (lowercase OHLCV) already loaded by the caller.
     Returns: Dictionary with 'predicted_price', 'direction', 'confidence'
     """
     try:
-        # 1. Fetch Data (2 years for training)
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period="2y", interval="1d")
-        
-        if len(df) < 100:
-            return None
-            
-        df.columns = [c.lower() for c in df.columns]
-        
-        # 2. Feature Engineering
-        # We use technical indicators as features
-        df['rsi'] = ta.rsi(df['close'], length=14)
-        df['ema_20'] = ta.ema(df['close'], length=20)
-        df['ema_50'] = ta.ema(df['close'], length=50)
-        df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
-        
-        # Lagged Returns (Momentum)
-        df['return_1d'] = df['close'].pct_change(1)
-        df['return_5d'] = df['close'].pct_change(5)
-        
-        # Target: Future Price (Average of next 5 days)
-        df['target'] = df['close'].rolling(window=5).mean().shift(-5)
-        
-        # Drop NaNs
-        df.dropna(inplace=True)
-        
-        if df.empty:
-            return None
-            
-        # Select Features
-        features = ['close', 'rsi', 'ema_20', 'ema_50', 'atr', 'return_1d', 'return_5d']
-        X = df[features]
-        y = df['target']
-        
-        # 3. Train Model (Random Forest)
-        # We don't need a massive grid search, just a robust estimator
-        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-        model.fit(X, y)
-        
-        # 4. Predict for "Tomorrow" (using the latest data point)
-        # We need the *actual* latest data which might have been dropped due to shift(-5)
-        # So we re-fetch or use the tail of the original df before dropna, 
-        # but simpler is to just use the last row of X if it represents "today".
-        # Actually, X's last row is 5 days ago because of shift(-5).
-        # We need to construct the feature vector for the *current* active day.
-        
-        # Re-calculate features for the very last available candle
-        last_row = ticker.history(period="3mo", interval="1d").tail(60) # Fetch enough for indicators
-        last_row.columns = [c.lower() for c in last_row.columns]
-        
-        last_row['rsi'] = ta.rsi(last_row['close'], length=14)
-        last_row['ema_20'] = ta.ema(last_row['close'], length=20)
-        last_row['ema_50'] = ta.ema(last_row['close'], length=50)
-        last_row['atr'] = ta.atr(last_row['high'], last_row['low'], last_row['close'], length=14)
-        last_row['return_1d'] = last_row['close'].pct_change(1)
-        last_row['return_5d'] = last_row['close'].pct_change(5)
-        
-        current_features = last_row.iloc[-1][features].values.reshape(1, -1)
-        current_price = last_row.iloc[-1]['close']
-        
-        prediction = model.predict(current_features)[0]
-        
-        # 5. Interpret Result
-        change_pct = ((prediction - current_price) / current_price) * 100
-        
-        direction = "Neutral"
-        if change_pct > 1.5:
-            direction = "Bullish"
-        elif change_pct < -1.5:
-            direction = "Bearish"
-            
-        # Confidence (heuristic based on tree variance or simple R^2 proxy)
-        # For simplicity, we'll use the model's score on the training set as a proxy for "fit quality"
-        confidence = model.score(X, y) * 100 # R-squared
-        confidence = max(0, min(99, confidence)) # Clip 0-99
-        
-        return {
-            'current_price': current_price,
-            'predicted_price': prediction,
-            'change_pct': change_pct,
-            'direction': direction,
-            'confidence': confidence
-        }
-        
+        # 1. Fetch Data (2 years for training), served from the local OHLCV cache
+        if df is None:
+            df = load_ohlcv(symbol, period="2y").get(symbol)
+
+        return predict_from_frame(symbol, df)
+
     except Exception as e:
         print(f"AI Error: {e}")
         return None
+
+def _fit_job(X, y):
+    """Worker entry point for predict_many: one single-threaded fit."""
+    # The pool provides the parallelism; nested sklearn threads would oversubscribe
+    return fit_model(X, y, n_jobs=1)
+
+def predict_many(symbols, frames=None, max_workers=None):
+    """
+    get_ai_price_prediction for many symbols.
+    - Data is loaded once for all symbols (frames: optional {symbol: DataFrame};
+      missing symbols are read from the OHLCV cache in one batched call).
+    - Features are built on panels, one per group of symbols sharing a calendar.
+    - Models in the registry are reused; the rest are fitted in parallel on a
+      process pool of at most max_workers (default: cores, capped at MAX_FIT_WORKERS).
+    Returns a DataFrame with one row per predicted symbol (Symbol + the
+    get_ai_price_prediction fields). Symbols without enough data are left out.
+    """
+    frames = dict(frames or {})
+    missing = [s for s in symbols if s not in frames]
+    if missing:
+        frames.update(load_ohlcv(missing, period="2y"))
+    frames = {s: frames[s] for s in symbols if s in frames and len(frames[s]) >= 100}
+    
+    columns = ['Symbol', 'current_price', 'predicted_price', 'change_pct', 'direction', 'confidence']
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    
+    features = build_feature_panels(frames)
+    
+    prepared = {}
+    models = {}
+    to_fit = []
+    for symbol, feat in features.items():
+        p = _training_set(feat)
+        if p is None:
+            continue
+        prepared[symbol] = p
+        cached = _registry.load(symbol, p[1], FEATURE_VERSION, p[2])
+        if cached is None:
+            to_fit.append(symbol)
+        else:
+            models[symbol] = cached
+    
+    if to_fit:
+        workers = min(max_workers or os.cpu_count() or 1, MAX_FIT_WORKERS, len(to_fit))
+        if workers <= 1:
+            fitted = [fit_model(prepared[s][0][FEATURES], prepared[s][0]['target']) for s in to_fit]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fitted = list(pool.map(_fit_job,
+                                       [prepared[s][0][FEATURES] for s in to_fit],
+                                       [prepared[s][0]['target'] for s in to_fit]))
+        for symbol, (model, confidence) in zip(to_fit, fitted):
+            models[symbol] = {'model': model, 'confidence': confidence}
+            _registry.save(symbol, prepared[symbol][1], FEATURE_VERSION, models[symbol], prepared[symbol][2])
+    
+    rows = []
+    for symbol in prepared:
+        try:
+            result = _predict(features[symbol], models[symbol]['model'], models[symbol]['confidence'])
+        except Exception as e:
+            print(f"AI Error for {symbol}: {e}")
+            continue
+        if result:
+            rows.append({'Symbol': symbol, **result})
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,326 @@
+import os
+import copy
+import json
+import math
+import threading
+from datetime import datetime, time
+import pandas as pd
+
+# Saved indicator state lives next to the OHLCV cache
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache", "indicators")
+
+NAN = float('nan')
+
+# A resumed bar whose close or volume moved more than this since it was committed
+# (split / dividend re-adjustment, late data corrections) forces a rewarm
+RESUME_TOLERANCE = 0.001
+
+# Until the session closes, a bar dated today is still forming and is never committed
+MARKET_CLOSE = time(15, 30)
+
+
+class EMA:
+    """pandas_ta compatible EMA: NaN for the first length-1 values, SMA seed, then alpha = 2/(length+1)."""
+
+    __slots__ = ('length', 'count', 'total', 'value')
+
+    def __init__(self, length):
+        self.length = length
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.count += 1
+        if self.count < self.length:
+            self.total += x
+        elif self.count == self.length:
+            self.value = (self.total + x) / self.length
+        else:
+            alpha = 2.0 / (self.length + 1)
+            self.value = alpha * x + (1 - alpha) * self.value
+        return self.value
+
+
+class RMA:
+    """
+    Wilder's moving average as pandas_ta computes it:
+    Series.ewm(alpha=1/length, min_periods=length).mean() (adjusted weights),
+    carried as a decaying weighted sum and weight total.
+    """
+
+    __slots__ = ('length', 'count', 'weighted', 'weights')
+
+    def __init__(self, length):
+        self.length = length
+        self.count = 0
+        self.weighted = 0.0
+        self.weights = 0.0
+
+    @property
+    def value(self):
+        return self.weighted / self.weights if self.count >= self.length else NAN
+
+    def update(self, x):
+        decay = 1.0 - 1.0 / self.length
+        # Missing values still age older observations (ewm ignore_na=False)
+        self.weighted *= decay
+        self.weights *= decay
+        if not math.isnan(x):
+            self.weighted += x
+            self.weights += 1.0
+            self.count += 1
+        return self.value
+
+
+class RSI:
+    """pandas_ta compatible RSI: RMA of gains over RMA of gains plus losses."""
+
+    __slots__ = ('length', 'prev_close', 'gain', 'loss')
+
+    def __init__(self, length=14):
+        self.length = length
+        self.prev_close = NAN
+        self.gain = RMA(length)
+        self.loss = RMA(length)
+
+    @property
+    def value(self):
+        gain, loss = self.gain.value, self.loss.value
+        return 100 * gain / (gain + loss) if gain + loss else NAN
+
+    def update(self, close):
+        if math.isnan(self.prev_close):
+            # The first bar has no change (diff() is NaN there)
+            self.prev_close = close
+            return NAN
+        change = close - self.prev_close
+        self.prev_close = close
+        self.gain.update(max(change, 0.0))
+        self.loss.update(max(-change, 0.0))
+        return self.value
+
+
+class ATR:
+    """pandas_ta compatible ATR: RMA of the true range; the first bar has none."""
+
+    __slots__ = ('length', 'prev_close', 'rma')
+
+    def __init__(self, length=14):
+        self.length = length
+        self.prev_close = NAN
+        self.rma = RMA(length)
+
+    @property
+    def value(self):
+        return self.rma.value
+
+    def update(self, high, low, close):
+        if math.isnan(self.prev_close):
+            self.prev_close = close
+            return NAN
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.rma.update(true_range)
+
+
+class RollingMean:
+    """Series.rolling(window).mean() over a ring buffer of the last `window` values."""
+
+    __slots__ = ('window', 'values', 'pos', 'count')
+
+    def __init__(self, window=20):
+        self.window = window
+        self.values = [0.0] * window
+        self.pos = 0
+        self.count = 0
+
+    @property
+    def value(self):
+        # Summing the buffer (rather than a running total) keeps it exact and lets a
+        # missing value drop out once it leaves the window, like rolling() does
+        return sum(self.values) / self.window if self.count >= self.window else NAN
+
+    def update(self, x):
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        return self.value
+
+
+# name -> (class, input columns)
+INDICATOR_TYPES = {
+    'ema': (EMA, ('close',)),
+    'rsi': (RSI, ('close',)),
+    'atr': (ATR, ('high', 'low', 'close')),
+    'volume_mean': (RollingMean, ('volume',)),
+}
+
+
+def _to_state(obj):
+    """JSON-ready dict of an indicator's slots (nested indicators included)."""
+    state = {'type': type(obj).__name__}
+    for slot in obj.__slots__:
+        value = getattr(obj, slot)
+        state[slot] = _to_state(value) if hasattr(value, '__slots__') else value
+    return state
+
+
+def _from_state(state):
+    classes = {cls.__name__: cls for cls, _ in INDICATOR_TYPES.values()}
+    classes['RMA'] = RMA
+    obj = classes[state['type']].__new__(classes[state['type']])
+    for slot in obj.__slots__:
+        value = state[slot]
+        setattr(obj, slot, _from_state(value) if isinstance(value, dict) else value)
+    return obj
+
+
+def _unchanged(value, committed):
+    """True if a re-read value matches the committed one within RESUME_TOLERANCE."""
+    value = float(value)
+    if math.isnan(value) or math.isnan(committed):
+        return math.isnan(value) and math.isnan(committed)
+    return abs(value - committed) <= RESUME_TOLERANCE * abs(committed)
+
+
+class IndicatorBank:
+    """
+    Per-symbol incremental indicators with resumable state.
+
+    `specs` maps an output name to (type, length), e.g.
+    {'ema_50': ('ema', 50), 'rsi': ('rsi', 14), 'vol_avg': ('volume_mean', 20)};
+    types are the keys of INDICATOR_TYPES. Each symbol remembers the date, close
+    and volume of its last committed bar, so update_frame() only feeds bars that
+    are new since the last run (one per symbol on a daily scan). The last `history`
+    outputs are kept for rules that look a few bars back.
+
+    A bar dated today is only committed once the session has closed (MARKET_CLOSE
+    by `clock`); before that it is applied to a copy of the state for the returned
+    outputs, so a mid-session scan never bakes a partial bar into the saved state.
+
+    save() / load() persist everything as JSON so a scan can resume the next day.
+    Values match pandas_ta over the bars the symbol was warmed with; afterwards they
+    keep extending that history rather than re-windowing it, so the longest windows
+    (EMA seed, Wilder smoothing) can drift slightly from a fresh 6-month scan.
+    """
+
+    def __init__(self, specs, history=1, clock=datetime.now):
+        self.specs = {name: tuple(spec) for name, spec in specs.items()}
+        self.history = history
+        self.clock = clock
+        self.symbols = {}
+        self._lock = threading.Lock()
+
+    def _new_entry(self):
+        indicators = {}
+        for name, (kind, length) in self.specs.items():
+            cls, _ = INDICATOR_TYPES[kind]
+            indicators[name] = cls(length)
+        return {'last_date': None, 'last_close': None, 'last_volume': None, 'indicators': indicators, 'history': []}
+
+    def _feed(self, entry, bars):
+        for bar in bars.itertuples(index=False):
+            bar = bar._asdict()
+            row = {}
+            for name, (kind, _) in self.specs.items():
+                _, inputs = INDICATOR_TYPES[kind]
+                row[name] = entry['indicators'][name].update(*(float(bar[c]) for c in inputs))
+            entry['history'].append(row)
+        if len(bars):
+            del entry['history'][:-self.history]
+            entry['last_date'] = bars.index[-1].strftime('%Y-%m-%d')
+            entry['last_close'] = float(bars['close'].iloc[-1])
+            entry['last_volume'] = float(bars['volume'].iloc[-1])
+
+    def _can_resume(self, entry, df):
+        if entry is None or entry['last_date'] is None:
+            return False
+        last_date = pd.Timestamp(entry['last_date'])
+        if last_date not in df.index:
+            return False
+        return (_unchanged(df.at[last_date, 'close'], entry['last_close'])
+                and _unchanged(df.at[last_date, 'volume'], entry['last_volume']))
+
+    def _forming_from(self):
+        """First date whose bar may still be forming: today until MARKET_CLOSE, then tomorrow."""
+        now = self.clock()
+        today = pd.Timestamp(now.date())
+        return today if now.time() < MARKET_CLOSE else today + pd.Timedelta(days=1)
+
+    def update_frame(self, symbol, df):
+        """
+        Brings `symbol` up to date with `df` (lowercase OHLCV, DatetimeIndex) and
+        returns its last `history` outputs, oldest first, as {name: value} dicts.
+        Bars already committed are skipped; if the stored state no longer lines up
+        with `df` (gap, re-adjusted history) the symbol is rewarmed from `df`.
+        A bar that is still forming is included in the outputs but not committed.
+        """
+        with self._lock:
+            entry = self.symbols.get(symbol)
+        if self._can_resume(entry, df):
+            bars = df[df.index > pd.Timestamp(entry['last_date'])]
+        else:
+            entry = self._new_entry()
+            bars = df
+        forming = bars.index >= self._forming_from()
+        self._feed(entry, bars[~forming])
+        with self._lock:
+            self.symbols[symbol] = entry
+        if forming.any():
+            preview = copy.deepcopy(entry)
+            self._feed(preview, bars[forming])
+            return list(preview['history'])
+        return list(entry['history'])
+
+    def save(self, path):
+        """Writes the bank atomically as JSON."""
+        with self._lock:
+            data = {
+                'specs': self.specs,
+                'history': self.history,
+                'symbols': {
+                    symbol: {
+                        'last_date': entry['last_date'],
+                        'last_close': entry['last_close'],
+                        'last_volume': entry['last_volume'],
+                        'history': entry['history'],
+                        'indicators': {name: _to_state(ind) for name, ind in entry['indicators'].items()}
+                    } for symbol, entry in self.symbols.items()
+                }
+            }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, specs, history=1, clock=datetime.now):
+        """
+        Restores a bank saved with the same specs and history; otherwise (missing,
+        corrupt or different indicators) returns an empty bank that warms up on use.
+        """
+        bank = cls(specs, history=history, clock=clock)
+        if not os.path.exists(path):
+            return bank
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            saved_specs = {name: tuple(spec) for name, spec in data['specs'].items()}
+            if saved_specs != bank.specs or data['history'] != history:
+                return bank
+            for symbol, entry in data['symbols'].items():
+                bank.symbols[symbol] = {
+                    'last_date': entry['last_date'],
+                    'last_close': entry['last_close'],
+                    'last_volume': entry['last_volume'],
+                    'history': entry['history'],
+                    'indicators': {name: _from_state(state) for name, state in entry['indicators'].items()}
+                }
+        except Exception as e:
+            print(f"Could not load indicator state from {path}: {e}")
+            return cls(specs, history=history, clock=clock)
+        return bank
@@ -0,0 +1,118 @@
+import time
+import threading
+import pandas as pd
+import yfinance as yf
+from download_scheduler import get_scheduler
+
+INTERVAL = "5m"
+PERIOD = "5d"  # two sessions are needed for VWAP / volume comparisons; 5d covers weekends
+BAR_SECONDS = 5 * 60
+# Give the provider a moment to publish the bar that just closed before refetching
+PUBLISH_DELAY = 5  # seconds
+
+
+def _split_intraday(data, chunk):
+    """Splits a grouped multi-symbol 5m download into {symbol: DataFrame} with lowercase columns."""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    for symbol in chunk:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            df_sym = data.xs(symbol, level=0, axis=1)
+        elif len(chunk) == 1:
+            df_sym = data
+        else:
+            continue
+        df_sym = df_sym.copy()
+        df_sym.columns = [str(c).lower() for c in df_sym.columns]
+        df_sym = df_sym.dropna(how='all')
+        if not df_sym.empty:
+            frames[symbol] = df_sym
+    return frames
+
+
+def _download_intraday(chunk):
+    data = yf.download(chunk, period=PERIOD, interval=INTERVAL, group_by='ticker',
+                       threads=True, progress=False)
+    return _split_intraday(data, chunk)
+
+
+class IntradayCache:
+    """
+    Shared 5-minute bar cache for the paper trading loop.
+
+    Entries expire at the next 5-minute bar boundary (plus PUBLISH_DELAY), so all
+    reads within one bar are served from memory and the first read after a new
+    bar opens triggers a refetch. prefetch() refreshes every stale symbol of a
+    cycle with one batched download through the shared DownloadScheduler.
+
+    `fetch_fn(chunk) -> {symbol: DataFrame}`, `clock` and `scheduler` are
+    injectable so the cache can be driven without the network.
+    """
+
+    def __init__(self, fetch_fn=_download_intraday, clock=time.time, scheduler=None,
+                 bar_seconds=BAR_SECONDS, publish_delay=PUBLISH_DELAY):
+        self.fetch_fn = fetch_fn
+        self.clock = clock
+        self.scheduler = scheduler
+        self.bar_seconds = bar_seconds
+        self.publish_delay = publish_delay
+        self.entries = {}  # symbol -> (DataFrame, expires_at)
+        self.lock = threading.Lock()
+
+    def _expiry(self, now):
+        """Start of the next bar (epoch-aligned, which matches exchange 5m bars)."""
+        return (now // self.bar_seconds + 1) * self.bar_seconds + self.publish_delay
+
+    def _is_fresh(self, symbol, now):
+        entry = self.entries.get(symbol)
+        return entry is not None and now < entry[1]
+
+    def prefetch(self, symbols):
+        """Refreshes every stale symbol in one batched download. Returns the symbols that failed."""
+        now = self.clock()
+        with self.lock:
+            stale = list(dict.fromkeys(s for s in symbols if not self._is_fresh(s, now)))
+        if not stale:
+            return []
+
+        scheduler = self.scheduler or get_scheduler()
+        fresh, failed = scheduler.run(stale, self.fetch_fn)
+        if failed:
+            print(f"Intraday download failed for {len(failed)} symbols: {failed[:5]}")
+
+        expires_at = self._expiry(self.clock())
+        with self.lock:
+            for symbol, df in fresh.items():
+                self.entries[symbol] = (df, expires_at)
+        return failed
+
+    def get(self, symbol):
+        """
+        5m bars for `symbol` (a copy), fetching it on a miss. If a refetch fails the
+        previous bars are served; returns None if the symbol was never fetched.
+        """
+        with self.lock:
+            fresh = self._is_fresh(symbol, self.clock())
+        if not fresh:
+            self.prefetch([symbol])
+        with self.lock:
+            entry = self.entries.get(symbol)
+        return entry[0].copy() if entry is not None else None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_intraday_cache = None
+
+
+def get_intraday_cache():
+    """Process-wide cache shared by PaperTrader and the auto trader."""
+    global _intraday_cache
+    if _intraday_cache is None:
+        _intraday_cache = IntradayCache()
+    return _intraday_cache
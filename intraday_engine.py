@@ -0,0 +1,159 @@
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from scanner import scan_stocks
+from stock_list import load_stock_list
+from strategy import add_strategy_indicators
+from streaming_tsl import StreamingTSL
+from data_store import load_ohlcv, download_daily
+from download_scheduler import get_quote_scheduler
+
+# Widest NSE daily price band: a symbol cannot move more than this in one session
+MAX_DAILY_MOVE = 0.20
+
+
+def fetch_today_bars(symbols, scheduler=None, download_fn=download_daily):
+    """
+    Batched quote source: the running daily bar of every symbol, via one
+    period="1d" download per chunk of the quote scheduler. Returns
+    {symbol: Series} whose name is the bar's date.
+    """
+    if not symbols:
+        return {}
+    scheduler = scheduler or get_quote_scheduler()
+    frames, failed = scheduler.run(list(symbols), lambda chunk: download_fn(chunk, period="1d"))
+    if failed:
+        print(f"Quote download failed for {len(failed)} symbols: {failed[:5]}")
+    return {symbol: df.iloc[-1] for symbol, df in frames.items() if not df.empty}
+
+
+class IntradayEngine:
+    """
+    Incremental intraday signal loop for the auto trader.
+
+    Once per session it runs the full daily scan (so the signals table and the
+    dashboard stay current) and warms a StreamingTSL per symbol from its completed
+    daily bars. A TSL buy crossover today needs yesterday's close below yesterday's
+    TSL, so only those "armed" symbols are quoted each cycle and their provisional
+    bar is evaluated in O(1) with StreamingTSL.update_provisional. Armed symbols
+    whose support is further above the last close than `max_move` cannot cross
+    today and are not quoted either.
+
+    A symbol that has crossed is offered again every cycle while it stays above
+    its TSL (it may fail PaperTrader's checks early in the session and pass
+    later), until the caller takes it with mark_taken().
+
+    The session bootstrap runs a full universe scan, so it never runs inside a
+    cycle: call bootstrap() at startup and start_bootstrap() before the open. If a
+    cycle finds the session stale anyway, it starts the bootstrap on a background
+    thread and returns no signals until it has finished.
+
+    quote_fn(symbols) -> {symbol: Series(open, high, low, close, volume) named by date},
+    scan_fn and load_fn(symbols, period) are injectable for offline runs.
+    """
+
+    def __init__(self, symbols=None, strategy_type="standard", no=3, quote_fn=fetch_today_bars,
+                 scan_fn=scan_stocks, clock=datetime.now, max_move=MAX_DAILY_MOVE, load_fn=load_ohlcv):
+        self.symbols = symbols
+        self.strategy_type = strategy_type
+        self.no = no
+        self.quote_fn = quote_fn
+        self.scan_fn = scan_fn
+        self.load_fn = load_fn
+        self.clock = clock
+        self.max_move = max_move
+        self.session_date = None
+        self.state = {}  # symbol -> StreamingTSL over completed bars
+        self.last_dates = {}  # symbol -> date of its last completed bar
+        self.taken = set()
+        self._bootstrap_thread = None
+
+    def bootstrap(self, frames=None):
+        """Full daily scan and per-symbol state from completed bars (everything before today)."""
+        today = pd.Timestamp(self.clock().date())
+        if frames is None:
+            if self.scan_fn is not None:
+                self.scan_fn(strategy_type=self.strategy_type)
+            symbols = self.symbols if self.symbols is not None else load_stock_list()
+            # Served from the cache the scan just refreshed
+            frames = self.load_fn(symbols, period="1y")
+
+        completed = {s: df[df.index < today] for s, df in frames.items()}
+        completed = {s: df for s, df in completed.items() if len(df) >= 20}
+        with_tsl = add_strategy_indicators(completed, no=self.no)
+
+        self.state = {s: StreamingTSL.from_frame(df, no=self.no) for s, df in with_tsl.items()}
+        self.last_dates = {s: df.index[-1] for s, df in with_tsl.items()}
+        self.session_date = today
+        self.taken = set()
+        print(f"Intraday engine ready: {len(self.state)} symbols, {len(self.armed())} armed for a TSL buy.")
+
+    def start_bootstrap(self):
+        """Runs bootstrap() on a background thread unless one is already running."""
+        if self.bootstrapping:
+            return
+        self._bootstrap_thread = threading.Thread(target=self.bootstrap, name="intraday-bootstrap", daemon=True)
+        self._bootstrap_thread.start()
+
+    @property
+    def bootstrapping(self):
+        return self._bootstrap_thread is not None and self._bootstrap_thread.is_alive()
+
+    def armed(self):
+        """Symbols whose close is below their TSL, i.e. that can cross above it today."""
+        return [s for s, stream in self.state.items() if stream.armed]
+
+    def watchlist(self):
+        """
+        Armed symbols not yet taken that can still cross today. Whatever today's
+        TSL resolves to, a BUY needs the close above the committed support, so a
+        symbol whose support is more than `max_move` above its last close is out
+        of reach for this session.
+        """
+        reach = 1 + self.max_move
+        return [s for s in self.armed()
+                if s not in self.taken and self.state[s].close * reach > self.state[s].sup]
+
+    def evaluate(self, symbol, bar):
+        """True if the provisional bar crosses above today's TSL."""
+        tsl, event = self.state[symbol].update_provisional(bar['high'], bar['low'], bar['close'])
+        return event == 'BUY'
+
+    def mark_taken(self, symbols):
+        """Stops offering `symbols` for the rest of the session (buffered or traded)."""
+        self.taken.update(symbols)
+
+    def run_cycle(self):
+        """
+        Quotes the watchlist, re-evaluates each symbol's crossover and returns today's
+        buy signals as PaperTrader.process_buy_signals expects them: every symbol
+        currently above its TSL that has not been taken (mark_taken) this session.
+        When the date has changed, the new session is bootstrapped in the
+        background and the cycle returns no signals until it is ready: yesterday's
+        state misses yesterday's bar, so its TSL would be wrong for today.
+        """
+        if self.bootstrapping:
+            return []
+        if self.session_date != pd.Timestamp(self.clock().date()):
+            print("New session: bootstrapping in the background, no signals until it finishes.")
+            self.start_bootstrap()
+            return []
+
+        quotes = self.quote_fn(self.watchlist())
+
+        signals = []
+        for symbol, bar in quotes.items():
+            if symbol not in self.state or pd.Timestamp(bar.name) <= self.last_dates[symbol]:
+                continue  # no bar for today yet (holiday / pre-open)
+            if np.isnan(bar['close']):
+                continue
+            if self.evaluate(symbol, bar):
+                signals.append({
+                    'symbol': symbol,
+                    'price': float(bar['close']),
+                    'signal_date': pd.Timestamp(bar.name).strftime('%Y-%m-%d')
+                })
+        if signals:
+            print(f"TSL buy signals: {[s['symbol'] for s in signals]}")
+        return signals
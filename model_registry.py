@@ -0,0 +1,79 @@
+import os
+import threading
+import joblib
+
+# Fitted models live next to the OHLCV cache
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache", "models")
+
+
+class ModelRegistry:
+    """
+    Disk-backed store of fitted models, one file per (namespace, symbol).
+
+    Each entry is saved with its key (last training date, feature version and an
+    optional fingerprint of the training data); a lookup with a different key is
+    a miss, so callers retrain only when new bars arrive, history is re-adjusted
+    (split / dividend) or the feature set changes. Only the newest model per
+    symbol is kept.
+    The most recently loaded / saved entries (up to memory_size) are also kept in
+    memory to skip the unpickling.
+    """
+
+    def __init__(self, namespace, model_dir=None, memory_size=32):
+        self.namespace = namespace
+        self.model_dir = model_dir
+        self.memory_size = memory_size
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol):
+        # MODEL_DIR is read at call time so it can be redirected (tests, benchmarks)
+        return os.path.join(self.model_dir or MODEL_DIR, self.namespace, f"{symbol}.joblib")
+
+    @staticmethod
+    def _key(last_date, feature_version, fingerprint):
+        return (str(last_date), feature_version, fingerprint)
+
+    def load(self, symbol, last_date, feature_version, fingerprint=None):
+        """Returns the stored object for this key, or None on a miss."""
+        key = self._key(last_date, feature_version, fingerprint)
+        path = self._path(symbol)
+
+        with self._lock:
+            entry = self._memory.get(path)
+        # Another process may have stored a newer model since it was cached here
+        if entry is None or entry.get('key') != key:
+            if not os.path.exists(path):
+                return None
+            try:
+                entry = joblib.load(path)
+            except Exception:
+                # Corrupt / incompatible file (e.g. written by another sklearn version)
+                return None
+            self._remember(path, entry)
+
+        if entry.get('key') != key:
+            return None
+        return entry.get('model')
+
+    def save(self, symbol, last_date, feature_version, model, fingerprint=None):
+        """Stores `model` under this key, replacing the symbol's previous entry."""
+        entry = {'key': self._key(last_date, feature_version, fingerprint), 'model': model}
+        path = self._path(symbol)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            joblib.dump(entry, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # A model that can't be persisted is still usable for this call
+            print(f"Model registry write failed for {symbol}: {e}")
+        self._remember(path, entry)
+
+    def _remember(self, path, entry):
+        with self._lock:
+            self._memory.pop(path, None)
+            self._memory[path] = entry
+            while len(self._memory) > self.memory_size:
+                # Dicts keep insertion order: drop the oldest entry
+                del self._memory[next(iter(self._memory))]
@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 import subprocess
 import sys
-from database import get_swing_signals
+from database import get_swing_signals, close_connection
 from plotting import plot_stock_chart
 from streamlit_lightweight_charts import renderLightweightCharts
 
@@ -110,3 +110,6 @@ with tab_pocket:
     *   **Exit:** Ride until volume dries up.
     """
     display_swing_signals('VolumePocket', desc)
+
+# Each rerun runs on a fresh thread: release its DB connection
+close_connection()
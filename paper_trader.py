@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime
 from database import (
     add_paper_trade, get_active_paper_trades, close_paper_trade, 
@@ -8,6 +7,8 @@ from database import (
 )
 from strategy import check_sell_signal, calculate_strategy_indicators
 from analysis import get_technical_analysis
+from data_store import load_ohlcv
+from intraday_cache import get_intraday_cache
 
 class PaperTrader:
     def __init__(self):
@@ -16,25 +17,23 @@ class PaperTrader:
         self.RISK_PER_TRADE = 1000
 
     def get_live_data(self, symbol):
-        """Fetches live data for a symbol (Intraday 5m)."""
+        """Fetches live data for a symbol (Intraday 5m), served from the shared intraday cache."""
         try:
-            # We need 2 days of data for Volume comparison and VWAP
-            data = yf.download(symbol, period="5d", interval="5m", progress=False)
-            if data.empty:
+            data = get_intraday_cache().get(symbol)
+            if data is None or data.empty:
                 return None
-                
-            # Flatten multi-index columns if present (Fix for new yfinance)
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = [col[0] for col in data.columns]
-            
-            # Ensure lowercase columns
-            data.columns = [c.lower() for c in data.columns]
-                
             return data
         except Exception as e:
             print(f"Error fetching data for {symbol}: {e}")
             return None
 
+    def prefetch_live_data(self, symbols):
+        """Refreshes 5m bars for all `symbols` in one batched download (no-op within the same bar)."""
+        try:
+            get_intraday_cache().prefetch(symbols)
+        except Exception as e:
+            print(f"Error prefetching intraday data: {e}")
+
     def calculate_atr(self, df, period=14):
         """Calculates ATR."""
         high = df['high']
@@ -59,23 +58,20 @@ class PaperTrader:
         tp = (df['high'] + df['low'] + df['close']) / 3
         return (tp * v).cumsum() / v.cumsum()
         
-    def check_selection_criteria(self, symbol, current_price):
+    def check_selection_criteria(self, symbol, current_price, daily=None):
         """
         Checks if a stock meets strict selection criteria:
         1. Price > VWAP
         2. Current Volume > Yesterday's Volume (Approximate check using daily bars)
         3. ATR Check
+
+        `daily` may hold already loaded daily bars; otherwise they come from the data store.
         """
         try:
-            # 1. Fetch Daily Data for Volume Check
-            daily = yf.download(symbol, period="5d", progress=False)
-            if isinstance(daily.columns, pd.MultiIndex):
-                daily.columns = [col[0] for col in daily.columns]
-            
-            # Ensure lowercase columns
-            daily.columns = [c.lower() for c in daily.columns]
-                
-            if len(daily) < 2:
+            # 1. Daily Data for Volume Check
+            if daily is None:
+                daily = load_ohlcv([symbol], period="5d").get(symbol)
+            if daily is None or len(daily) < 2:
                 return False, "Not enough daily data"
                 
             vol_today = daily['volume'].iloc[-1]
@@ -135,16 +131,24 @@ class PaperTrader:
             return []
 
         candidates = []
+
+        # One batched fetch per cycle: 5m bars from the intraday cache, daily bars
+        # (for the volume check and the indicators) from the data store
+        symbols = list(dict.fromkeys(sig['symbol'] for sig in signals))
+        self.prefetch_live_data(symbols)
+        daily_frames = load_ohlcv(symbols, period="6mo")
         
         for sig in signals:
             symbol = sig['symbol']
             price = sig['price']
+            daily = daily_frames.get(symbol)
             
             # Check if potential candidate
-            passed, reason = self.check_selection_criteria(symbol, price)
+            passed, reason = self.check_selection_criteria(
+                symbol, price, daily=daily.tail(5) if daily is not None else None)
             if passed:
                 # Get Scores for Ranking
-                tech = get_technical_analysis(symbol)
+                tech = get_technical_analysis(symbol, df=daily) if daily is not None else None
                 
                 if tech is None:
                     print(f"Skipping {symbol}: Could not fetch technical data.")
@@ -190,6 +194,9 @@ class PaperTrader:
         # Using Strategy TSL from last calculate_strategy_indicators would be best
         # Fetch data to calc SL
         df = self.get_live_data(symbol)
+        if df is None:
+            print(f"No intraday data for {symbol}. Skip.")
+            return
         df = calculate_strategy_indicators(df)
         tsl = df['tsl'].iloc[-1]
         
@@ -232,6 +239,7 @@ class PaperTrader:
     def manage_active_trades(self):
         """Checks exit conditions for open trades."""
         active_trades = get_active_paper_trades()
+        self.prefetch_live_data([trade['symbol'] for trade in active_trades])
         
         for trade in active_trades:
             symbol = trade['symbol']
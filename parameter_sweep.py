@@ -0,0 +1,153 @@
+import os
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from strategy import panel_indicator_arrays
+from backtester import simulate_trades, rolling_stop_low
+from data_store import load_ohlcv, close_panel
+from trading_calendar import calendar_groups
+from stock_list import get_nifty100_symbols
+
+# Default grid: TSL swing period x stop lookback x target R multiple
+SWING_PERIODS = (2, 3, 4, 5)
+STOP_LOOKBACKS = (5, 10, 20)
+REWARD_RATIOS = (1.0, 1.5, 2.0, 3.0)
+
+RESULT_COLUMNS = ['no', 'stop_lookback', 'reward_ratio', 'symbols', 'total_trades', 'win_rate',
+                  'avg_return', 'total_return', 'profit_factor']
+
+
+def sweep_chunk(frames, swing_periods, stop_lookbacks, reward_ratios):
+    """
+    Worker entry point: every grid combination for one chunk of symbols.
+
+    Rolling extrema are computed once per window size and reused by every
+    combination that needs them: the TSL once per swing period (panel pass over
+    each calendar group of the chunk, so every symbol's TSL is computed on its own
+    bars), the stop's rolling low once per lookback per symbol. Only the trade
+    simulation runs per combination.
+
+    Returns {(no, stop_lookback, reward_ratio): [symbols, trades, wins, pnl_sum,
+    gross_profit, gross_loss]} so chunks can be summed by the parent.
+    """
+    totals = {key: [0, 0, 0, 0.0, 0.0, 0.0] for key in itertools.product(swing_periods, stop_lookbacks, reward_ratios)}
+    for group in calendar_groups(frames):
+        _add_group_totals(totals, group, swing_periods, stop_lookbacks)
+    return totals
+
+
+def _add_group_totals(totals, frames, swing_periods, stop_lookbacks):
+    """Adds the grid results for frames sharing one index to `totals` (see sweep_chunk)."""
+    high = close_panel(frames, 'high')
+    low = close_panel(frames, 'low')
+    close = close_panel(frames, 'close')
+
+    # TSL panels, one per swing period
+    tsl_by_no = {}
+    for no in swing_periods:
+        arrays, has_close = panel_indicator_arrays(high, low, close, no=no)
+        tsl_by_no[no] = arrays['tsl']
+
+    low_arr, high_arr, close_arr = low.to_numpy(dtype=float), high.to_numpy(dtype=float), close.to_numpy(dtype=float)
+
+    for j in range(close_arr.shape[1]):
+        rows = has_close[:, j]
+        if rows.sum() < 50:
+            continue
+        c, h, l = close_arr[rows, j], high_arr[rows, j], low_arr[rows, j]
+        recent_lows = {lookback: rolling_stop_low(l, lookback) for lookback in stop_lookbacks}
+
+        for no, lookback, ratio in totals:
+            trades = simulate_trades(c, h, l, tsl_by_no[no][rows, j], stop_lookback=lookback,
+                                     reward_ratio=ratio, recent_low=recent_lows[lookback])
+            t = totals[(no, lookback, ratio)]
+            t[0] += 1
+            if not trades:
+                continue
+            entry = np.array([tr[2] for tr in trades])
+            exit_ = np.array([tr[3] for tr in trades])
+            pnl = (exit_ - entry) / entry * 100
+            t[1] += len(trades)
+            t[2] += sum(1 for tr in trades if tr[4])
+            t[3] += pnl.sum()
+            t[4] += pnl[pnl > 0].sum()
+            t[5] += -pnl[pnl < 0].sum()
+
+
+def _results_table(totals):
+    rows = []
+    for (no, lookback, ratio), (symbols, trades, wins, pnl_sum, gross_profit, gross_loss) in totals.items():
+        rows.append({
+            'no': no,
+            'stop_lookback': lookback,
+            'reward_ratio': ratio,
+            'symbols': symbols,
+            'total_trades': trades,
+            'win_rate': wins / trades * 100 if trades else 0.0,
+            'avg_return': pnl_sum / trades if trades else 0.0,
+            'total_return': pnl_sum,
+            'profit_factor': gross_profit / gross_loss if gross_loss > 0 else float('inf')
+        })
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return df.sort_values('total_return', ascending=False).reset_index(drop=True)
+
+
+def run_parameter_sweep(symbols=None, frames=None, period="2y", swing_periods=SWING_PERIODS,
+                        stop_lookbacks=STOP_LOOKBACKS, reward_ratios=REWARD_RATIOS,
+                        max_workers=None, chunk_size=100, output=None):
+    """
+    Backtests every (swing period, stop lookback, R multiple) combination over
+    the universe. Symbols are split into chunks evaluated in parallel on a process
+    pool; each chunk runs the whole grid (see sweep_chunk).
+
+    Returns a results table with one row per combination (aggregated over all
+    symbols), best total return first. If `output` is given it is also written
+    there (.parquet or .csv).
+    """
+    if frames is None:
+        frames = load_ohlcv(symbols or [], period=period)
+    frames = {s: df for s, df in frames.items() if len(df) >= 50}
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    names = list(frames)
+    chunks = [{s: frames[s] for s in names[i:i + chunk_size]} for i in range(0, len(names), chunk_size)]
+    workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+
+    if workers <= 1:
+        partials = [sweep_chunk(chunk, swing_periods, stop_lookbacks, reward_ratios) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(sweep_chunk, chunks,
+                                     itertools.repeat(swing_periods), itertools.repeat(stop_lookbacks),
+                                     itertools.repeat(reward_ratios)))
+
+    totals = partials[0]
+    for partial in partials[1:]:
+        for key, values in partial.items():
+            totals[key] = [a + b for a, b in zip(totals[key], values)]
+
+    results = _results_table(totals)
+    if output:
+        if output.endswith('.parquet'):
+            results.to_parquet(output, index=False)
+        else:
+            results.to_csv(output, index=False)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sweep TSL / stop / target parameters over many symbols')
+    parser.add_argument('--period', type=str, default='2y')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', type=str, default='sweep_results.csv')
+    args = parser.parse_args()
+
+    symbols = get_nifty100_symbols()
+    start = time.time()
+    results = run_parameter_sweep(symbols, period=args.period, max_workers=args.workers, output=args.output)
+    print(results.head(10).to_string(index=False))
+    print(f"{len(results)} combinations in {time.time() - start:.1f}s -> {args.output}")
@@ -1,17 +1,21 @@
 import pandas as pd
-import yfinance as yf
+from async_fetch import fetch_history
 from strategy import calculate_strategy_indicators
 from streamlit_lightweight_charts import renderLightweightCharts
 
-def plot_stock_chart(symbol):
+def plot_stock_chart(symbol, df=None):
     """
     Creates a TradingView-style chart using streamlit-lightweight-charts.
+    df: optional daily bars (e.g. from the dashboard's StockContext); fetched
+    (6 months) when None. It is not modified.
     Returns the chart options dictionary.
     """
     try:
         # 1. Fetch Data
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period="6mo", interval="1d")
+        if df is None:
+            df = fetch_history(symbol, period="6mo", interval="1d")
+        else:
+            df = df.copy()
         
         if df.empty:
             return None
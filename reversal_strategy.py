@@ -1,10 +1,19 @@
-import yfinance as yf
+import os
 import pandas as pd
-import pandas_ta as ta
 from stock_list import load_stock_list
-import time
+from data_store import load_ohlcv
+from incremental_indicators import IndicatorBank, STATE_DIR
 from tqdm import tqdm
 
+# Indicators are carried over between scans; each run only feeds the new bars
+REVERSAL_INDICATORS = {
+    'ema_50': ('ema', 50),  # Trend
+    'rsi': ('rsi', 14),  # Momentum
+    'vol_avg': ('volume_mean', 20),  # Volume SMA 20
+}
+REVERSAL_HISTORY = 5  # the downtrend rule looks at RSI over the previous 4 bars
+REVERSAL_STATE_FILE = os.path.join(STATE_DIR, "reversal.json")
+
 def get_reversal_candidates(limit=50):
     """
     Scans for stocks that are in a downtrend but showing signs of reversal.
@@ -18,9 +27,10 @@ def get_reversal_candidates(limit=50):
     print("--- Starting Reversal Strategy Scan ---")
     symbols = load_stock_list()
     candidates = []
+    bank = IndicatorBank.load(REVERSAL_STATE_FILE, REVERSAL_INDICATORS, history=REVERSAL_HISTORY)
     
     # Batch processing
-    chunk_size = 20
+    chunk_size = 100  # Network batching / rate limiting is adaptive inside data_store
     
     def chunk_list(lst, n):
         for i in range(0, len(lst), n):
@@ -28,28 +38,17 @@ def get_reversal_candidates(limit=50):
 
     for chunk in chunk_list(symbols, chunk_size):
         try:
-            # Download data
-            data = yf.download(chunk, period="6mo", interval="1d", group_by='ticker', threads=True, progress=False, auto_adjust=True)
+            # Load data; served from the local OHLCV cache
+            frames = load_ohlcv(chunk, period="6mo")
             
-            if data.empty:
+            if not frames:
                 continue
                 
             for symbol in chunk:
                 try:
-                    df = pd.DataFrame()
-                    if isinstance(data.columns, pd.MultiIndex):
-                        try:
-                            df = data.xs(symbol, level=0, axis=1)
-                        except KeyError:
-                            continue
-                    else:
-                        if len(chunk) == 1 and chunk[0] == symbol:
-                            df = data
-                        else:
-                            continue
-                            
-                    # Drop NaNs
-                    df = df.dropna(how='all')
+                    df = frames.get(symbol)
+                    if df is None:
+                        continue
                     
                     if len(df) < 50:
                         continue
@@ -58,24 +57,18 @@ def get_reversal_candidates(limit=50):
                     # Ensure lowercase columns
                     df.columns = [c.lower() for c in df.columns]
                     
-                    # EMA 50 (Trend)
-                    df['ema_50'] = ta.ema(df['close'], length=50)
-                    
-                    # RSI 14 (Momentum)
-                    df['rsi'] = ta.rsi(df['close'], length=14)
-                    
-                    # Volume SMA 20
-                    df['vol_avg'] = df['volume'].rolling(window=20).mean()
+                    # EMA 50, RSI 14, Volume SMA 20: incremental, only new bars are fed
+                    recent = pd.DataFrame(bank.update_frame(symbol, df), index=df.index[-REVERSAL_HISTORY:])
                     
                     # Current Candle
-                    curr = df.iloc[-1]
-                    prev = df.iloc[-2]
+                    curr = pd.concat([df.iloc[-1], recent.iloc[-1]])
+                    prev = pd.concat([df.iloc[-2], recent.iloc[-2]])
                     
                     # --- LOGIC ---
                     
                     # 1. Downtrend Context
                     # Price below 50 EMA OR RSI was oversold recently
-                    is_downtrend = (curr['close'] < curr['ema_50']) or (df['rsi'].iloc[-5:-1].min() < 40)
+                    is_downtrend = (curr['close'] < curr['ema_50']) or (recent['rsi'].iloc[-5:-1].min() < 40)
                     
                     if not is_downtrend:
                         continue
@@ -128,11 +121,13 @@ def get_reversal_candidates(limit=50):
                 except Exception:
                     continue
             
-            # Rate limit
-            time.sleep(1)
-            
         except Exception:
-            time.sleep(1)
+            continue
+    
+    try:
+        bank.save(REVERSAL_STATE_FILE)
+    except Exception as e:
+        print(f"Could not save indicator state: {e}")
             
     # Sort by Score (High to Low)
     df_results = pd.DataFrame(candidates)
@@ -1,22 +1,23 @@
-import yfinance as yf
 import pandas_ta as ta
-import pandas as pd
 from stock_list import load_stock_list
-from strategy import check_buy_signal, check_sell_signal, check_golden_crossover_buy, check_golden_crossover_sell
-from database import add_signal, remove_signal
+from strategy import calculate_strategy_indicators, add_strategy_indicators, extract_crossover_events
+from database import add_signal, remove_signal, add_signals_bulk, remove_signals_bulk, transaction
 from analysis import get_technical_analysis
-import time
+from data_store import load_ohlcv
 from datetime import datetime
 import argparse
+import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from tqdm import tqdm
-import pandas_ta as ta
 
-def process_stock_data(symbol, df_daily, strategy_type='all'):
+def evaluate_stock_data(symbol, df_daily, strategy_type='all'):
     """
-    Processes a single stock's dataframe for signals.
+    Evaluates a single stock's dataframe for signals without touching the database,
+    so it can run in a worker process.
     df_daily: DataFrame with daily data (Open, High, Low, Close, Volume)
+    Returns None, or {'remove': bool, 'signal': dict | None} describing what the
+    parent should write (see save_signal_result).
     """
     try:
         if df_daily.empty or len(df_daily) < 20:
@@ -25,49 +26,37 @@ def process_stock_data(symbol, df_daily, strategy_type='all'):
         # Clean column names (ensure lowercase)
         df_daily.columns = [c.lower() for c in df_daily.columns]
         
-        # 2. Apply Strategy
-        from strategy import calculate_strategy_indicators
-        df_daily = calculate_strategy_indicators(df_daily)
+        # 2. Apply Strategy (skipped when the panel engine already added the columns)
+        if 'tsl' not in df_daily.columns:
+            df_daily = calculate_strategy_indicators(df_daily)
         
         # 3. Scan Last 10 Days for Signals
-        last_signal = None  # 'BUY' or 'SELL'
-        signal_details = {}
-        golden_signal = None  # 'BUY' or 'SELL'
+        # Crossover masks are built once per frame; only the last event of each type matters
+        events = extract_crossover_events(
+            df_daily,
+            lookback=10,
+            tsl=strategy_type in ['all', 'standard', 'sniper'],
+            golden=strategy_type in ['all', 'golden']
+        )
         
-        days_to_scan = 10
-        if len(df_daily) < days_to_scan + 2:
-            days_to_scan = len(df_daily) - 2
+        last_signal = events['tsl_signal']  # 'BUY' or 'SELL'
+        signal_details = {}
+        golden_signal = events['golden_signal']  # 'BUY' or 'SELL'
         
-        for i in range(len(df_daily) - days_to_scan, len(df_daily)):
-            curr = df_daily.iloc[i]
-            prev = df_daily.iloc[i - 1]
-            
-            # Sniper / Standard Strategy Checks (TSL)
-            if strategy_type in ['all', 'standard', 'sniper']:
-                # Buy Crossover
-                if (prev['close'] < prev['tsl']) and (curr['close'] > curr['tsl']):
-                    last_signal = 'BUY'
-                    signal_details = {
-                        'price': curr['close'],
-                        'date': curr.name.strftime('%Y-%m-%d'),
-                        'tsl': curr['tsl']
-                    }
-                # Sell Crossunder
-                elif (prev['close'] > prev['tsl']) and (curr['close'] < curr['tsl']):
-                    last_signal = 'SELL'
-            
-            # Golden Crossover detection
-            if strategy_type in ['all', 'golden']:
-                if check_golden_crossover_buy(df_daily):
-                    golden_signal = 'BUY'
-                elif check_golden_crossover_sell(df_daily):
-                    golden_signal = 'SELL'
+        if last_signal == 'BUY':
+            curr = df_daily.iloc[events['tsl_pos']]
+            signal_details = {
+                'price': curr['close'],
+                'date': curr.name.strftime('%Y-%m-%d'),
+                'tsl': curr['tsl']
+            }
         
         # 4. Action based on Signals
+        result = {'remove': False, 'signal': None}
         
         # --- Handle TSL / Sniper / Standard Signals ---
         if last_signal == 'SELL':
-            remove_signal(symbol)
+            result['remove'] = True
             
         elif last_signal == 'BUY':
             price = signal_details['price']
@@ -84,7 +73,8 @@ def process_stock_data(symbol, df_daily, strategy_type='all'):
             strength = "Standard"
             try:
                 ema_200 = ta.ema(df_daily['close'], length=200).iloc[-1]
-                rsi = ta.rsi(df_daily['close'], length=14).iloc[-1]
+                # RSI-14 already computed by the analysis kernel
+                rsi = tech_data['rsi'] if tech_data else ta.rsi(df_daily['close'], length=14).iloc[-1]
                 vol_avg = df_daily['volume'].rolling(window=20).mean().iloc[-1]
                 vol_curr = df_daily['volume'].iloc[-1]
                 
@@ -97,11 +87,7 @@ def process_stock_data(symbol, df_daily, strategy_type='all'):
             if strategy_type == 'sniper' and strength != 'Sniper':
                 return None
             
-            # Save to DB (add_signal handles duplicates, so safe to call again)
-            add_signal(symbol, price, date, trend_pred, timestamp=timestamp, signal_strength=strength)
-            print(f"✅ FOUND SIGNAL: {symbol} ({strength}) at {price}")
-            
-            return {
+            result['signal'] = {
                 'Symbol': symbol,
                 'Price': price,
                 'Date': date,
@@ -109,6 +95,7 @@ def process_stock_data(symbol, df_daily, strategy_type='all'):
                 'Timestamp': timestamp,
                 'Strength': strength
             }
+            return result
 
         # --- Handle Golden Crossover Signals ---
         if golden_signal == 'BUY':
@@ -118,38 +105,120 @@ def process_stock_data(symbol, df_daily, strategy_type='all'):
             if last_signal != 'BUY': 
                  tech_data = get_technical_analysis(symbol, df=df_daily)
                  trend_pred = tech_data['prediction'] if tech_data else "Neutral"
-                 add_signal(symbol, price, date, trend_pred, signal_strength="Golden Crossover")
-                 print(f"🏅 FOUND GOLDEN CROSSOVER: {symbol} at {price}")
                  
-                 return {
+                 result['signal'] = {
                     'Symbol': symbol,
                     'Price': price,
                     'Date': date,
                     'Trend': trend_pred,
                     'Strength': "Golden Crossover"
                  }
+        
+        if result['remove'] or result['signal']:
+            return result
             
     except Exception as e:
         # print(f"Error processing {symbol}: {e}")
         return None
     return None
 
+def save_signal_result(symbol, result):
+    """
+    Applies an evaluate_stock_data result to the database.
+    Returns the signal dict if a new signal was saved, else None.
+    """
+    if not result:
+        return None
+        
+    if result['remove']:
+        remove_signal(symbol)
+        
+    signal = result['signal']
+    if not signal:
+        return None
+        
+    # Save to DB (add_signal handles duplicates, so safe to call again)
+    if signal['Strength'] == "Golden Crossover":
+        add_signal(symbol, signal['Price'], signal['Date'], signal['Trend'], signal_strength="Golden Crossover")
+        print(f"🏅 FOUND GOLDEN CROSSOVER: {symbol} at {signal['Price']}")
+    else:
+        add_signal(symbol, signal['Price'], signal['Date'], signal['Trend'],
+                   timestamp=signal['Timestamp'], signal_strength=signal['Strength'])
+        print(f"✅ FOUND SIGNAL: {symbol} ({signal['Strength']}) at {signal['Price']}")
+    return signal
+
+def process_stock_data(symbol, df_daily, strategy_type='all'):
+    """
+    Processes a single stock's dataframe for signals and saves them.
+    df_daily: DataFrame with daily data (Open, High, Low, Close, Volume)
+    """
+    return save_signal_result(symbol, evaluate_stock_data(symbol, df_daily, strategy_type))
+
+def save_signal_results(results):
+    """
+    Bulk version of save_signal_result for a whole chunk of [(symbol, result), ...]:
+    all removals and inserts are flushed in a single transaction.
+    Returns the list of signal dicts that were saved.
+    """
+    removals = []
+    additions = []
+    saved = []
+    for symbol, result in results:
+        if not result:
+            continue
+        if result['remove']:
+            removals.append(symbol)
+        signal = result['signal']
+        if not signal:
+            continue
+        additions.append({
+            'symbol': symbol,
+            'price': signal['Price'],
+            'signal_date': signal['Date'],
+            'trend_prediction': signal['Trend'],
+            'timestamp': signal.get('Timestamp'),
+            'signal_strength': signal['Strength']
+        })
+        saved.append(signal)
+        
+    with transaction():
+        remove_signals_bulk(removals)
+        add_signals_bulk(additions)
+        
+    for signal in saved:
+        if signal['Strength'] == "Golden Crossover":
+            print(f"🏅 FOUND GOLDEN CROSSOVER: {signal['Symbol']} at {signal['Price']}")
+        else:
+            print(f"✅ FOUND SIGNAL: {signal['Symbol']} ({signal['Strength']}) at {signal['Price']}")
+    return saved
+
+def evaluate_chunk(frames, strategy_type='all'):
+    """
+    Worker entry point: indicators for a whole chunk in one panel pass, then
+    per-symbol signal evaluation. Returns [(symbol, result), ...].
+    """
+    frames = add_strategy_indicators(frames)
+    return [(symbol, evaluate_stock_data(symbol, df, strategy_type)) for symbol, df in frames.items()]
+
 def chunk_list(lst, n):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
-def scan_stocks(strategy_type='all'):
+def scan_stocks(strategy_type='all', max_workers=None):
     print(f"--- Starting Algo Scanner ({strategy_type.upper()}) ---")
     
     # 1. Load Stock List
     symbols = load_stock_list()
     print(f"Loaded {len(symbols)} stocks to scan.")
     
-    # 2. Batch Download and Process
-    # Reduced chunk size to avoid Rate Limiting
-    chunk_size = 20
-    print(f"Scanning in batches of {chunk_size}...")
+    # 2. Pipelined Download and Process
+    # The download of chunk N+1 runs on a background thread while chunk N is
+    # evaluated on the process pool. Only this (parent) process writes to the DB.
+    chunk_size = 100  # Network batching / rate limiting is adaptive inside data_store
+    workers = max_workers or os.cpu_count() or 1
+    chunks = list(chunk_list(symbols, chunk_size))
+    print(f"Scanning in batches of {chunk_size} on {workers} workers...")
     
     total_processed = 0
     signals_found_count = 0
@@ -157,59 +226,45 @@ def scan_stocks(strategy_type='all'):
     # Create a progress bar
     pbar = tqdm(total=len(symbols), unit="stock")
     
-    for chunk in chunk_list(symbols, chunk_size):
+    def collect(future, n_symbols):
+        nonlocal total_processed, signals_found_count
         try:
-            # Download batch
-            # group_by='ticker' ensures we get a hierarchical index (Ticker -> OHLC)
-            # threads=True uses yfinance's internal threading for download
-            # auto_adjust=True to fix warning and ensure we get adjusted close
-            data = yf.download(chunk, period="1y", interval="1d", group_by='ticker', threads=True, progress=False, auto_adjust=True)
-            
-            if data.empty:
-                pbar.update(len(chunk))
-                time.sleep(1) # Wait a bit even on failure
-                continue
-                
-            # Process each symbol in the chunk
-            for symbol in chunk:
-                try:
-                    df_sym = pd.DataFrame()
-                    
-                    if isinstance(data.columns, pd.MultiIndex):
-                        # Extract data for this symbol
-                        try:
-                            df_sym = data.xs(symbol, level=0, axis=1)
-                        except KeyError:
-                            # Symbol might have failed to download
-                            continue
-                    else:
-                        # If only one symbol was downloaded and it's not MultiIndex
-                        if len(chunk) == 1 and chunk[0] == symbol:
-                            df_sym = data
-                        else:
-                            continue
-                    
-                    # Drop rows with all NaNs
-                    df_sym = df_sym.dropna(how='all')
-                    
-                    if not df_sym.empty:
-                        signal = process_stock_data(symbol, df_sym, strategy_type)
-                        if signal:
-                            signals_found_count += 1
-                        
-                except Exception as e:
-                    pass
+            results = future.result()
+        except Exception as e:
+            print(f"Chunk processing error: {e}")
+            pbar.update(n_symbols)
+            return
+        # One commit per chunk
+        signals_found_count += len(save_signal_results(results))
+        total_processed += len(results)
+        pbar.update(len(results))
+    
+    with ThreadPoolExecutor(max_workers=1) as downloader, ProcessPoolExecutor(max_workers=workers) as pool:
+        # Served from the local OHLCV cache; only missing bars hit the network
+        next_download = downloader.submit(load_ohlcv, chunks[0], period="1y") if chunks else None
+        pending = {}
+        
+        for i, chunk in enumerate(chunks):
+            try:
+                frames = next_download.result()
+            except Exception as e:
+                print(f"Batch download error: {e}")
+                frames = {}
                 
-                total_processed += 1
-                pbar.update(1)
+            if i + 1 < len(chunks):
+                next_download = downloader.submit(load_ohlcv, chunks[i + 1], period="1y")
             
-            # Sleep to avoid Rate Limiting
-            time.sleep(2)
-                
-        except Exception as e:
-            print(f"Batch download error: {e}")
-            pbar.update(len(chunk))
-            time.sleep(5) # Longer wait on error
+            # Symbols that failed to download are done already
+            pbar.update(len(chunk) - len(frames))
+            if frames:
+                pending[pool.submit(evaluate_chunk, frames, strategy_type)] = len(frames)
+            
+            # Flush finished chunks so signals reach the DB while the scan runs
+            for future in [f for f in pending if f.done()]:
+                collect(future, pending.pop(future))
+        
+        for future in as_completed(list(pending)):
+            collect(future, pending.pop(future))
             
     pbar.close()
 
@@ -225,6 +280,8 @@ if __name__ == "__main__":
     parser.add_argument('--strategy', type=str, default='all', 
                         choices=['all', 'standard', 'sniper', 'golden'],
                         help='Strategy to scan for: all, standard, sniper, or golden')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes used to evaluate signals (default: number of cores)')
     
     args = parser.parse_args()
-    scan_stocks(strategy_type=args.strategy)
+    scan_stocks(strategy_type=args.strategy, max_workers=args.workers)
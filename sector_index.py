@@ -0,0 +1,102 @@
+import os
+import threading
+import pandas as pd
+
+# The mapping ships next to the code, so lookups don't depend on the working directory
+SECTOR_MAPPING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sector_mapping.csv")
+
+
+class SectorIndex:
+    """
+    In-memory index of sector_mapping.csv (columns: symbol, sector).
+
+    - symbol -> sector hash map for O(1) lookups, single or bulk (sectors_for)
+    - sector -> members reverse index for sector-level aggregation
+    - reloads itself when the CSV's modification time changes, so edits to the
+      mapping are picked up by long-running processes (dashboard, auto trader)
+
+    A missing file behaves like an empty mapping. A file that cannot be read
+    (half written, locked) keeps the last good mapping and is retried on the
+    next lookup.
+    """
+
+    def __init__(self, path=SECTOR_MAPPING_FILE, default="Unknown"):
+        self.path = path
+        self.default = default
+        self._mtime = None
+        self._failed_mtime = None  # last mtime that failed to load, to log it once
+        self._symbols = []
+        self._by_symbol = {}
+        self._members = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Re-reads the CSV if it changed since the last load."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            symbols, by_symbol, members = [], {}, {}
+            if mtime is not None:
+                try:
+                    df = pd.read_csv(self.path)
+                    for symbol, sector in zip(df['symbol'], df['sector']):
+                        # First row wins, like the old DataFrame lookup
+                        if symbol in by_symbol:
+                            continue
+                        symbols.append(symbol)
+                        by_symbol[symbol] = sector
+                        members.setdefault(sector, []).append(symbol)
+                except Exception as e:
+                    # Keep serving the last good mapping; _mtime is left as is so
+                    # the next lookup tries again
+                    if mtime != self._failed_mtime:
+                        print(f"Error loading sector mapping {self.path}: {e}")
+                        self._failed_mtime = mtime
+                    return
+            # Swap in one go so readers never see a half-built index
+            self._symbols, self._by_symbol, self._members = symbols, by_symbol, members
+            self._mtime = mtime
+
+    def sector_of(self, symbol):
+        """Sector of one symbol, or the default ("Unknown")."""
+        self._refresh()
+        return self._by_symbol.get(symbol, self.default)
+
+    def sectors_for(self, symbols):
+        """Bulk lookup: {symbol: sector} for every symbol given (default if unmapped)."""
+        self._refresh()
+        by_symbol = self._by_symbol
+        return {symbol: by_symbol.get(symbol, self.default) for symbol in symbols}
+
+    def members(self, sector):
+        """Symbols mapped to `sector`, in file order."""
+        self._refresh()
+        return list(self._members.get(sector, []))
+
+    def sectors(self):
+        """All sectors, in order of first appearance."""
+        self._refresh()
+        return list(self._members)
+
+    def symbols(self):
+        """All mapped symbols, in file order."""
+        self._refresh()
+        return list(self._symbols)
+
+
+_index = None
+
+
+def get_sector_index():
+    """Process-wide index for the default sector_mapping.csv."""
+    global _index
+    if _index is None:
+        _index = SectorIndex()
+    return _index
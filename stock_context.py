@@ -0,0 +1,87 @@
+from data_store import load_ohlcv, trim_period
+from async_fetch import submit_news
+from analysis import get_technical_analysis, get_stock_news_sentiment
+from backtester import run_backtest
+from plotting import plot_stock_chart
+from forecasting import get_ai_price_prediction
+
+# Longest window any consumer of the detail view needs (forecast training)
+CONTEXT_PERIOD = "2y"
+
+
+class StockContext:
+    """
+    Data for one render of the dashboard's stock detail view.
+
+    Daily bars for the longest window (CONTEXT_PERIOD) are loaded once, lazily,
+    from the OHLCV cache. Each consumer gets a copy of the slice it used to fetch
+    itself: technical analysis and the chart 6 months, the backtest 1 year, and the
+    forecast 2 years. Results are memoized, so the watchlist button and the
+    analysis panel share one get_technical_analysis call.
+
+    The news request is started just before the history load, so it runs on the
+    fetch loop while the history is read (or downloaded).
+    """
+
+    def __init__(self, symbol, period=CONTEXT_PERIOD):
+        self.symbol = symbol
+        self.period = period
+        self._daily = None
+        self._loaded = False
+        self._news = None
+        self._results = {}
+
+    def _start_news(self):
+        if self._news is None:
+            self._news = submit_news(self.symbol)
+        return self._news
+
+    @property
+    def daily(self):
+        if not self._loaded:
+            self._start_news()
+            self._daily = load_ohlcv([self.symbol], period=self.period).get(self.symbol)
+            self._loaded = True
+        return self._daily
+
+    def window(self, period):
+        """Copy of the last `period` of daily bars (same slicing as load_ohlcv), or None."""
+        if self.daily is None:
+            return None
+        return trim_period(self.daily, period)
+
+    def _memo(self, key, fn):
+        if key not in self._results:
+            self._results[key] = fn()
+        return self._results[key]
+
+    def _with_window(self, period, fn):
+        """fn(df) on the `period` slice, or None when the symbol has no data."""
+        df = self.window(period)
+        return fn(df) if df is not None else None
+
+    def technical(self):
+        return self._memo('technical', lambda: self._with_window(
+            "6mo", lambda df: get_technical_analysis(self.symbol, df=df)))
+
+    def chart(self):
+        return self._memo('chart', lambda: self._with_window(
+            "6mo", lambda df: plot_stock_chart(self.symbol, df=df)))
+
+    def prediction(self):
+        return self._memo('prediction', lambda: self._with_window(
+            "2y", lambda df: get_ai_price_prediction(self.symbol, df=df)))
+
+    def backtest(self, period="1y"):
+        return self._memo(('backtest', period), lambda: self._with_window(
+            period, lambda df: run_backtest(self.symbol, period=period, df=df)))
+
+    def _news_items(self):
+        try:
+            return self._start_news().result()
+        except Exception as e:
+            print(f"Error fetching news for {self.symbol}: {e}")
+            return []
+
+    def sentiment(self):
+        return self._memo('sentiment', lambda: get_stock_news_sentiment(self.symbol, news=self._news_items()))
@@ -1,18 +1,16 @@
-import pandas_ta as ta
 import pandas as pd
 import numpy as np
+from trading_calendar import calendar_groups
 
-def calculate_strategy_indicators(df):
+def calculate_strategy_indicators(df, no=3):
     """
     Calculates the strategy indicators (res, sup, avn, tsl) for the entire DataFrame.
+    no: swing period (bars) for the highest high / lowest low.
     Returns the DataFrame with these new columns.
     """
     if df is None or df.empty or len(df) < 20:
         return df
 
-    # --- STRATEGY PARAMETERS ---
-    no = 3  # Swing period
-
     # --- CALCULATION ---
     # 1. Calculate Highest High and Lowest Low over 'no' periods
     df['res'] = df['high'].rolling(window=no).max()
@@ -51,6 +49,88 @@ def calculate_strategy_indicators(df):
 
     return df
 
+def panel_indicator_arrays(high, low, close, no=3):
+    """
+    Core of the panel engine. Returns 2-D arrays (dates x symbols) for
+    res, sup, avn and tsl plus the mask of rows that hold a close.
+    """
+    # 1. Highest High and Lowest Low over 'no' periods
+    res = high.rolling(window=no).max()
+    sup = low.rolling(window=no).min()
+
+    # 2. Trend State (avd -> avn) and TSL, same rules as the single-symbol version
+    prev_res = res.shift(1).to_numpy()
+    prev_sup = sup.shift(1).to_numpy()
+    c = close.to_numpy(dtype=float)
+
+    avd_raw = np.where(c > prev_res, 1.0, np.where(c < prev_sup, -1.0, np.nan))
+    avn = pd.DataFrame(avd_raw).ffill().fillna(0).to_numpy().astype(int)
+    tsl = np.where(avn == 1, prev_sup, prev_res)
+
+    arrays = {'res': res.to_numpy(), 'sup': sup.to_numpy(), 'avn': avn, 'tsl': tsl}
+    return arrays, ~np.isnan(c)
+
+
+def _grouped_indicator_arrays(frames, no=3):
+    """
+    Runs panel_indicator_arrays once per calendar group of {symbol: frame with
+    high/low/close} (see trading_calendar.calendar_groups), so every symbol's rolling
+    windows only span its own bars. Yields (group, arrays); column j of each
+    array belongs to the j-th symbol of the group.
+    """
+    for group in calendar_groups(frames):
+        panels = {col: pd.concat({sym: df[col] for sym, df in group.items()}, axis=1)
+                  for col in ('high', 'low', 'close')}
+        arrays, _ = panel_indicator_arrays(panels['high'], panels['low'], panels['close'], no=no)
+        yield group, arrays
+
+
+def calculate_strategy_indicators_panel(high, low, close, no=3):
+    """
+    Panel version of calculate_strategy_indicators for many symbols at once.
+    high, low, close: wide DataFrames (dates x symbols) sharing index and columns,
+    possibly ragged (listings, missing days). Each symbol is taken on the dates
+    where it has a close and symbols sharing those dates are computed together
+    with 2-D rolling max/min and a column-wise forward fill.
+
+    Returns {symbol: DataFrame[res, sup, avn, tsl]} indexed on the dates where that
+    symbol has a close, identical to the single-symbol version. Symbols with fewer
+    than 20 bars are skipped, like the single-symbol version.
+    """
+    frames = {}
+    for symbol in close.columns:
+        rows = close[symbol].notna()
+        if rows.sum() < 20:
+            continue
+        frames[symbol] = pd.DataFrame(
+            {'high': high.loc[rows, symbol], 'low': low.loc[rows, symbol], 'close': close.loc[rows, symbol]})
+
+    results = {}
+    for group, arrays in _grouped_indicator_arrays(frames, no=no):
+        index = next(iter(group.values())).index
+        for j, symbol in enumerate(group):
+            results[symbol] = pd.DataFrame({name: values[:, j] for name, values in arrays.items()}, index=index)
+    return {symbol: results[symbol] for symbol in frames}
+
+
+def add_strategy_indicators(frames, no=3):
+    """
+    Adds res/sup/avn/tsl to every frame of a {symbol: OHLCV DataFrame} dict using the
+    panel engine, one pass per calendar group. Returns a new dict; symbols with too
+    little data are returned unchanged, matching calculate_strategy_indicators.
+    """
+    eligible = {sym: df for sym, df in frames.items() if len(df) >= 20}
+
+    out = {}
+    for group, arrays in _grouped_indicator_arrays(eligible, no=no):
+        for j, (sym, df) in enumerate(group.items()):
+            # One frame construction per symbol instead of a column insert per indicator
+            columns = {col: df[col].to_numpy() for col in df.columns}
+            columns.update({name: values[:, j] for name, values in arrays.items()})
+            out[sym] = pd.DataFrame(columns, index=df.index)
+    return {sym: out.get(sym, df) for sym, df in frames.items()}
+
+
 def check_buy_signal(df):
     """
     Analyzes the DataFrame and returns True if a Buy signal is detected.
@@ -98,33 +178,114 @@ def check_sell_signal(df):
     return False
 
 
+def ema_panel(close, length):
+    """
+    pandas_ta compatible EMA (seeded with the SMA of the first `length` values)
+    for a 1-D or 2-D (dates x symbols) array. Each column is seeded from its own
+    first `length` valid values, so symbols with a later listing date line up.
+    Returns a float ndarray of the same shape.
+    """
+    arr = np.array(close, dtype=float)
+    squeeze = arr.ndim == 1
+    if squeeze:
+        arr = arr[:, None]
+    if len(arr) == 0:
+        return arr[:, 0] if squeeze else arr
+
+    valid = ~np.isnan(arr)
+    counts = np.cumsum(valid, axis=0)
+    has_seed = counts[-1] >= length
+
+    # Row where each column collects its first `length` valid values, and their mean
+    seed_row = np.argmax(counts >= length, axis=0)
+    seed = np.where(valid & (counts <= length), arr, 0.0).sum(axis=0) / length
+
+    rows = np.arange(len(arr))[:, None]
+    arr[(rows < seed_row) | ~has_seed] = np.nan
+    cols = np.flatnonzero(has_seed)
+    arr[seed_row[cols], cols] = seed[cols]
+
+    ema = pd.DataFrame(arr).ewm(span=length, adjust=False).mean().to_numpy()
+    return ema[:, 0] if squeeze else ema
+
+
+def rsi_panel(close, length=14):
+    """
+    pandas_ta compatible RSI (Wilder's RMA of gains and losses) for a Series or a
+    (dates x symbols) DataFrame; every column is computed independently.
+    """
+    change = close.diff()
+    gain = change.clip(lower=0)
+    loss = change.clip(upper=0).abs()
+    avg_gain = gain.ewm(alpha=1.0 / length, min_periods=length).mean()
+    avg_loss = loss.ewm(alpha=1.0 / length, min_periods=length).mean()
+    return 100 * avg_gain / (avg_gain + avg_loss)
+
+
+def atr_panel(high, low, close, length=14):
+    """
+    pandas_ta compatible ATR (Wilder's RMA of the true range) for Series or
+    (dates x symbols) DataFrames. A symbol's first bar has no true range.
+    """
+    prev_close = close.shift(1)
+    ranges = [high - low, (high - prev_close).abs(), (low - prev_close).abs()]
+    true_range = ranges[0]
+    for r in ranges[1:]:
+        true_range = true_range.where(true_range >= r, r)
+    true_range = true_range.where(prev_close.notna())
+    return true_range.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def crossover_signals(fast, slow):
+    """
+    Sign-change detector for (fast - slow) on 1-D or 2-D arrays.
+    Returns an int8 array: 1 where fast crosses above slow, -1 where it crosses
+    below, 0 otherwise (including the first row and any NaN neighbourhood).
+    """
+    diff = np.asarray(fast, dtype=float) - np.asarray(slow, dtype=float)
+    signals = np.zeros(diff.shape, dtype=np.int8)
+    prev, curr = diff[:-1], diff[1:]
+    # NaN compares False, so incomplete EMAs never produce a signal
+    signals[1:][(prev <= 0) & (curr > 0)] = 1
+    signals[1:][(prev >= 0) & (curr < 0)] = -1
+    return signals
+
+
 def calculate_golden_crossover(df, short_period=9, long_period=21):
     """
     Calculate short and long EMA and generate a 'gc_signal' column:
     - 'Buy' when short EMA crosses above long EMA
     - 'Sell' when short EMA crosses below long EMA
     - 'None' otherwise
+    Works on any index (positional, not label based).
     """
     if df is None or df.empty or len(df) < long_period:
         return df
-    # Calculate EMAs using pandas_ta
-    df['ema_short'] = ta.ema(df['close'], length=short_period)
-    df['ema_long'] = ta.ema(df['close'], length=long_period)
-    df['gc_signal'] = 'None'
-    for i in range(1, len(df)):
-        prev_short = df.at[i-1, 'ema_short']
-        prev_long = df.at[i-1, 'ema_long']
-        cur_short = df.at[i, 'ema_short']
-        cur_long = df.at[i, 'ema_long']
-        if pd.isna(prev_short) or pd.isna(prev_long) or pd.isna(cur_short) or pd.isna(cur_long):
-            continue
-        if prev_short <= prev_long and cur_short > cur_long:
-            df.at[i, 'gc_signal'] = 'Buy'
-        elif prev_short >= prev_long and cur_short < cur_long:
-            df.at[i, 'gc_signal'] = 'Sell'
+    close = df['close'].to_numpy(dtype=float)
+    df['ema_short'] = ema_panel(close, short_period)
+    df['ema_long'] = ema_panel(close, long_period)
+    signals = crossover_signals(df['ema_short'].to_numpy(), df['ema_long'].to_numpy())
+    df['gc_signal'] = np.select([signals == 1, signals == -1], ['Buy', 'Sell'], default='None')
     return df
 
 
+def calculate_golden_crossover_panel(close, short_period=9, long_period=21):
+    """
+    Golden crossover for many symbols at once.
+    close: wide DataFrame (dates x symbols) or 2-D ndarray of closing prices.
+    Returns the same shape of int8 signals (1 = Buy, -1 = Sell, 0 = None),
+    as a DataFrame when a DataFrame was passed in.
+    """
+    values = close.to_numpy(dtype=float) if isinstance(close, pd.DataFrame) else np.asarray(close, dtype=float)
+    if len(values) < long_period:
+        signals = np.zeros(values.shape, dtype=np.int8)
+    else:
+        signals = crossover_signals(ema_panel(values, short_period), ema_panel(values, long_period))
+    if isinstance(close, pd.DataFrame):
+        return pd.DataFrame(signals, index=close.index, columns=close.columns)
+    return signals
+
+
 def check_golden_crossover_buy(df):
     """Return True if the latest row has a Golden Crossover Buy signal."""
     if df is None or df.empty:
@@ -141,3 +302,51 @@ def check_golden_crossover_sell(df):
     df = calculate_golden_crossover(df)
     latest = df.iloc[-1]
     return latest.get('gc_signal') == 'Sell'
+
+
+def _last_event(buy_mask, sell_mask, start):
+    """
+    Returns ('BUY' | 'SELL' | None, position) for the latest True entry of either
+    mask at or after positional index `start`.
+    """
+    events = (buy_mask | sell_mask)[start:]
+    if not events.any():
+        return None, None
+    pos = start + len(events) - 1 - int(np.argmax(events[::-1]))
+    return ('BUY' if buy_mask[pos] else 'SELL'), pos
+
+
+def extract_crossover_events(df, lookback=10, tsl=True, golden=True, short_period=9, long_period=21):
+    """
+    Vectorized signal extraction for the scanner.
+    Builds the TSL crossover/crossunder masks and the EMA short/long crossover masks
+    once for the whole frame and returns the last event of each type within the
+    final `lookback` bars:
+        {'tsl_signal': 'BUY'|'SELL'|None, 'tsl_pos': int|None,
+         'golden_signal': 'BUY'|'SELL'|None, 'golden_pos': int|None}
+    Positions are positional (iloc) indices into df. Expects 'tsl' to be present
+    when tsl=True (see calculate_strategy_indicators).
+    """
+    result = {'tsl_signal': None, 'tsl_pos': None, 'golden_signal': None, 'golden_pos': None}
+    n = len(df)
+    if n < 2:
+        return result
+
+    # First bar that may carry an event (needs a previous bar)
+    start = max(1, n - lookback)
+    close = df['close'].to_numpy(dtype=float)
+
+    if tsl:
+        line = df['tsl'].to_numpy(dtype=float)
+        prev_close, curr_close = close[:-1], close[1:]
+        prev_tsl, curr_tsl = line[:-1], line[1:]
+        # NaN comparisons are False, matching the row-by-row checks
+        buy = np.concatenate(([False], (prev_close < prev_tsl) & (curr_close > curr_tsl)))
+        sell = np.concatenate(([False], (prev_close > prev_tsl) & (curr_close < curr_tsl)))
+        result['tsl_signal'], result['tsl_pos'] = _last_event(buy, sell, start)
+
+    if golden and n >= long_period:
+        signals = crossover_signals(ema_panel(close, short_period), ema_panel(close, long_period))
+        result['golden_signal'], result['golden_pos'] = _last_event(signals == 1, signals == -1, start)
+
+    return result
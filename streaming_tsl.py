@@ -0,0 +1,108 @@
+import math
+from strategy import calculate_strategy_indicators
+
+NAN = float('nan')
+
+
+class StreamingTSL:
+    """
+    Incremental version of calculate_strategy_indicators for one symbol.
+
+    Keeps only the last `no` highs and lows (ring buffers), the current res/sup,
+    avn, TSL and close, so each new bar costs O(no) regardless of history length.
+    __slots__ keep an instance at a few hundred bytes, so thousands of symbols
+    fit comfortably in memory.
+
+    update() commits a completed bar; update_provisional() evaluates the bar that
+    is still forming (live quote) without changing the state, so it can be called
+    every cycle until the bar closes. Both return (tsl, event) where event is
+    'BUY' (close crosses above the TSL), 'SELL' (crosses below) or None, the same
+    events extract_crossover_events finds in the batch columns.
+    """
+
+    __slots__ = ('no', 'highs', 'lows', 'pos', 'count', 'res', 'sup', 'avn', 'tsl', 'close')
+
+    def __init__(self, no=3):
+        self.no = no
+        self.highs = [NAN] * no
+        self.lows = [NAN] * no
+        self.pos = 0  # next ring buffer slot
+        self.count = 0  # bars seen
+        self.res = NAN
+        self.sup = NAN
+        self.avn = 0
+        self.tsl = NAN
+        self.close = NAN
+
+    def _step(self, close):
+        """avn and TSL of a bar closing at `close`, given the committed history."""
+        # NaN comparisons are False, like np.select in the batch version
+        if close > self.res:
+            avn = 1
+        elif close < self.sup:
+            avn = -1
+        else:
+            avn = self.avn
+        tsl = self.sup if avn == 1 else self.res
+        if self.close < self.tsl and close > tsl:
+            event = 'BUY'
+        elif self.close > self.tsl and close < tsl:
+            event = 'SELL'
+        else:
+            event = None
+        return avn, tsl, event
+
+    def update_provisional(self, high, low, close):
+        """TSL and crossover of a still-forming bar; the state is left untouched."""
+        avn, tsl, event = self._step(close)
+        return tsl, event
+
+    def update(self, high, low, close):
+        """Commits a completed bar."""
+        self.avn, self.tsl, event = self._step(close)
+        self.close = close
+
+        self.highs[self.pos] = high
+        self.lows[self.pos] = low
+        self.pos = (self.pos + 1) % self.no
+        self.count += 1
+        if self.count >= self.no:
+            self.res = max(self.highs)
+            self.sup = min(self.lows)
+        return self.tsl, event
+
+    @property
+    def armed(self):
+        """True if the last close is below the TSL, i.e. the next bar can give a BUY."""
+        return self.close < self.tsl
+
+    @classmethod
+    def from_frame(cls, df, no=3):
+        """
+        State after the last bar of `df` (lowercase OHLC). The batch engine computes
+        the trend state once; only the tail is copied, so warm-up is cheap.
+        Frames that already carry 'avn'/'tsl' (for this `no`) are used as they are.
+        """
+        if 'tsl' not in df.columns:
+            df = calculate_strategy_indicators(df.copy(), no=no)
+        state = cls(no)
+        n = len(df)
+        if 'tsl' not in df.columns:
+            # Too short for the batch engine (< 20 bars): replay it bar by bar
+            for high, low, close in zip(df['high'], df['low'], df['close']):
+                state.update(high, low, close)
+            return state
+        tail = df.iloc[-no:]
+        k = len(tail)
+        state.highs[:k] = tail['high'].tolist()
+        state.lows[:k] = tail['low'].tolist()
+        state.pos = k % no
+        state.count = n
+        if n >= no:
+            state.res = max(state.highs)
+            state.sup = min(state.lows)
+        last = df.iloc[-1]
+        state.avn = int(last['avn']) if 'avn' in df.columns and not math.isnan(last['avn']) else 0
+        state.tsl = float(last['tsl'])
+        state.close = float(last['close'])
+        return state
@@ -1,8 +1,7 @@
-import yfinance as yf
-import pandas as pd
 from stock_list import load_stock_list
 from swing_strategy import check_breakout_swing, check_pullback_trend, check_volume_pocket
 from database import add_swing_signal
+from data_store import load_ohlcv
 import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
@@ -61,54 +60,34 @@ def scan_swing_stocks(strategy_type='all'):
     print(f"Loaded {len(symbols)} stocks to scan.")
     
     # Batch Download
-    chunk_size = 20
+    chunk_size = 100  # Network batching / rate limiting is adaptive inside data_store
     print(f"Scanning in batches of {chunk_size}...")
     
     pbar = tqdm(total=len(symbols), unit="stock")
     
-    import time
-    
     for chunk in chunk_list(symbols, chunk_size):
         try:
-            # Download batch (Need 1y for EMA 200)
-            data = yf.download(chunk, period="1y", interval="1d", group_by='ticker', threads=True, progress=False, auto_adjust=True)
+            # Need 1y for EMA 200; served from the local OHLCV cache
+            frames = load_ohlcv(chunk, period="1y")
             
-            if data.empty:
+            if not frames:
                 pbar.update(len(chunk))
-                time.sleep(1)
                 continue
                 
             for symbol in chunk:
+                df_sym = frames.get(symbol)
+                if df_sym is None:
+                    continue
                 try:
-                    df_sym = pd.DataFrame()
-                    
-                    if isinstance(data.columns, pd.MultiIndex):
-                        try:
-                            df_sym = data.xs(symbol, level=0, axis=1)
-                        except KeyError:
-                            continue
-                    else:
-                        if len(chunk) == 1 and chunk[0] == symbol:
-                            df_sym = data
-                        else:
-                            continue
-                    
-                    df_sym = df_sym.dropna(how='all')
-                    
-                    if not df_sym.empty:
-                        process_swing_stock_data(symbol, df_sym, strategy_type)
-                        
+                    process_swing_stock_data(symbol, df_sym, strategy_type)
                 except Exception:
                     pass
                 
                 pbar.update(1)
-            
-            time.sleep(2)
                 
         except Exception as e:
             print(f"Batch error: {e}")
             pbar.update(len(chunk))
-            time.sleep(5)
 
     pbar.close()
     print("\n--- Swing Scan Complete ---")
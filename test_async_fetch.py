@@ -0,0 +1,83 @@
+import time
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from async_fetch import AsyncFetcher
+
+
+class SlowSource:
+    """Stand-in for Ticker.history: sleeps, counts calls and peak concurrency."""
+
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, symbol, period, interval):
+        with self.lock:
+            self.calls.append((symbol, period, interval))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if symbol in self.fail:
+            raise ConnectionError("429 Too Many Requests")
+        return pd.DataFrame({'Close': [1.0, 2.0]})
+
+
+def test_concurrent_requests_for_same_key_share_one_fetch():
+    source = SlowSource(delay=0.2)
+    fetcher = AsyncFetcher(history_fn=source)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        frames = list(pool.map(lambda _: fetcher.fetch_history('INFY.NS', '6mo'), range(6)))
+    assert len(source.calls) == 1
+    assert fetcher.stats['coalesced'] == 5
+
+    # Every caller owns its copy
+    frames[0]['Close'] = 0.0
+    assert frames[1]['Close'].iloc[-1] == 2.0
+
+    # Different period -> different fetch
+    fetcher.fetch_history('INFY.NS', '2y')
+    assert len(source.calls) == 2
+
+
+def test_fetch_many_runs_in_parallel_with_bounded_concurrency():
+    source = SlowSource(delay=0.1, fail={'BAD.NS'})
+    fetcher = AsyncFetcher(max_concurrency=3, history_fn=source)
+    requests = [(f"S{i}.NS", '6mo', '1d') for i in range(9)] + [('BAD.NS', '6mo', '1d')]
+
+    start = time.time()
+    frames = fetcher.fetch_many(requests)
+    elapsed = time.time() - start
+
+    assert source.peak == 3
+    assert elapsed < 0.1 * len(requests) * 0.7  # clearly faster than serial
+    assert frames[-1] is None
+    assert all(df is not None for df in frames[:-1])
+
+
+def test_submitted_news_runs_while_caller_works():
+    def slow_news(symbol):
+        time.sleep(0.2)
+        return [{'title': symbol}]
+
+    fetcher = AsyncFetcher(news_fn=slow_news, history_fn=SlowSource(delay=0.2))
+
+    start = time.time()
+    news = fetcher.submit_news('INFY.NS')
+    fetcher.fetch_history('INFY.NS')
+    assert news.result() == [{'title': 'INFY.NS'}]
+    assert time.time() - start < 0.35  # both 0.2s fetches overlapped
+
+
+if __name__ == "__main__":
+    print("Testing async fetch layer...")
+    test_concurrent_requests_for_same_key_share_one_fetch()
+    test_fetch_many_runs_in_parallel_with_bounded_concurrency()
+    test_submitted_news_runs_while_caller_works()
+    print("SUCCESS: Requests are coalesced and run concurrently within the limit.")
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from strategy import calculate_strategy_indicators
+from backtester import _backtest_frame, _metrics, run_backtest_universe, run_portfolio_backtest, _portfolio_panels
+from paper_trader import PaperTrader
+from tests_helpers import make_frames, gapped_frames
+
+
+def legacy_trades(df):
+    """The original bar-by-bar loop from run_backtest, kept as the reference."""
+    trades = []
+    in_trade = False
+    for i in range(20, len(df)):
+        curr_close = df['close'].iloc[i]
+        prev_close = df['close'].iloc[i-1]
+        prev_tsl = df['tsl'].iloc[i-1]
+        curr_tsl = df['tsl'].iloc[i]
+        if not in_trade:
+            if prev_close < prev_tsl and curr_close > curr_tsl:
+                entry_price = curr_close
+                entry_date = df.index[i]
+                recent_low = df['low'].iloc[i-10:i].min()
+                stop_loss = recent_low if recent_low < entry_price else entry_price * 0.95
+                target_price = entry_price + (1.5 * (entry_price - stop_loss))
+                in_trade = True
+        else:
+            if df['low'].iloc[i] <= stop_loss:
+                trades.append((entry_date, df.index[i], entry_price, stop_loss, 'Loss'))
+                in_trade = False
+            elif df['high'].iloc[i] >= target_price:
+                trades.append((entry_date, df.index[i], entry_price, target_price, 'Win'))
+                in_trade = False
+    return trades
+
+
+def test_core_matches_legacy_loop():
+    for symbol, df in make_frames().items():
+        df = calculate_strategy_indicators(df.copy())
+        expected = legacy_trades(df)
+        got = [(t['Entry Date'], t['Exit Date'], t['Entry Price'], t['Exit Price'], t['Result'])
+               for t in _backtest_frame(df)]
+        assert len(got) == len(expected), symbol
+        for g, e in zip(got, expected):
+            assert g[0] == e[0] and g[1] == e[1] and g[4] == e[4], (symbol, g, e)
+            assert np.isclose(g[2], e[2]) and np.isclose(g[3], e[3]), (symbol, g, e)
+
+
+def test_universe_matches_single_symbol():
+    frames = make_frames(n_symbols=10)
+    result = run_backtest_universe(frames=frames)
+    summary = result['summary'].set_index('Symbol')
+    assert len(summary) == 10
+    for symbol, df in frames.items():
+        single = _metrics(_backtest_frame(calculate_strategy_indicators(df.copy())))
+        assert summary.loc[symbol, 'total_trades'] == single['total_trades']
+        assert np.isclose(summary.loc[symbol, 'total_return'], single['total_return'])
+    assert len(result['trades']) == summary['total_trades'].sum()
+
+
+def test_portfolio_respects_paper_trader_rules():
+    trader = PaperTrader()
+    result = run_portfolio_backtest(frames=make_frames(n_symbols=30), initial_capital=200000, trader=trader)
+    trades, curve = result['trades'], result['equity_curve']
+    assert len(trades) > 0
+    assert trades.groupby('Entry Date').size().max() <= trader.MAX_TRADES_PER_DAY
+    assert (trades['Quantity'] * trades['Entry Price'] <= trader.MAX_CAPITAL_PER_TRADE).all()
+    assert (curve['cash'] >= -1e-6).all()
+    assert np.allclose(curve['equity'], curve['cash'] + curve['invested'])
+    assert (curve['drawdown'] <= 0).all()
+    stops = trades[trades['Reason'] == "Stop Loss Hit"]
+    assert (stops['Exit Price'] < stops['Entry Price']).all()
+
+
+def test_portfolio_signals_use_each_symbols_own_bars():
+    frames = gapped_frames()
+    p = _portfolio_panels(frames)
+    for j, (symbol, df) in enumerate(frames.items()):
+        alone = _portfolio_panels({symbol: df})
+        rows = p['index'].get_indexer(df.index)
+        for name in ['tsl', 'buy', 'sell', 'score']:
+            assert np.array_equal(p[name][rows, j], alone[name][:, 0], equal_nan=True), (symbol, name)
+
+
+def test_portfolio_panels_see_new_prices():
+    frames = make_frames(n_symbols=3, n_days=100, seed=4)
+    before = _portfolio_panels(frames)
+    assert _portfolio_panels(frames) is before
+
+    # Same shape, re-adjusted history: the cached panels must not be served
+    frames = {s: df * 0.5 for s, df in frames.items()}
+    after = _portfolio_panels(frames)
+    assert after is not before
+    assert np.allclose(after['close'], before['close'] * 0.5)
+
+
+if __name__ == "__main__":
+    print("Testing NumPy backtest core against the legacy loop...")
+    test_core_matches_legacy_loop()
+    test_universe_matches_single_symbol()
+    test_portfolio_respects_paper_trader_rules()
+    test_portfolio_signals_use_each_symbols_own_bars()
+    test_portfolio_panels_see_new_prices()
+    print("SUCCESS: Backtest engine matches the legacy loop.")
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from btst_strategy import build_btst_feature_matrix, _universe_features, BTST_FEATURES
+from tests_helpers import gapped_frames
+
+
+def test_features_use_each_symbols_own_bars():
+    frames = gapped_frames()
+    matrix = build_btst_feature_matrix(frames)
+    for symbol, df in frames.items():
+        alone = build_btst_feature_matrix({symbol: df}).xs(symbol, level='Symbol')
+        together = matrix.xs(symbol, level='Symbol')
+        pd.testing.assert_frame_equal(together, alone, check_freq=False)
+
+
+def test_gapped_symbol_does_not_drop_candidates():
+    frames = gapped_frames()
+    _, latest = _universe_features(frames)
+    latest = latest.dropna(subset=BTST_FEATURES)
+    assert set(latest.index) == set(frames)
+    for symbol, df in frames.items():
+        _, alone = _universe_features({symbol: df})
+        assert np.allclose(latest.loc[symbol, BTST_FEATURES].astype(float),
+                           alone.loc[symbol, BTST_FEATURES].astype(float))
+
+
+if __name__ == "__main__":
+    print("Testing BTST features on symbols with different calendars...")
+    test_features_use_each_symbols_own_bars()
+    test_gapped_symbol_does_not_drop_candidates()
+    print("SUCCESS: BTST features are computed on each symbol's own bars.")
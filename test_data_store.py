@@ -0,0 +1,156 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+import pandas as pd
+import data_store
+from data_store import load_ohlcv, trim_period, OVERLAP_DAYS
+from download_scheduler import DownloadScheduler
+from tests_helpers import make_frames, FakeClock
+
+
+def make_source(n_days=300):
+    """Synthetic daily bars ending today, like a fresh yf.download."""
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_days)
+    return {s: data_store._normalize(df.set_axis(index)) for s, df in make_frames(n_symbols=3, n_days=n_days).items()}
+
+
+class FakeDownload:
+    """Stand-in for download_daily over `source`; records the kwargs of every batch."""
+
+    def __init__(self, source):
+        self.source = source
+        self.calls = []
+
+    def __call__(self, chunk, **kwargs):
+        self.calls.append((list(chunk), kwargs))
+        frames = {}
+        for symbol in chunk:
+            if symbol not in self.source:
+                continue  # unknown / delisted ticker
+            df = self.source[symbol]
+            if 'start' in kwargs:
+                df = df[df.index >= pd.Timestamp(kwargs['start'])]
+            else:
+                df = trim_period(df, kwargs['period'])
+            frames[symbol] = df.copy()
+        return frames
+
+    def symbols(self):
+        return [s for chunk, _ in self.calls for s in chunk]
+
+
+@contextmanager
+def stubbed_store(source):
+    """Points data_store at a temporary cache directory and a fake download source."""
+    original = (data_store.CACHE_DIR, data_store.download_daily, data_store.get_scheduler)
+    clock = FakeClock()
+    scheduler = DownloadScheduler(clock=clock, sleep=clock.sleep, rng=lambda: 0.5)
+    fake = FakeDownload(source)
+    with tempfile.TemporaryDirectory() as directory:
+        data_store.CACHE_DIR = directory
+        data_store.download_daily = fake
+        data_store.get_scheduler = lambda: scheduler
+        data_store._failed_until.clear()
+        try:
+            yield fake
+        finally:
+            data_store.CACHE_DIR, data_store.download_daily, data_store.get_scheduler = original
+            data_store._failed_until.clear()
+
+
+def make_stale(symbol):
+    path = data_store._cache_path(symbol)
+    old = os.path.getmtime(path) - 2 * data_store.MAX_CACHE_AGE
+    os.utime(path, (old, old))
+
+
+def assert_frames_equal(got, source, period):
+    assert set(got) == set(source)
+    for symbol, df in source.items():
+        pd.testing.assert_frame_equal(got[symbol], trim_period(df, period), check_freq=False)
+
+
+def test_incremental_merge_fetches_only_the_overlap():
+    source = make_source()
+    history = {s: df.iloc[:-10] for s, df in source.items()}
+    with stubbed_store(history) as fake:
+        load_ohlcv(list(source), period="1y")
+        assert load_ohlcv(list(source), period="1y") and len(fake.calls) == 1  # fresh: served from disk
+
+        fake.source = source
+        for symbol in source:
+            make_stale(symbol)
+        got = load_ohlcv(list(source), period="1y")
+
+        _, kwargs = fake.calls[-1]
+        last_cached = next(iter(history.values())).index[-1]
+        assert kwargs == {'start': (last_cached - timedelta(days=OVERLAP_DAYS)).strftime('%Y-%m-%d')}
+        assert_frames_equal(got, source, "1y")
+
+
+def test_readjusted_history_forces_full_refetch():
+    source = make_source()
+    with stubbed_store(source) as fake:
+        load_ohlcv(list(source), period="1y")
+        # A split halves every past close
+        fake.source = {s: df * 0.5 for s, df in source.items()}
+        for symbol in source:
+            make_stale(symbol)
+        got = load_ohlcv(list(source), period="1y")
+
+        assert 'start' in fake.calls[-2][1] and fake.calls[-1][1] == {'period': "1y"}
+        assert_frames_equal(got, fake.source, "1y")
+
+
+def test_longer_period_than_cached_is_downloaded():
+    source = make_source()
+    with stubbed_store(source) as fake:
+        load_ohlcv(list(source), period="6mo")
+        got = load_ohlcv(list(source), period="1y")
+        assert fake.calls[-1][1] == {'period': "1y"}
+        assert_frames_equal(got, source, "1y")
+
+        got = load_ohlcv(list(source), period="3mo")  # covered by the 1y download
+        assert len(fake.calls) == 2
+        assert_frames_equal(got, source, "3mo")
+
+
+def test_offline_serves_the_cache_as_is():
+    source = make_source()
+    with stubbed_store(source) as fake:
+        load_ohlcv(list(source), period="6mo")
+        for symbol in source:
+            make_stale(symbol)
+        got = load_ohlcv(list(source) + ["NEW.NS"], period="1y", offline=True)
+        assert len(fake.calls) == 1  # no network: stale and missing symbols are not fetched
+        assert_frames_equal(got, source, "6mo")
+
+
+def test_failed_downloads_are_not_retried_every_call():
+    source = make_source()
+    with stubbed_store(source) as fake:
+        load_ohlcv(list(source) + ["DELISTED.NS"], period="1y")
+        assert "DELISTED.NS" in fake.symbols()
+
+        # Stale symbols whose top-up fails keep their cached bars for another max_age
+        fake.source = {}
+        for symbol in source:
+            make_stale(symbol)
+        got = load_ohlcv(list(source), period="1y")
+        assert_frames_equal(got, source, "1y")
+
+        n_calls = len(fake.calls)
+        got = load_ohlcv(list(source) + ["DELISTED.NS"], period="1y")
+        assert len(fake.calls) == n_calls
+        assert_frames_equal(got, source, "1y")
+
+
+if __name__ == "__main__":
+    print("Testing the OHLCV cache with a fake download source...")
+    test_incremental_merge_fetches_only_the_overlap()
+    test_readjusted_history_forces_full_refetch()
+    test_longer_period_than_cached_is_downloaded()
+    test_offline_serves_the_cache_as_is()
+    test_failed_downloads_are_not_retried_every_call()
+    print("SUCCESS: OHLCV cache behaves as expected.")
@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import database
+
+
+def open_in_thread():
+    """Opens a connection on a short-lived thread (like a Streamlit rerun) and returns it."""
+    opened = []
+    worker = threading.Thread(target=lambda: opened.append(database.get_connection()))
+    worker.start()
+    worker.join()
+    return opened[0]
+
+
+def is_closed(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def test_finished_threads_do_not_leak_connections():
+    original = database.DB_FILE
+    database.DB_FILE = os.path.join(tempfile.mkdtemp(), "signals.db")
+    try:
+        leaked = [open_in_thread() for _ in range(5)]
+        # The next thread to connect closes every connection whose thread has exited
+        open_in_thread()
+        assert all(is_closed(conn) for conn in leaked)
+        assert len(database._connections) <= 1
+    finally:
+        database.DB_FILE = original
+
+
+def test_close_connection_reopens_on_next_use():
+    original = database.DB_FILE
+    database.DB_FILE = os.path.join(tempfile.mkdtemp(), "signals.db")
+    try:
+        conn = database.get_connection()
+        database.close_connection()
+        assert is_closed(conn)
+        assert database.get_connection() is not conn
+        assert database.get_recent_signals() == []
+        database.close_connection()
+    finally:
+        database.DB_FILE = original
+
+
+if __name__ == "__main__":
+    print("Testing per-thread SQLite connection cleanup...")
+    test_finished_threads_do_not_leak_connections()
+    test_close_connection_reopens_on_next_use()
+    print("SUCCESS: Connections of finished threads are closed.")
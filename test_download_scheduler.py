@@ -0,0 +1,116 @@
+from download_scheduler import DownloadScheduler, TokenBucket
+from tests_helpers import FakeClock
+
+
+class FakeDownloader:
+    """
+    Local stand-in for yf.download batches.
+    - latency_per_symbol: virtual seconds each batch takes per symbol
+    - fail_calls: call numbers (1-based) that raise, like a throttled request
+    - bad_symbols: symbols that are always missing from the result
+    """
+
+    def __init__(self, clock, latency_per_symbol=0.05, fail_calls=(), bad_symbols=()):
+        self.clock = clock
+        self.latency_per_symbol = latency_per_symbol
+        self.fail_calls = set(fail_calls)
+        self.bad_symbols = set(bad_symbols)
+        self.calls = []
+
+    def __call__(self, chunk):
+        self.calls.append(list(chunk))
+        self.clock.now += self.latency_per_symbol * len(chunk)
+        if len(self.calls) in self.fail_calls:
+            raise ConnectionError("429 Too Many Requests")
+        return {s: f"bars:{s}" for s in chunk if s not in self.bad_symbols}
+
+
+def make_scheduler(clock, **kwargs):
+    return DownloadScheduler(clock=clock, sleep=clock.sleep, rng=lambda: 0.5, **kwargs)
+
+
+SYMBOLS = [f"SYM{i}.NS" for i in range(300)]
+
+
+def test_healthy_source_grows_chunks():
+    clock = FakeClock()
+    fake = FakeDownloader(clock, latency_per_symbol=0.01)
+    scheduler = make_scheduler(clock, rate=1000, burst=100)
+    results, failed = scheduler.run(SYMBOLS, fake)
+    assert len(results) == len(SYMBOLS) and not failed
+    assert max(len(c) for c in fake.calls) > 20, "chunk size should grow on a fast, healthy source"
+    assert scheduler.stats['errors'] == 0
+
+
+def test_errors_back_off_and_recover():
+    clock = FakeClock()
+    fake = FakeDownloader(clock, fail_calls={2, 3})
+    scheduler = make_scheduler(clock, rate=1000, burst=100, base_backoff=1.0)
+    results, failed = scheduler.run(SYMBOLS, fake)
+    assert len(results) == len(SYMBOLS) and not failed
+    assert scheduler.stats['errors'] == 2
+    # Exponential backoff with jitter: 0.75 * 1s, then 0.75 * 2s
+    backoffs = [s for s in clock.slept if s >= 0.5]
+    assert backoffs[:2] == [0.75, 1.5], backoffs
+    # The failed batch was re-sent in smaller chunks
+    assert len(fake.calls[2]) < len(fake.calls[1])
+
+
+def test_bad_symbol_retried_individually():
+    clock = FakeClock()
+    fake = FakeDownloader(clock, bad_symbols={"FLUOROCHEM.NS"})
+    scheduler = make_scheduler(clock, rate=1000, burst=100, max_retries=2)
+    results, failed = scheduler.run(SYMBOLS[:40] + ["FLUOROCHEM.NS"], fake)
+    assert failed == ["FLUOROCHEM.NS"]
+    assert len(results) == 40
+    single_retries = [c for c in fake.calls if c == ["FLUOROCHEM.NS"]]
+    assert len(single_retries) == 2
+
+
+def test_slow_source_shrinks_chunks():
+    clock = FakeClock()
+    fake = FakeDownloader(clock, latency_per_symbol=1.0)
+    scheduler = make_scheduler(clock, rate=1000, burst=100, target_latency=10.0)
+    scheduler.run(SYMBOLS[:100], fake)
+    # Settles on the largest chunk that stays within the latency target
+    assert scheduler.chunk_size < 20
+    assert scheduler.chunk_size * fake.latency_per_symbol <= scheduler.target_latency
+
+
+def test_outage_fails_fast():
+    clock = FakeClock()
+    fake = FakeDownloader(clock, fail_calls=set(range(1, 10000)))
+    scheduler = make_scheduler(clock, rate=1000, burst=100, max_consecutive_errors=5)
+    symbols = [f"SYM{i}.NS" for i in range(2000)]
+    results, failed = scheduler.run(symbols, fake)
+    assert not results
+    assert sorted(failed) == sorted(symbols)
+    assert len(fake.calls) == 5
+    assert sum(clock.slept) < 30, clock.slept
+
+    # Breaker state does not leak into the next run: a healthy source works again
+    scheduler.consecutive_errors = 5000  # exponent is capped, no OverflowError
+    assert scheduler._backoff(5000) <= scheduler.max_backoff
+    fake.fail_calls = set()
+    results, failed = scheduler.run(symbols[:50], fake)
+    assert len(results) == 50 and not failed
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=20, clock=clock, sleep=clock.sleep)
+    for _ in range(12):
+        bucket.acquire(10)
+    # 120 tokens at 10/s with a burst of 20 needs at least 10 seconds
+    assert clock.now >= 10.0 - 1e-9
+
+
+if __name__ == "__main__":
+    print("Testing Download Scheduler against a fake downloader...")
+    test_healthy_source_grows_chunks()
+    test_errors_back_off_and_recover()
+    test_bad_symbol_retried_individually()
+    test_slow_source_shrinks_chunks()
+    test_outage_fails_fast()
+    test_token_bucket_limits_rate()
+    print("SUCCESS: Download scheduler behaves as expected.")
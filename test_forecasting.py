@@ -0,0 +1,59 @@
+import tempfile
+import numpy as np
+import forecasting
+from model_registry import ModelRegistry
+from tests_helpers import gapped_frames
+
+
+def fresh_registry(directory):
+    forecasting._registry = ModelRegistry("forecasting", model_dir=directory)
+
+
+def test_predict_many_matches_single_symbol_on_gapped_calendars():
+    frames = gapped_frames()
+    original = forecasting._registry
+    try:
+        with tempfile.TemporaryDirectory() as batch_dir, tempfile.TemporaryDirectory() as single_dir:
+            fresh_registry(batch_dir)
+            batch = forecasting.predict_many(list(frames), frames=frames, max_workers=1).set_index('Symbol')
+            assert set(batch.index) == set(frames)
+
+            # Each symbol fitted alone, without models from the batch run
+            fresh_registry(single_dir)
+            for symbol, df in frames.items():
+                single = forecasting.get_ai_price_prediction(symbol, df=df)
+                assert np.isclose(batch.loc[symbol, 'predicted_price'], single['predicted_price'])
+                assert np.isclose(batch.loc[symbol, 'confidence'], single['confidence'])
+    finally:
+        forecasting._registry = original
+
+
+def test_readjusted_history_is_retrained():
+    df = gapped_frames()['SYM2.NS']
+    original = forecasting._registry, forecasting.fit_model
+    fits = []
+
+    def counting_fit(X, y, n_jobs=-1):
+        fits.append(len(X))
+        return original[1](X, y, n_jobs=n_jobs)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            fresh_registry(directory)
+            forecasting.fit_model = counting_fit
+            forecasting.predict_from_frame('SYM2.NS', df)
+            forecasting.predict_from_frame('SYM2.NS', df)
+            assert len(fits) == 1  # same bars: served from the registry
+
+            # A split halves every past price; the last bar date is unchanged
+            forecasting.predict_from_frame('SYM2.NS', df * 0.5)
+            assert len(fits) == 2
+    finally:
+        forecasting._registry, forecasting.fit_model = original
+
+
+if __name__ == "__main__":
+    print("Testing batch forecasts on symbols with different calendars...")
+    test_predict_many_matches_single_symbol_on_gapped_calendars()
+    test_readjusted_history_is_retrained()
+    print("SUCCESS: predict_many matches get_ai_price_prediction per symbol.")
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import numpy as np
+from datetime import datetime
+from strategy import ema_panel, rsi_panel, atr_panel
+from incremental_indicators import EMA, RSI, ATR, RollingMean, IndicatorBank
+from tests_helpers import make_frames
+
+SPECS = {'ema_50': ('ema', 50), 'rsi': ('rsi', 14), 'atr': ('atr', 14), 'vol_avg': ('volume_mean', 20)}
+
+
+def make_frame(n_days=200, seed=4):
+    df = make_frames(n_symbols=1, n_days=n_days, seed=seed)['SYM0.NS']
+    df['volume'] = np.random.default_rng(seed).integers(1e5, 1e6, n_days).astype(float)
+    return df
+
+
+def test_one_bar_updates_match_batch():
+    df = make_frame()
+    ema, rsi, atr, vol = EMA(50), RSI(14), ATR(14), RollingMean(20)
+    got = np.array([
+        (ema.update(c), rsi.update(c), atr.update(h, l, c), vol.update(v))
+        for h, l, c, v in zip(df['high'], df['low'], df['close'], df['volume'])
+    ])
+    assert np.allclose(got[:, 0], ema_panel(df['close'], 50), equal_nan=True)
+    assert np.allclose(got[:, 1], rsi_panel(df['close'], 14), equal_nan=True)
+    assert np.allclose(got[:, 2], atr_panel(df['high'], df['low'], df['close'], 14), equal_nan=True)
+    assert np.allclose(got[:, 3], df['volume'].rolling(window=20).mean(), equal_nan=True)
+
+
+def test_saved_state_resumes_next_day():
+    df = make_frame()
+    path = os.path.join(tempfile.mkdtemp(), "bank.json")
+
+    bank = IndicatorBank(SPECS, history=3)
+    bank.update_frame('SYM0.NS', df.iloc[:-1])
+    bank.save(path)
+
+    resumed = IndicatorBank.load(path, SPECS, history=3)
+    rows = resumed.update_frame('SYM0.NS', df)
+    assert resumed.symbols['SYM0.NS']['indicators']['ema_50'].count == len(df)
+
+    full = IndicatorBank(SPECS, history=3).update_frame('SYM0.NS', df)
+    for a, b in zip(rows, full):
+        for name in SPECS:
+            assert np.isclose(a[name], b[name], equal_nan=True), name
+
+    # Different specs -> nothing is reused
+    assert not IndicatorBank.load(path, {'rsi': ('rsi', 7)}).symbols
+
+
+def test_readjusted_history_rewarms():
+    df = make_frame()
+    bank = IndicatorBank(SPECS)
+    bank.update_frame('SYM0.NS', df.iloc[:-1])
+
+    adjusted = df.copy()
+    adjusted[['open', 'high', 'low', 'close']] /= 2  # e.g. a 2:1 split
+    row = bank.update_frame('SYM0.NS', adjusted)[-1]
+    assert np.isclose(row['rsi'], rsi_panel(adjusted['close'], 14).iloc[-1])
+    assert np.isclose(row['ema_50'], ema_panel(adjusted['close'], 50)[-1])
+
+
+def test_forming_bar_is_not_committed():
+    df = make_frame()
+    today = df.index[-1]
+    partial = df.copy()
+    partial.iloc[-1, partial.columns.get_loc('close')] *= 0.98
+    partial.iloc[-1, partial.columns.get_loc('volume')] /= 3
+
+    # Mid-session: the partial bar shows in the outputs but is not committed
+    bank = IndicatorBank(SPECS, clock=lambda: datetime.combine(today.date(), datetime.min.time()).replace(hour=11))
+    row = bank.update_frame('SYM0.NS', partial)[-1]
+    assert np.isclose(row['rsi'], rsi_panel(partial['close'], 14).iloc[-1])
+    assert bank.symbols['SYM0.NS']['last_date'] == df.index[-2].strftime('%Y-%m-%d')
+
+    # After the close the final bar is fed on top of yesterday's state
+    bank.clock = lambda: datetime.combine(today.date(), datetime.min.time()).replace(hour=16)
+    row = bank.update_frame('SYM0.NS', df)[-1]
+    assert np.isclose(row['rsi'], rsi_panel(df['close'], 14).iloc[-1])
+    assert bank.symbols['SYM0.NS']['indicators']['ema_50'].count == len(df)
+
+
+def test_changed_volume_rewarms():
+    df = make_frame()
+    bank = IndicatorBank(SPECS)
+    bank.update_frame('SYM0.NS', df.iloc[:-1])
+
+    revised = df.copy()
+    revised.iloc[-2, revised.columns.get_loc('volume')] *= 2
+    row = bank.update_frame('SYM0.NS', revised)[-1]
+    assert np.isclose(row['vol_avg'], revised['volume'].rolling(window=20).mean().iloc[-1])
+
+
+if __name__ == "__main__":
+    print("Testing incremental indicators...")
+    test_one_bar_updates_match_batch()
+    test_saved_state_resumes_next_day()
+    test_readjusted_history_rewarms()
+    test_forming_bar_is_not_committed()
+    test_changed_volume_rewarms()
+    print("SUCCESS: Incremental indicators match the batch versions and resume from saved state.")
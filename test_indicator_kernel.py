@@ -0,0 +1,50 @@
+import numpy as np
+import pandas_ta as ta
+from analysis import _indicator_kernel, _trend_prediction
+from tests_helpers import make_frames
+
+
+def column(df, prefix):
+    """The pandas-ta output column whose name starts with `prefix` (e.g. 'MACDh_')."""
+    matches = [c for c in df.columns if c.startswith(prefix)]
+    assert len(matches) == 1, (prefix, list(df.columns))
+    return df[matches[0]]
+
+
+def test_kernel_matches_direct_pandas_ta_calls():
+    for df in make_frames(n_symbols=5, n_days=150, seed=21).values():
+        high, low, close = df['high'], df['low'], df['close']
+        k = _indicator_kernel(df)
+
+        macd = ta.macd(close)
+        bb = ta.bbands(close)
+        expected = {
+            'adx': ta.adx(high, low, close, length=14)['ADX_14'].iloc[-1],
+            'rsi': ta.rsi(close, length=14).iloc[-1],
+            'atr': ta.atr(high, low, close, length=14).iloc[-1],
+            'macd': column(macd, 'MACD_').iloc[-1],
+            'macdh': column(macd, 'MACDh_').iloc[-1],
+            'macds': column(macd, 'MACDs_').iloc[-1],
+            'bb_lower': column(bb, 'BBL_').iloc[-1],
+            'bb_middle': column(bb, 'BBM_').iloc[-1],
+            'bb_upper': column(bb, 'BBU_').iloc[-1],
+        }
+        for name, value in expected.items():
+            assert np.isclose(k[name], value), (name, k[name], value)
+
+        # The label built from the name-based values is the kernel's label
+        assert _trend_prediction({**k, **expected}) == _trend_prediction(k)
+
+
+def test_kernel_does_not_modify_the_frame():
+    df = make_frames(n_symbols=1, n_days=150, seed=21)['SYM0.NS']
+    before = df.copy()
+    _indicator_kernel(df)
+    assert df.equals(before) and list(df.columns) == list(before.columns)
+
+
+if __name__ == "__main__":
+    print("Testing the technical analysis kernel against pandas-ta...")
+    test_kernel_matches_direct_pandas_ta_calls()
+    test_kernel_does_not_modify_the_frame()
+    print("SUCCESS: Kernel values match the named pandas-ta columns.")
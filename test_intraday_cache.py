@@ -0,0 +1,65 @@
+import pandas as pd
+from download_scheduler import DownloadScheduler
+from intraday_cache import IntradayCache
+from tests_helpers import FakeClock
+
+
+class FakeFetch:
+    """Stand-in for the batched 5m download; records every batch it is asked for."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, chunk):
+        self.calls.append(list(chunk))
+        return {s: pd.DataFrame({'close': [100.0 + len(self.calls)], 'volume': [1000]}) for s in chunk}
+
+
+def make_cache(now=1_000_000_200.0):
+    clock = FakeClock(now)
+    fetch = FakeFetch()
+    scheduler = DownloadScheduler(clock=clock, sleep=clock.sleep)
+    return IntradayCache(fetch_fn=fetch, clock=clock, scheduler=scheduler), clock, fetch
+
+
+def test_prefetch_is_one_batch_and_reads_hit_memory():
+    cache, clock, fetch = make_cache()
+    cache.prefetch(['A.NS', 'B.NS', 'C.NS'])
+    for symbol in ['A.NS', 'B.NS', 'C.NS', 'A.NS']:
+        assert cache.get(symbol) is not None
+    cache.prefetch(['A.NS', 'B.NS'])
+    assert fetch.calls == [['A.NS', 'B.NS', 'C.NS']]
+
+    # Only the symbol that is not cached yet is fetched
+    cache.prefetch(['A.NS', 'D.NS'])
+    assert fetch.calls[-1] == ['D.NS']
+
+
+def test_entries_expire_at_next_bar_boundary():
+    start = 1_000_000_200.0  # exactly on a 5-minute boundary
+    cache, clock, fetch = make_cache(start)
+    cache.prefetch(['A.NS'])
+
+    clock.now = start + 299  # still inside the same bar
+    cache.prefetch(['A.NS'])
+    assert len(fetch.calls) == 1
+
+    clock.now = start + 300 + cache.publish_delay  # next bar is published
+    bars = cache.get('A.NS')
+    assert len(fetch.calls) == 2
+    assert bars['close'].iloc[-1] == 102.0
+
+
+def test_get_returns_copies():
+    cache, clock, fetch = make_cache()
+    bars = cache.get('A.NS')
+    bars['close'] = 0.0
+    assert cache.get('A.NS')['close'].iloc[-1] != 0.0
+
+
+if __name__ == "__main__":
+    print("Testing intraday cache...")
+    test_prefetch_is_one_batch_and_reads_hit_memory()
+    test_entries_expire_at_next_bar_boundary()
+    test_get_returns_copies()
+    print("SUCCESS: Intraday cache batches fetches and expires on bar boundaries.")
@@ -0,0 +1,102 @@
+import threading
+from datetime import datetime, timedelta
+from strategy import check_buy_signal
+from intraday_engine import IntradayEngine, fetch_today_bars
+from download_scheduler import DownloadScheduler, QUOTE_LIMITS
+from tests_helpers import make_frames, FakeClock
+
+LOOP_INTERVAL = 60  # seconds between auto_trader cycles
+
+
+def test_cycle_matches_batch_crossover():
+    frames = make_frames(n_symbols=60, n_days=120, seed=3)
+    last_day = next(iter(frames.values())).index[-1]
+    quoted = []
+
+    def quote_fn(symbols):
+        quoted.extend(symbols)
+        return {s: frames[s].iloc[-1] for s in symbols}
+
+    engine = IntradayEngine(symbols=list(frames), quote_fn=quote_fn, scan_fn=None,
+                            clock=lambda: datetime.combine(last_day.date(), datetime.min.time()))
+    # Everything but the last bar is history; the last bar arrives as the live quote
+    engine.bootstrap(frames)
+    signals = {s['symbol'] for s in engine.run_cycle()}
+
+    expected = {s for s, df in frames.items() if check_buy_signal(df.copy())}
+    assert signals == expected
+    assert len(quoted) < len(frames)  # only armed symbols are quoted
+
+    # Crossed symbols are offered every cycle until the caller takes them
+    assert {s['symbol'] for s in engine.run_cycle()} == expected
+    taken = sorted(expected)[:1]
+    engine.mark_taken(taken)
+    assert {s['symbol'] for s in engine.run_cycle()} == expected - set(taken)
+
+
+def test_cycle_fits_loop_interval_at_universe_scale():
+    frames = make_frames(n_symbols=2000, n_days=60, seed=5)
+    last_day = next(iter(frames.values())).index[-1]
+    clock = FakeClock()
+    scheduler = DownloadScheduler(clock=clock, sleep=clock.sleep, rng=lambda: 0.5, **QUOTE_LIMITS)
+
+    def download_fn(chunk, period):
+        clock.now += 1.0 + 0.002 * len(chunk)  # one request per chunk
+        return {s: frames[s].iloc[-1:] for s in chunk}
+
+    engine = IntradayEngine(symbols=list(frames), scan_fn=None,
+                            quote_fn=lambda symbols: fetch_today_bars(symbols, scheduler, download_fn),
+                            clock=lambda: datetime.combine(last_day.date(), datetime.min.time()))
+    engine.bootstrap(frames)
+    assert len(engine.watchlist()) >= len(frames) // 4  # a large share of the universe is armed
+
+    start = clock.now
+    engine.run_cycle()
+    assert clock.now - start < LOOP_INTERVAL
+
+
+def test_out_of_reach_symbols_are_not_quoted():
+    frames = make_frames(n_symbols=60, n_days=120, seed=3)
+    last_day = next(iter(frames.values())).index[-1]
+    engine = IntradayEngine(symbols=list(frames), quote_fn=lambda symbols: {}, scan_fn=None,
+                            clock=lambda: datetime.combine(last_day.date(), datetime.min.time()))
+    engine.bootstrap(frames)
+    far = engine.armed()[0]
+    engine.state[far].sup = engine.state[far].close * 1.5
+    assert far not in engine.watchlist()
+    assert len(engine.watchlist()) == len(engine.armed()) - 1
+
+
+def test_new_session_bootstraps_in_the_background():
+    frames = make_frames(n_symbols=60, n_days=120, seed=3)
+    last_day = next(iter(frames.values())).index[-1]
+    now = [datetime.combine(last_day.date(), datetime.min.time()) - timedelta(days=1)]
+    release = threading.Event()
+
+    def load_fn(symbols, period):
+        release.wait(5)  # a full scan that takes a while
+        return frames
+
+    engine = IntradayEngine(symbols=list(frames), scan_fn=None, load_fn=load_fn, clock=lambda: now[0],
+                            quote_fn=lambda symbols: {s: frames[s].iloc[-1] for s in symbols})
+    engine.bootstrap({s: df.iloc[:-1] for s, df in frames.items()})
+
+    # The date changes: the cycle must not block on the scan
+    now[0] += timedelta(days=1)
+    assert engine.run_cycle() == []
+    assert engine.bootstrapping
+    assert engine.run_cycle() == []
+
+    release.set()
+    engine._bootstrap_thread.join(5)
+    expected = {s for s, df in frames.items() if check_buy_signal(df.copy())}
+    assert {s['symbol'] for s in engine.run_cycle()} == expected
+
+
+if __name__ == "__main__":
+    print("Testing intraday engine against the batch crossover check...")
+    test_cycle_matches_batch_crossover()
+    test_cycle_fits_loop_interval_at_universe_scale()
+    test_out_of_reach_symbols_are_not_quoted()
+    test_new_session_bootstraps_in_the_background()
+    print("SUCCESS: Intraday engine matches check_buy_signal.")
@@ -0,0 +1,19 @@
+import numpy as np
+from parameter_sweep import sweep_chunk
+from tests_helpers import gapped_frames
+
+GRID = ((2, 3), (5, 10), (1.5, 2.0))
+
+
+def test_chunk_totals_are_the_sum_of_single_symbol_runs():
+    frames = gapped_frames()
+    together = sweep_chunk(frames, *GRID)
+    for key, values in together.items():
+        alone = np.sum([sweep_chunk({symbol: df}, *GRID)[key] for symbol, df in frames.items()], axis=0)
+        assert np.allclose(values, alone), key
+
+
+if __name__ == "__main__":
+    print("Testing the parameter sweep on symbols with different calendars...")
+    test_chunk_totals_are_the_sum_of_single_symbol_runs()
+    print("SUCCESS: Sweep totals do not depend on how symbols are chunked.")
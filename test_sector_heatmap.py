@@ -0,0 +1,69 @@
+import os
+import tempfile
+import pandas as pd
+import analysis
+from sector_index import SectorIndex
+
+DATES = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"])
+
+
+def bars(closes):
+    """Daily frame with the given {date position: close}."""
+    index = DATES[list(closes)]
+    return pd.DataFrame({'close': list(closes.values())}, index=index)
+
+
+FRAMES = {
+    "A.NS": bars({0: 100.0, 1: 105.0, 2: 110.0}),
+    "B.NS": bars({0: 200.0, 2: 190.0}),   # missing the middle day
+    "C.NS": bars({2: 50.0}),              # only one bar: no change yet
+    "D.NS": bars({0: 40.0, 1: 44.0}),     # no bar on the latest day
+}
+
+
+def heatmap(limit=None):
+    path = os.path.join(tempfile.mkdtemp(), "sector_mapping.csv")
+    with open(path, "w") as f:
+        f.write("symbol,sector\nA.NS,Energy\nB.NS,Technology\nC.NS,Energy\nD.NS,Technology\n")
+    requested = []
+
+    def load_ohlcv(symbols, period):
+        requested.extend(symbols)
+        return {s: FRAMES[s] for s in symbols}
+
+    original = (analysis.get_sector_index, analysis.load_ohlcv)
+    analysis.get_sector_index = lambda: SectorIndex(path)
+    analysis.load_ohlcv = load_ohlcv
+    try:
+        return analysis.get_sector_performance(limit=limit), requested
+    finally:
+        analysis.get_sector_index, analysis.load_ohlcv = original
+
+
+def test_change_and_sector_mean_from_cached_closes():
+    results, requested = heatmap()
+    assert requested == list(FRAMES)  # the whole mapped universe by default
+
+    a_change = (110.0 - 105.0) / 105.0 * 100
+    expected = pd.DataFrame({
+        'Symbol': ["A.NS", "B.NS", "D.NS"],
+        'Sector': ["Energy", "Technology", "Technology"],
+        'Change': [a_change, -5.0, 10.0],
+        'Price': [110.0, 190.0, 44.0],
+        'Sector Change': [a_change, 2.5, 2.5],
+    })
+    got = results.sort_values('Symbol').reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_limit_takes_the_first_mapped_symbols():
+    results, requested = heatmap(limit=2)
+    assert requested == ["A.NS", "B.NS"]
+    assert list(results['Symbol']) == ["A.NS", "B.NS"]
+
+
+if __name__ == "__main__":
+    print("Testing the sector heatmap aggregation...")
+    test_change_and_sector_mean_from_cached_closes()
+    test_limit_takes_the_first_mapped_symbols()
+    print("SUCCESS: Sector heatmap matches the hand-computed frame.")
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from sector_index import SectorIndex, get_sector_index
+
+
+def write_mapping(path, rows, mtime):
+    with open(path, "w") as f:
+        f.write("symbol,sector\n")
+        for symbol, sector in rows:
+            f.write(f"{symbol},{sector}\n")
+    # Explicit mtimes so the reload check doesn't depend on filesystem timestamp resolution
+    os.utime(path, (mtime, mtime))
+
+
+def test_lookups_and_reverse_index():
+    path = os.path.join(tempfile.mkdtemp(), "sector_mapping.csv")
+    write_mapping(path, [("A.NS", "Energy"), ("B.NS", "Technology"), ("C.NS", "Energy"), ("A.NS", "Banking")], 1000)
+    index = SectorIndex(path)
+
+    assert index.sector_of("A.NS") == "Energy"  # first row wins
+    assert index.sector_of("ZZZ.NS") == "Unknown"
+    assert index.sectors_for(["B.NS", "ZZZ.NS"]) == {"B.NS": "Technology", "ZZZ.NS": "Unknown"}
+    assert index.members("Energy") == ["A.NS", "C.NS"]
+    assert index.members("Pharma") == []
+    assert index.sectors() == ["Energy", "Technology"]
+    assert index.symbols() == ["A.NS", "B.NS", "C.NS"]
+
+
+def test_hot_reload_on_mtime_change():
+    path = os.path.join(tempfile.mkdtemp(), "sector_mapping.csv")
+    write_mapping(path, [("A.NS", "Energy")], 1000)
+    index = SectorIndex(path)
+    assert index.sector_of("A.NS") == "Energy"
+
+    write_mapping(path, [("A.NS", "Pharma"), ("D.NS", "Pharma")], 2000)
+    assert index.sector_of("A.NS") == "Pharma"
+    assert index.members("Pharma") == ["A.NS", "D.NS"]
+    assert index.members("Energy") == []
+
+
+def test_unreadable_file_keeps_last_mapping():
+    path = os.path.join(tempfile.mkdtemp(), "sector_mapping.csv")
+    write_mapping(path, [("A.NS", "Energy")], 1000)
+    index = SectorIndex(path)
+    assert index.sector_of("A.NS") == "Energy"
+
+    # Half-written file: no usable columns yet
+    with open(path, "w") as f:
+        f.write("sym")
+    os.utime(path, (2000, 2000))
+    assert index.sector_of("A.NS") == "Energy"
+
+    # Finished with the same mtime: the failed load is retried
+    write_mapping(path, [("A.NS", "Pharma")], 2000)
+    assert index.sector_of("A.NS") == "Pharma"
+
+
+def test_missing_file_is_empty():
+    index = SectorIndex(os.path.join(tempfile.mkdtemp(), "missing.csv"))
+    assert index.sector_of("A.NS") == "Unknown"
+    assert index.symbols() == []
+
+
+def test_default_mapping_loads():
+    index = get_sector_index()
+    assert index.sector_of("RELIANCE.NS") == "Energy"
+    assert "RELIANCE.NS" in index.members("Energy")
+
+
+if __name__ == "__main__":
+    print("Testing Sector Index...")
+    test_lookups_and_reverse_index()
+    test_hot_reload_on_mtime_change()
+    test_unreadable_file_keeps_last_mapping()
+    test_missing_file_is_empty()
+    test_default_mapping_loads()
+    print("SUCCESS: Sector index lookups and hot reload working.")
@@ -0,0 +1,50 @@
+import pandas as pd
+from concurrent.futures import Future
+import stock_context
+from stock_context import StockContext
+from tests_helpers import make_frames
+
+
+def test_history_is_loaded_once_and_sliced():
+    end = pd.Timestamp.today().normalize()
+    df = make_frames(n_symbols=1, n_days=600, seed=1)['SYM0.NS']
+    df.index = pd.bdate_range(end=end, periods=len(df), name='Date')
+    calls = []
+
+    def fake_load(symbols, period="1y"):
+        calls.append((tuple(symbols), period))
+        return {symbols[0]: df}
+
+    def fake_submit_news(symbol):
+        calls.append(('news', symbol))
+        news = Future()
+        news.set_result([{'title': 'Profits rise', 'providerPublishTime': 0}])
+        return news
+
+    original = stock_context.load_ohlcv, stock_context.submit_news
+    stock_context.load_ohlcv, stock_context.submit_news = fake_load, fake_submit_news
+    try:
+        ctx = StockContext('SYM0.NS')
+        six_months, one_year = ctx.window("6mo"), ctx.window("1y")
+        assert six_months.index[0] >= end - pd.DateOffset(months=6)
+        assert len(six_months) < len(one_year) < len(df)
+
+        # Consumers get copies
+        six_months['close'] = 0.0
+        assert (ctx.window("6mo")['close'] > 0).all()
+
+        first = ctx.backtest()
+        assert ctx.backtest() is first
+
+        # News was requested before the history load started, and only once
+        score, items = ctx.sentiment()
+        assert [item['title'] for item in items] == ['Profits rise']
+        assert calls == [('news', 'SYM0.NS'), (('SYM0.NS',), "2y")]
+    finally:
+        stock_context.load_ohlcv, stock_context.submit_news = original
+
+
+if __name__ == "__main__":
+    print("Testing stock detail context...")
+    test_history_is_loaded_once_and_sliced()
+    print("SUCCESS: Stock history is loaded once per render and sliced per consumer.")
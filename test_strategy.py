@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from strategy import calculate_strategy_indicators, calculate_strategy_indicators_panel, add_strategy_indicators
+from tests_helpers import gapped_frames
+
+COLUMNS = ['res', 'sup', 'avn', 'tsl']
+
+
+def ragged_frames():
+    """gapped_frames plus a late listing."""
+    frames = gapped_frames()
+    frames['SYM2.NS'] = frames['SYM2.NS'].iloc[40:]
+    return frames
+
+
+def test_panel_matches_single_symbol_on_gapped_calendar():
+    frames = ragged_frames()
+    wide = {col: pd.concat({s: df[col] for s, df in frames.items()}, axis=1).sort_index()
+            for col in ('high', 'low', 'close')}
+    panel = calculate_strategy_indicators_panel(wide['high'], wide['low'], wide['close'])
+
+    assert list(panel) == list(frames)
+    for symbol, df in frames.items():
+        expected = calculate_strategy_indicators(df.copy())
+        got = panel[symbol]
+        assert got.index.equals(expected.index), symbol
+        for col in COLUMNS:
+            np.testing.assert_array_equal(got[col].to_numpy(), expected[col].to_numpy(), err_msg=f"{symbol} {col}")
+
+
+def test_add_strategy_indicators_on_gapped_calendar():
+    frames = ragged_frames()
+    out = add_strategy_indicators(frames)
+    for symbol, df in frames.items():
+        expected = calculate_strategy_indicators(df.copy())
+        for col in COLUMNS:
+            np.testing.assert_array_equal(out[symbol][col].to_numpy(), expected[col].to_numpy(), err_msg=f"{symbol} {col}")
+
+
+if __name__ == "__main__":
+    print("Testing the panel strategy engine on a gapped calendar...")
+    test_panel_matches_single_symbol_on_gapped_calendar()
+    test_add_strategy_indicators_on_gapped_calendar()
+    print("SUCCESS: Panel indicators match calculate_strategy_indicators.")
@@ -0,0 +1,59 @@
+import sys
+import numpy as np
+from strategy import calculate_strategy_indicators, extract_crossover_events
+from streaming_tsl import StreamingTSL
+from tests_helpers import make_frames
+
+
+def test_matches_batch_indicators():
+    for no in (2, 3, 5):
+        for symbol, df in make_frames(n_symbols=10, n_days=300, seed=11).items():
+            batch = calculate_strategy_indicators(df.copy(), no=no)
+            stream = StreamingTSL(no)
+            tsl, events = [], []
+            for high, low, close in zip(df['high'], df['low'], df['close']):
+                value, event = stream.update(high, low, close)
+                tsl.append(value)
+                events.append(event)
+
+            assert np.allclose(tsl, batch['tsl'], equal_nan=True), (symbol, no)
+            assert stream.avn == batch['avn'].iloc[-1]
+
+            # Same crossover events as the scanner's vectorized masks
+            expected = extract_crossover_events(batch, lookback=len(batch), golden=False)
+            got = [(i, e) for i, e in enumerate(events) if e]
+            if expected['tsl_signal'] is None:
+                assert not got
+            else:
+                assert got[-1] == (expected['tsl_pos'], expected['tsl_signal']), (symbol, no)
+
+
+def test_provisional_bar_does_not_commit():
+    df = make_frames(n_symbols=1, n_days=120, seed=5)['SYM0.NS']
+    history, last = df.iloc[:-1], df.iloc[-1]
+
+    stream = StreamingTSL.from_frame(history)
+    before = (stream.close, stream.tsl, stream.avn, list(stream.highs))
+    for price in (last['close'] * 0.9, last['close'] * 1.1, last['close']):
+        stream.update_provisional(last['high'], last['low'], price)
+    assert (stream.close, stream.tsl, stream.avn, list(stream.highs)) == before
+
+    # Warm start from history + committing the last bar == batch over everything
+    provisional = stream.update_provisional(last['high'], last['low'], last['close'])
+    committed = stream.update(last['high'], last['low'], last['close'])
+    assert provisional == committed
+    assert np.isclose(committed[0], calculate_strategy_indicators(df.copy())['tsl'].iloc[-1])
+
+
+def test_state_is_small():
+    stream = StreamingTSL()
+    assert not hasattr(stream, '__dict__')
+    assert sys.getsizeof(stream) < 200
+
+
+if __name__ == "__main__":
+    print("Testing streaming TSL against the batch implementation...")
+    test_matches_batch_indicators()
+    test_provisional_bar_does_not_commit()
+    test_state_is_small()
+    print("SUCCESS: Streaming TSL matches calculate_strategy_indicators.")
@@ -0,0 +1,51 @@
+import numpy as np
+from walk_forward import run_walk_forward, _fold_windows, btst_fold, HORIZONS
+from btst_strategy import build_btst_feature_matrix
+from tests_helpers import make_frames
+
+TRAIN_DAYS, TEST_DAYS = 100, 20
+
+
+def test_folds_are_embargoed_and_move_forward():
+    frames = make_frames(n_symbols=8, n_days=220, seed=5)
+    dates = build_btst_feature_matrix(frames).index.get_level_values('Date').unique().sort_values()
+    for horizon in HORIZONS.values():
+        windows = _fold_windows(dates, TRAIN_DAYS, TEST_DAYS, horizon)
+        assert len(windows) > 1
+        previous_test = None
+        for train, test in windows:
+            # The last training row's target (horizon bars ahead) ends before the test window
+            assert dates.get_loc(train[-1]) + horizon < dates.get_loc(test[0])
+            assert not set(train) & set(test)
+            if previous_test is not None:
+                assert test[0] > previous_test[-1]
+            previous_test = test
+
+
+def test_fold_metrics_match_the_fold_slice():
+    frames = make_frames(n_symbols=8, n_days=220, seed=5)
+    report = run_walk_forward(frames=frames, models=('btst',), train_days=TRAIN_DAYS,
+                              test_days=TEST_DAYS, max_workers=1)
+    folds = report['folds']
+    assert len(folds) > 1
+    assert (folds['test_start'].iloc[1:].to_numpy() > folds['test_end'].iloc[:-1].to_numpy()).all()
+
+    matrix = build_btst_feature_matrix(frames)
+    row_dates = matrix.index.get_level_values('Date')
+    windows = _fold_windows(row_dates.unique().sort_values(), TRAIN_DAYS, TEST_DAYS, HORIZONS['btst'])
+    by_start = folds.set_index('test_start')
+    for train_dates, test_dates in windows:
+        preds = btst_fold(matrix[row_dates.isin(train_dates)], matrix[row_dates.isin(test_dates)])
+        if preds is None:
+            continue
+        hit_rate = ((preds['prob'] > 0.5) == (preds['actual'] == 1)).mean() * 100
+        row = by_start.loc[test_dates[0]]
+        assert row['predictions'] == len(preds)
+        assert np.isclose(row['hit_rate'], hit_rate)
+
+
+if __name__ == "__main__":
+    print("Testing the walk-forward harness...")
+    test_folds_are_embargoed_and_move_forward()
+    test_fold_metrics_match_the_fold_slice()
+    print("SUCCESS: Walk-forward folds are embargoed and their metrics match.")
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+class FakeClock:
+    """Virtual time: sleep() advances the clock instantly."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_frames(n_symbols=40, n_days=400, seed=7):
+    """Random-walk daily OHLCV frames on one business-day calendar, keyed SYM<i>.NS."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=n_days)
+    frames = {}
+    for s in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        high = close * (1 + rng.uniform(0, 0.03, n_days))
+        low = close * (1 - rng.uniform(0, 0.03, n_days))
+        frames[f"SYM{s}.NS"] = pd.DataFrame(
+            {'open': close, 'high': high, 'low': low, 'close': close, 'volume': 1e5}, index=index)
+    return frames
+
+
+def gapped_frames():
+    """5 aligned symbols; S0 also has a stray Saturday bar, S1 is missing a day."""
+    frames = make_frames(n_symbols=5, n_days=150, seed=9)
+    s0 = frames['SYM0.NS']
+    saturday = s0.index[100] + pd.offsets.Week(weekday=5)
+    frames['SYM0.NS'] = pd.concat([s0, s0.iloc[[100]].set_axis([saturday])]).sort_index()
+    frames['SYM1.NS'] = frames['SYM1.NS'].drop(frames['SYM1.NS'].index[120])
+    return frames
@@ -0,0 +1,18 @@
+def calendar_groups(frames):
+    """
+    Splits {symbol: DataFrame} into a list of sub-dicts whose frames share the
+    exact same index. A wide panel built from one group has no holes, so rolling
+    windows, shifts and diffs see each symbol's own previous bars; on a union
+    calendar a symbol's missing (or extra) day would put NaN rows into every
+    other symbol's columns. Symbols with the common calendar land in one group.
+    """
+    buckets = {}
+    for symbol, df in frames.items():
+        key = (len(df), df.index[0], df.index[-1]) if len(df) else (0, None, None)
+        for index, members in buckets.setdefault(key, []):
+            if index.equals(df.index):
+                members[symbol] = df
+                break
+        else:
+            buckets[key].append((df.index, {symbol: df}))
+    return [members for bucket in buckets.values() for _, members in bucket]
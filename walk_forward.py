@@ -0,0 +1,198 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from data_store import load_ohlcv
+from stock_list import get_nifty100_symbols
+from btst_strategy import build_btst_feature_matrix, BTST_FEATURES, fit_btst_model
+import forecasting
+
+# How many bars ahead each model's target looks. Training rows within this many
+# bars of the test window are dropped (embargo) so no target overlaps the test period.
+HORIZONS = {'btst': 1, 'forecast': 5}
+
+
+def _stacked_forecast_features(frames):
+    """forecasting features for all symbols as one (Date, Symbol) matrix."""
+    features = forecasting.build_feature_panels(frames)
+    stacked = pd.concat(features, names=['Symbol', 'Date']).swaplevel().sort_index()
+    return stacked.dropna(subset=forecasting.FEATURES)
+
+
+def _fold_windows(dates, train_days, test_days, horizon):
+    """Rolling (train dates, test dates) pairs over sorted unique dates, stepping by test_days."""
+    windows = []
+    start = 0
+    while start + train_days < len(dates):
+        train = dates[start:start + train_days - horizon]
+        test = dates[start + train_days:start + train_days + test_days]
+        windows.append((train, test))
+        start += test_days
+    return windows
+
+
+def btst_fold(train, test):
+    """Worker: fit the pooled BTST classifier on one fold, return out-of-sample probabilities."""
+    train = train.dropna(subset=['target'])
+    test = test.dropna(subset=['target'])
+    if train['target'].nunique() < 2 or test.empty:
+        return None
+    model = fit_btst_model(train[BTST_FEATURES], train['target'].astype(int), n_jobs=1)
+    return pd.DataFrame({
+        'prob': model.predict_proba(test[BTST_FEATURES])[:, 1],
+        'actual': test['target'].to_numpy()
+    }, index=test.index)
+
+
+def forecast_fold(parts):
+    """Worker: fit one forecasting model per symbol on one fold, return out-of-sample predictions."""
+    outputs = []
+    for train, test in parts:
+        train = train.dropna(subset=['target'])
+        test = test.dropna(subset=['target'])
+        if len(train) < 50 or test.empty:
+            continue
+        model, _ = forecasting.fit_model(train[forecasting.FEATURES], train['target'], n_jobs=1)
+        outputs.append(pd.DataFrame({
+            'close': test['close'].to_numpy(),
+            'pred': model.predict(test[forecasting.FEATURES]),
+            'actual': test['target'].to_numpy()
+        }, index=test.index))
+    return pd.concat(outputs) if outputs else None
+
+
+def _btst_report(preds, bins):
+    hit = (preds['prob'] > 0.5) == (preds['actual'] == 1)
+    edges = np.linspace(0, 1, bins + 1)
+    calibration = preds.groupby(pd.cut(preds['prob'], edges, include_lowest=True), observed=True).agg(
+        count=('prob', 'size'), mean_prob=('prob', 'mean'), observed_rate=('actual', 'mean'))
+    summary = {
+        'predictions': len(preds),
+        'hit_rate': hit.mean() * 100,
+        'base_rate': preds['actual'].mean() * 100,
+        'brier_score': ((preds['prob'] - preds['actual']) ** 2).mean()
+    }
+    return summary, calibration.reset_index().rename(columns={'prob': 'bin'})
+
+
+def _forecast_report(preds, bins):
+    pred_change = ((preds['pred'] / preds['close'] - 1) * 100).rename('pred_change')
+    actual_change = ((preds['actual'] / preds['close'] - 1) * 100).rename('actual_change')
+    # Directional calls as get_ai_price_prediction makes them (Bullish / Bearish above 1.5%)
+    calls = pred_change.abs() > 1.5
+    calibration = pd.DataFrame({'pred_change': pred_change, 'actual_change': actual_change}).groupby(
+        pd.qcut(pred_change, bins, duplicates='drop'), observed=True).agg(
+        count=('pred_change', 'size'), mean_pred_change=('pred_change', 'mean'),
+        mean_actual_change=('actual_change', 'mean'))
+    summary = {
+        'predictions': len(preds),
+        'hit_rate': (np.sign(pred_change) == np.sign(actual_change)).mean() * 100,
+        'call_hit_rate': (np.sign(pred_change[calls]) == np.sign(actual_change[calls])).mean() * 100 if calls.any() else np.nan,
+        'mae_pct': (pred_change - actual_change).abs().mean()
+    }
+    return summary, calibration.reset_index().rename(columns={'pred_change': 'bin'})
+
+
+def run_walk_forward(symbols=None, frames=None, models=('btst', 'forecast'), period="2y",
+                     train_days=250, test_days=21, max_workers=None, offline=False, bins=10):
+    """
+    Walk-forward evaluation of the BTST classifier and the price forecaster.
+
+    Feature matrices are built once over the whole history and every fold only
+    slices them by date. Folds roll a train window of `train_days` bars and a test
+    window of the next `test_days` bars (minus an embargo of the model's target
+    horizon), and are fitted in parallel on a process pool.
+
+    offline=True reads only the local OHLCV cache (see data_store.load_ohlcv).
+
+    Returns {'summary': DataFrame (hit rate and calibration scores per model),
+             'calibration': {model: DataFrame of bins},
+             'folds': DataFrame (per-fold hit rate per model)}.
+    """
+    if frames is None:
+        frames = load_ohlcv(symbols or [], period=period, offline=offline)
+    frames = {s: df for s, df in frames.items() if len(df) >= 100}
+    if not frames:
+        return None
+
+    workers = max_workers or os.cpu_count() or 1
+    summaries, calibrations, fold_rows = [], {}, []
+
+    for name in models:
+        if name == 'btst':
+            matrix = build_btst_feature_matrix(frames)
+        elif name == 'forecast':
+            matrix = _stacked_forecast_features(frames)
+        else:
+            raise ValueError(f"Unknown model: {name}")
+
+        row_dates = matrix.index.get_level_values('Date')
+        windows = _fold_windows(row_dates.unique().sort_values(), train_days, test_days, HORIZONS[name])
+        if not windows:
+            print(f"Not enough history for a {name} fold")
+            continue
+
+        # Slices of the shared matrix; nothing is recomputed per fold
+        tasks = []
+        for train_dates, test_dates in windows:
+            train = matrix[row_dates.isin(train_dates)]
+            test = matrix[row_dates.isin(test_dates)]
+            if name == 'btst':
+                tasks.append((train, test))
+            else:
+                train_by_symbol = dict(list(train.groupby(level='Symbol')))
+                tasks.append(([(train_by_symbol[s], t) for s, t in test.groupby(level='Symbol')
+                               if s in train_by_symbol],))
+
+        fold_fn = btst_fold if name == 'btst' else forecast_fold
+        if workers <= 1:
+            results = [fold_fn(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                results = list(pool.map(fold_fn, *zip(*tasks)))
+
+        report = _btst_report if name == 'btst' else _forecast_report
+        for (train_dates, test_dates), preds in zip(windows, results):
+            if preds is not None and len(preds):
+                fold_summary, _ = report(preds, bins)
+                fold_rows.append({'model': name, 'test_start': test_dates[0], 'test_end': test_dates[-1],
+                                  'predictions': fold_summary['predictions'], 'hit_rate': fold_summary['hit_rate']})
+
+        preds = [p for p in results if p is not None and len(p)]
+        if not preds:
+            continue
+        summary, calibration = report(pd.concat(preds), bins)
+        summaries.append({'model': name, 'folds': len(preds), **summary})
+        calibrations[name] = calibration
+
+    return {
+        'summary': pd.DataFrame(summaries),
+        'calibration': calibrations,
+        'folds': pd.DataFrame(fold_rows)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Walk-forward evaluation of the BTST and forecasting models')
+    parser.add_argument('--models', nargs='+', default=['btst', 'forecast'], choices=['btst', 'forecast'])
+    parser.add_argument('--period', type=str, default='2y')
+    parser.add_argument('--train-days', type=int, default=250)
+    parser.add_argument('--test-days', type=int, default=21)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--offline', action='store_true', help='Use only locally cached data')
+    args = parser.parse_args()
+
+    start = time.time()
+    report = run_walk_forward(get_nifty100_symbols(), models=args.models, period=args.period,
+                              train_days=args.train_days, test_days=args.test_days,
+                              max_workers=args.workers, offline=args.offline)
+    if report is None:
+        print("No data available.")
+    else:
+        print(report['summary'].to_string(index=False))
+        for name, calibration in report['calibration'].items():
+            print(f"\n--- Calibration: {name} ---")
+            print(calibration.to_string(index=False))
+        print(f"\nDone in {time.time() - start:.1f}s")